@@ -31,6 +31,8 @@ def options():
     nb_cmd.add_argument("-b", "--maskdir", help="Input directory containing black/white masks.", required=True)
     nb_cmd.add_argument("-o", "--outfile", help="Trained classifier output filename.", required=True)
     nb_cmd.add_argument("-p", "--plots", help="Make output plots.", default=False, action="store_true")
+    nb_cmd.add_argument("-m", "--method", help="PDF estimation method, a KDE of sampled pixels or smoothed histograms "
+                                               "of all pixels.", default="kde", choices=["kde", "histogram"])
     nb_cmd.set_defaults(func=run_naive_bayes)
 
     # Create the Naive Bayes Multiclass subcommand
@@ -61,6 +63,10 @@ def options():
                          required=False, type=int, default=0)
     nbm_cmd.add_argument("--n_init", help="Number of Kmeans random initiations", required=False, type=int,
                          default=10)
+    nbm_cmd.add_argument("--batch_size", help="Number of patches per streaming model update (default: fit all at once)",
+                         required=False, type=int)
+    nbm_cmd.add_argument("--n_workers", help="Number of threads that read training images (default: number of CPUs)",
+                         required=False, type=int)
     nbm_cmd.set_defaults(func=run_kmeans)
 
     # If no arguments are given, print the help menu
@@ -84,7 +90,8 @@ def run_naive_bayes(args):
     if not os.path.exists(args.maskdir):
         raise IOError(f"Directory does not exist: {args.maskdir}")
     print("Running the naive Bayes two-class training method...")
-    plantcv.learn.naive_bayes(imgdir=args.imgdir, maskdir=args.maskdir, outfile=args.outfile, mkplots=args.plots)
+    plantcv.learn.naive_bayes(imgdir=args.imgdir, maskdir=args.maskdir, outfile=args.outfile, mkplots=args.plots,
+                              method=args.method)
 ###########################################
 
 
@@ -109,7 +116,7 @@ def run_kmeans(args):
     plantcv.learn.train_kmeans(img_dir=args.imgdir, k=args.categories, out_path=args.out,
                                prefix=args.prefix, patch_size=args.patch_size, sigma=args.sigma,
                                sampling=args.sampling, seed=args.seed, num_imgs=args.num_imgs,
-                               n_init=args.n_init)
+                               n_init=args.n_init, batch_size=args.batch_size, n_workers=args.n_workers)
 ###########################################
 
 
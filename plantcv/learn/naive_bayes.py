@@ -5,9 +5,15 @@ import cv2
 import numpy as np
 from scipy import stats
 from matplotlib import pyplot as plt
+from concurrent.futures import ThreadPoolExecutor
+from plantcv.plantcv import fatal_error
 
 
-def naive_bayes(imgdir, maskdir, outfile, mkplots=False):
+# HSV color channels of the PDFs
+CHANNELS = ("hue", "saturation", "value")
+
+
+def naive_bayes(imgdir, maskdir, outfile, mkplots=False, method="kde"):
     """Naive Bayes training function
 
     Inputs:
@@ -16,18 +22,20 @@ def naive_bayes(imgdir, maskdir, outfile, mkplots=False):
               color images.
     outfile = Name of the output text file that will store the color channel probability density functions.
     mkplots = Make PDF plots (True or False).
+    method  = PDF estimation method, "kde" (default) fits a Gaussian KDE to a random sample of the pixels, "histogram"
+              counts all pixels in parallel and smooths the histograms with the same Gaussian kernel.
 
     :param imgdir: str
     :param maskdir: str
     :param outfile: str
     :param mkplots: bool
+    :param method: str
     """
-    # Initialize color channel ndarrays for plant (foreground) and background
-    plant = {"hue": np.array([], dtype=np.uint8), "saturation": np.array([], dtype=np.uint8),
-             "value": np.array([], dtype=np.uint8)}
-    background = {"hue": np.array([], dtype=np.uint8), "saturation": np.array([], dtype=np.uint8),
-                  "value": np.array([], dtype=np.uint8)}
+    if method not in ("kde", "histogram"):
+        fatal_error(f"Method {method} is not supported, must be 'kde' or 'histogram'.")
 
+    # Image files that have a mask
+    files = []
     # Walk through the image directory
     print("Reading images...")
     for (dirpath, _, filenames) in os.walk(imgdir):
@@ -36,47 +44,146 @@ def naive_bayes(imgdir, maskdir, outfile, mkplots=False):
             if filename[-3:] in ['png', 'jpg', 'jpeg']:
                 # Does the mask exist?
                 if os.path.exists(os.path.join(maskdir, filename)):
-                    # Read the image as BGR
-                    img = cv2.imread(os.path.join(dirpath, filename), 1)
-                    # Read the mask as grayscale
-                    mask = cv2.imread(os.path.join(maskdir, filename), 0)
-
-                    # Convert the image to HSV and split into component channels
-                    hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
-                    hue, saturation, value = cv2.split(hsv)
-
-                    # Store channels in a dictionary
-                    channels = {"hue": hue, "saturation": saturation, "value": value}
-
-                    # Split channels into plant and non-plant signal
-                    for channel in channels:
-                        fg, bg = _split_plant_background_signal(channels[channel], mask)
+                    files.append((os.path.join(dirpath, filename), os.path.join(maskdir, filename)))
 
-                        # Randomly sample from the plant class (sample 10% of the pixels)
-                        fg = fg[np.random.randint(0, len(fg) - 1, int(len(fg) / 10))]
-                        # Randomly sample from the background class the same n as the plant class
-                        bg = bg[np.random.randint(0, len(bg) - 1, len(fg))]
-                        plant[channel] = np.append(plant[channel], fg)
-                        background[channel] = np.append(background[channel], bg)
+    if method == "histogram":
+        pdfs = _histogram_pdfs(files=files)
+    else:
+        pdfs = _kde_pdfs(files=files)
 
-    # Calculate a probability density function for each channel using a Gaussian kernel density estimator
     # Create an output file for the PDFs
     with open(outfile, "w") as out:
         out.write("class\tchannel\t" + "\t".join(map(str, range(0, 256))) + "\n")
-        for channel in plant:
-            print("Calculating PDF for the " + channel + " channel...")
-            plant_kde = stats.gaussian_kde(plant[channel])
-            bg_kde = stats.gaussian_kde(background[channel])
-            # Calculate p from the PDFs for each 8-bit intensity value and save to outfile
-            plant_pdf = plant_kde(range(0, 256))
+        for channel in CHANNELS:
+            # Save p from the PDFs for each 8-bit intensity value to outfile
+            plant_pdf = pdfs["plant"][channel]
             out.write("plant\t" + channel + "\t" + "\t".join(map(str, plant_pdf)) + "\n")
-            bg_pdf = bg_kde(range(0, 256))
+            bg_pdf = pdfs["background"][channel]
             out.write("background\t" + channel + "\t" + "\t".join(map(str, bg_pdf)) + "\n")
             if mkplots:
                 # If mkplots is True, make the PDF charts
                 _plot_pdf(channel, os.path.dirname(outfile), plant=plant_pdf, background=bg_pdf)
 
 
+def _read_hsv(img_file, mask_file):
+    """Read a training image as HSV channels and its mask
+
+    :param img_file: str
+    :param mask_file: str
+    :return channels: dict
+    :return mask: ndarray
+    """
+    # Read the image as BGR
+    img = cv2.imread(img_file, 1)
+    # Read the mask as grayscale
+    mask = cv2.imread(mask_file, 0)
+
+    # Convert the image to HSV and split into component channels
+    hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
+    hue, saturation, value = cv2.split(hsv)
+
+    # Store channels in a dictionary
+    return {"hue": hue, "saturation": saturation, "value": value}, mask
+
+
+def _kde_pdfs(files):
+    """Calculate the PDFs of the plant and background pixels of each channel using a Gaussian kernel density estimator
+    fit to a random sample of the pixels
+
+    :param files: list
+    :return pdfs: dict
+    """
+    # Sampled color channel values for plant (foreground) and background, one array per image
+    plant = {channel: [] for channel in CHANNELS}
+    background = {channel: [] for channel in CHANNELS}
+
+    for img_file, mask_file in files:
+        channels, mask = _read_hsv(img_file=img_file, mask_file=mask_file)
+
+        # Split channels into plant and non-plant signal
+        for channel in channels:
+            fg, bg = _split_plant_background_signal(channels[channel], mask)
+
+            # Randomly sample from the plant class (sample 10% of the pixels)
+            fg = fg[np.random.randint(0, len(fg) - 1, int(len(fg) / 10))]
+            # Randomly sample from the background class the same n as the plant class
+            bg = bg[np.random.randint(0, len(bg) - 1, len(fg))]
+            plant[channel].append(fg)
+            background[channel].append(bg)
+
+    # Calculate a probability density function for each channel using a Gaussian kernel density estimator
+    pdfs = {"plant": {}, "background": {}}
+    for channel in CHANNELS:
+        print("Calculating PDF for the " + channel + " channel...")
+        plant_kde = stats.gaussian_kde(np.concatenate(plant[channel]))
+        bg_kde = stats.gaussian_kde(np.concatenate(background[channel]))
+        # Calculate p from the PDFs for each 8-bit intensity value
+        pdfs["plant"][channel] = plant_kde(range(0, 256))
+        pdfs["background"][channel] = bg_kde(range(0, 256))
+    return pdfs
+
+
+def _image_histograms(img_file, mask_file):
+    """Count the plant and background pixels of each channel value of a training image
+
+    :param img_file: str
+    :param mask_file: str
+    :return histograms: dict
+    """
+    channels, mask = _read_hsv(img_file=img_file, mask_file=mask_file)
+    histograms = {"plant": {}, "background": {}}
+    for channel in channels:
+        fg, bg = _split_plant_background_signal(channels[channel], mask)
+        histograms["plant"][channel] = np.bincount(fg, minlength=256)
+        histograms["background"][channel] = np.bincount(bg, minlength=256)
+    return histograms
+
+
+def _histogram_pdfs(files):
+    """Calculate the PDFs of the plant and background pixels of each channel from their histograms
+
+    The histograms of all pixels are accumulated while the images are read in parallel. Like in the KDE method, each
+    image contributes 10% of its plant pixel count to the plant class and the same count to the background class (so
+    its background histogram is rescaled), and the Gaussian kernel bandwidth is set with Scott's rule for that number
+    of samples. The PDFs are the histograms convolved with the Gaussian kernel.
+
+    :param files: list
+    :return pdfs: dict
+    """
+    # Weighted pixel counts of each channel value and number of samples of each class
+    counts = {cls: {channel: np.zeros(256) for channel in CHANNELS} for cls in ("plant", "background")}
+    n_samples = 0
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        for histograms in executor.map(lambda f: _image_histograms(*f), files):
+            # Number of pixels sampled from each class in the KDE method
+            n_plant = histograms["plant"]["hue"].sum()
+            n_bg = histograms["background"]["hue"].sum()
+            n_image = int(n_plant / 10)
+            if n_image == 0 or n_bg == 0:
+                continue
+            n_samples += n_image
+            for channel in CHANNELS:
+                counts["plant"][channel] += histograms["plant"][channel] * (n_image / n_plant)
+                counts["background"][channel] += histograms["background"][channel] * (n_image / n_bg)
+    if n_samples < 2:
+        fatal_error("Not enough plant pixels in the training images.")
+
+    values = np.arange(0, 256)
+    pdfs = {"plant": {}, "background": {}}
+    for cls, channels in counts.items():
+        for channel, hist in channels.items():
+            print("Calculating PDF for the " + channel + " channel...")
+            weights = hist / hist.sum()
+            # Scott's rule bandwidth times the (unbiased) standard deviation of the samples
+            mean = np.sum(weights * values)
+            variance = np.sum(weights * (values - mean) ** 2) * n_samples / (n_samples - 1)
+            bandwidth = np.sqrt(variance) * n_samples ** (-1 / 5)
+            # Gaussian kernel density of each 8-bit intensity value (rows) from each histogram bin (columns)
+            kernel = stats.norm.pdf(values[:, None] - values[None, :], scale=bandwidth)
+            pdfs[cls][channel] = kernel @ weights
+    return pdfs
+
+
 def naive_bayes_multiclass(samples_file, outfile, mkplots=False):
     """Naive Bayes training function for two or more classes from sampled pixel RGB values.
 
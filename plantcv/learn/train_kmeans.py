@@ -4,14 +4,17 @@ import os
 import numpy as np
 import cv2
 import random
-from sklearn.cluster import MiniBatchKMeans
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from sklearn.cluster import MiniBatchKMeans, kmeans_plusplus
+from sklearn.metrics import pairwise_distances_argmin_min
 from sklearn.feature_extraction import image
 from skimage.filters import gaussian
 from joblib import dump
 
 
 def train_kmeans(img_dir, k, out_path="./kmeansout.fit", prefix="", patch_size=10, sigma=5, sampling=None,
-                 seed=1, num_imgs=0, n_init=10):
+                 seed=1, num_imgs=0, n_init=10, batch_size=None, n_workers=None):
     """
     Trains a patch-based kmeans clustering model for identifying image features.
     Inputs:
@@ -22,9 +25,13 @@ def train_kmeans(img_dir, k, out_path="./kmeansout.fit", prefix="", patch_size=1
     patch_size = Size of the NxN neighborhood around each pixel
     sigma = Gaussian blur sigma. Denotes severity of gaussian blur performed before patch identification
     sampling = Fraction of image from which patches are identified
-    seed = Seed for determinism of random elements like sampling of patches
+    seed = Seed for determinism of random elements like sampling of images and patches
     num_imgs = Number of images to use for training. Default is all of them in img_dir with prefix
     n_init = Number of random initiations tried by MiniBatchKMeans. The algorithm is run on the best one
+    batch_size = Number of patches per MiniBatchKMeans.partial_fit update. Default (None) fits all patches at once,
+                 otherwise patches are streamed and at most batch_size patches (plus the images being read) are
+                 kept in memory. The n_init initiations are then tried on the first batch
+    n_workers = Number of threads that read and blur images. Default (None) is the number of CPUs
     :param img_dir: str
     :param K: positive non-zero integer
     :param out_path: str
@@ -35,6 +42,8 @@ def train_kmeans(img_dir, k, out_path="./kmeansout.fit", prefix="", patch_size=1
     :param seed: positive integer
     :param num_imgs: positive non-zero integer
     :param n_init: positive non-zero integer
+    :param batch_size: positive non-zero integer
+    :param n_workers: positive non-zero integer
     :return fitted: sklearn.cluster._kmeans.MiniBatchKMeans
     """
     # Establish training set
@@ -42,26 +51,133 @@ def train_kmeans(img_dir, k, out_path="./kmeansout.fit", prefix="", patch_size=1
     if num_imgs == 0:
         training_files = file_names
     else:
-        training_files = random.choices(file_names, k=num_imgs)  # choosing a set of random files
-    # Read and extract patches
-    for idx, img_name in enumerate(training_files):
-        if prefix in img_name:
-            img = cv2.imread(os.path.join(img_dir, img_name), -1)
-            # Check to make sure non-image files in the directory are not included
-            if isinstance(img, np.ndarray):
-                if idx == 0:
-                    # Getting info from first image
-                    patches = patch_extract(img, patch_size=patch_size, sigma=sigma, sampling=sampling)
-                else:
-                    # Concatenating each additional image
-                    patches = np.vstack((patches, patch_extract(img, patch_size=patch_size, sigma=sigma,
-                                                                sampling=sampling)))
+        training_files = random.Random(seed).choices(file_names, k=num_imgs)  # choosing a set of random files
+    training_files = [os.path.join(img_dir, img_name) for img_name in training_files if prefix in img_name]
     kmeans = MiniBatchKMeans(n_clusters=k, n_init=n_init, random_state=seed)
-    fitted = kmeans.fit(patches)
+    # Read and blur images in parallel
+    images = _blur_images(training_files=training_files, sigma=sigma, n_workers=n_workers or os.cpu_count() or 1)
+
+    if batch_size is None:
+        # Extract patches and fit all of them at once
+        patches = [_extract_patches(img_blur, patch_size=patch_size, sampling=sampling, seed=seed)
+                   for img_blur in images]
+        fitted = kmeans.fit(np.vstack(patches))
+    else:
+        # Update the model with batches of patches as they are extracted
+        batch = []
+        n_batch = 0
+        for img_blur in images:
+            for patches in _iter_patches(img_blur, patch_size=patch_size, sampling=sampling, seed=seed,
+                                         batch_size=batch_size):
+                batch.append(patches)
+                n_batch += len(patches)
+                while n_batch >= batch_size:
+                    patches = np.vstack(batch)
+                    _partial_fit(kmeans, patches[:batch_size])
+                    batch = [patches[batch_size:]]
+                    n_batch -= batch_size
+        # Remaining patches
+        if n_batch > 0:
+            _partial_fit(kmeans, np.vstack(batch))
+        fitted = kmeans
     dump(fitted, out_path)
     return fitted
 
 
+def _partial_fit(kmeans, patches):
+    """
+    Updates a MiniBatchKMeans model with a batch of patches.
+    MiniBatchKMeans.partial_fit tries only one initiation, so the model is initialized with the best of its n_init
+    initiations on the first batch.
+    Inputs:
+    kmeans = MiniBatchKMeans model
+    patches = Batch of patches
+    :param kmeans: sklearn.cluster._kmeans.MiniBatchKMeans
+    :param patches: numpy.ndarray
+    """
+    if hasattr(kmeans, "cluster_centers_"):
+        kmeans.partial_fit(patches)
+        return
+    params = kmeans.get_params()
+    centers = _init_centers(patches, k=kmeans.n_clusters, n_init=kmeans.n_init, seed=kmeans.random_state)
+    kmeans.set_params(init=centers, n_init=1)
+    kmeans.partial_fit(patches)
+    # Later batches update the initialized model, the saved model keeps the original parameters
+    kmeans.set_params(init=params["init"], n_init=params["n_init"])
+
+
+def _init_centers(patches, k, n_init=10, seed=1):
+    """
+    Chooses the k-means++ initiation with the lowest inertia on a batch of patches, as MiniBatchKMeans.fit does.
+    Inputs:
+    patches = Batch of patches
+    k = Number of clusters
+    n_init = Number of random initiations to try
+    seed = Seed for determinism of the initiations
+    :param patches: numpy.ndarray
+    :param k: positive non-zero integer
+    :param n_init: positive non-zero integer
+    :param seed: positive integer
+    :return centers: numpy.ndarray
+    """
+    patches = patches.astype(np.float64)
+    random_state = np.random.RandomState(seed)
+    best_centers = None
+    best_inertia = None
+    for _ in range(n_init):
+        centers, _ = kmeans_plusplus(patches, n_clusters=k, random_state=random_state)
+        _, distances = pairwise_distances_argmin_min(patches, centers)
+        inertia = np.sum(distances ** 2)
+        if best_inertia is None or inertia < best_inertia:
+            best_centers = centers
+            best_inertia = inertia
+    return best_centers
+
+
+def _blur_images(training_files, sigma, n_workers):
+    """
+    Reads and blurs training images in a pool of threads.
+    Images are returned in the order of the files, with at most n_workers images read ahead.
+    Inputs:
+    training_files = Paths to the training images
+    sigma = Gaussian blur sigma
+    n_workers = Number of threads
+    :param training_files: list
+    :param sigma: positive real number or sequence of positive real numbers
+    :param n_workers: positive non-zero integer
+    :return img_blur: generator of numpy.ndarray
+    """
+    with ThreadPoolExecutor(max_workers=n_workers) as executor:
+        pending = deque()
+        for filename in training_files:
+            pending.append(executor.submit(_read_blur, filename, sigma))
+            if len(pending) >= n_workers:
+                img_blur = pending.popleft().result()
+                if img_blur is not None:
+                    yield img_blur
+        while pending:
+            img_blur = pending.popleft().result()
+            if img_blur is not None:
+                yield img_blur
+
+
+def _read_blur(filename, sigma):
+    """
+    Reads and blurs a training image.
+    Inputs:
+    filename = Path to an image
+    sigma = Gaussian blur sigma
+    :param filename: str
+    :param sigma: positive real number or sequence of positive real numbers
+    :return img_blur: numpy.ndarray or None
+    """
+    img = cv2.imread(filename, -1)
+    # Check to make sure non-image files in the directory are not included
+    if not isinstance(img, np.ndarray):
+        return None
+    return _blur(img, sigma=sigma)
+
+
 def patch_extract(img, patch_size=10, sigma=5, sampling=None, seed=1):
     """
     Extracts patches from an image.
@@ -78,15 +194,79 @@ def patch_extract(img, patch_size=10, sigma=5, sampling=None, seed=1):
     :param seed: positive integer
     :return patches_lin: numpy.ndarray
     """
+    return _extract_patches(_blur(img, sigma=sigma), patch_size=patch_size, sampling=sampling, seed=seed)
+
+
+def _blur(img, sigma=5):
+    """
+    Gaussian blurs an image before patch extraction.
+    Inputs:
+    img = An image from which to extract patches
+    sigma = Gaussian blur sigma
+    :param img: numpy.ndarray
+    :param sigma: positive real number or sequence of positive real numbers
+    :return img_blur: numpy.ndarray
+    """
     # Gaussian blur
     if len(img.shape) == 2:
         img_blur = np.round(gaussian(img, sigma=sigma)*255).astype(np.uint16)
     elif len(img.shape) == 3 and img.shape[2] == 3:
         img_blur = np.round(gaussian(img, sigma=sigma, channel_axis=2)*255).astype(np.uint16)
+    return img_blur
+
 
+def _extract_patches(img_blur, patch_size=10, sampling=None, seed=1):
+    """
+    Extracts patches from a blurred image.
+    Inputs:
+    img_blur = Blurred image
+    patch_size = Size of the NxN neighborhood around each pixel
+    sampling = Fraction of image from which patches are identified
+    seed = Seed for determinism of random elements like sampling of patches
+    :param img_blur: numpy.ndarray
+    :param patch_size: positive non-zero integer
+    :param sampling: float (0,1]
+    :param seed: positive integer
+    :return patches_lin: numpy.ndarray
+    """
     # Extract patches
     patches = image.extract_patches_2d(img_blur, (patch_size, patch_size),
                                        max_patches=sampling, random_state=seed)
     N = patches.shape[0]
     patches_lin = patches.reshape(N, -1)
     return patches_lin
+
+
+def _iter_patches(img_blur, patch_size=10, sampling=None, seed=1, batch_size=10000):
+    """
+    Extracts patches from a blurred image in blocks of about batch_size patches.
+    The patches and their order are the same as from _extract_patches. Without sampling, only one block of patches
+    at a time is copied from the image.
+    Inputs:
+    img_blur = Blurred image
+    patch_size = Size of the NxN neighborhood around each pixel
+    sampling = Fraction of image from which patches are identified
+    seed = Seed for determinism of random elements like sampling of patches
+    batch_size = Number of patches per block
+    :param img_blur: numpy.ndarray
+    :param patch_size: positive non-zero integer
+    :param sampling: float (0,1]
+    :param seed: positive integer
+    :param batch_size: positive non-zero integer
+    :return patches_lin: generator of numpy.ndarray
+    """
+    if sampling is not None:
+        patches_lin = _extract_patches(img_blur, patch_size=patch_size, sampling=sampling, seed=seed)
+        for start in range(0, len(patches_lin), batch_size):
+            yield patches_lin[start:start + batch_size]
+        return
+    # Patches of each (row, column) position, as a view of the image
+    window = (patch_size, patch_size) + img_blur.shape[2:]
+    windows = np.lib.stride_tricks.sliding_window_view(img_blur, window)
+    windows = windows.reshape(windows.shape[:2] + window)
+    rows, cols = windows.shape[:2]
+    # Rows of patch positions per block
+    block_rows = max(1, batch_size // max(1, cols))
+    for start in range(0, rows, block_rows):
+        block = windows[start:start + block_rows]
+        yield block.reshape(len(block) * cols, -1)
@@ -1,13 +1,16 @@
 #!/usr/bin/env python
 import os
 import sys
+import json
 import argparse
 import time
 import datetime
 import plantcv.parallel
 import plantcv.utils
+from plantcv.parallel.process_results import PARQUET_TABLES
 import tempfile
 import shutil
+import numpy as np
 
 
 # Parse command-line arguments
@@ -74,14 +77,22 @@ def main():
     # Create temporary directory for job
     if config.tmp_dir is not None:
         os.makedirs(config.tmp_dir, exist_ok=True)
-    config.tmp_dir = tempfile.mkdtemp(prefix=start_time + '_', dir=config.tmp_dir)
+    # A persistent job directory keeps results from previous runs
+    if config.job_dir is not None:
+        os.makedirs(config.job_dir, exist_ok=True)
+        config.tmp_dir = config.job_dir
+    else:
+        config.tmp_dir = tempfile.mkdtemp(prefix=start_time + '_', dir=config.tmp_dir)
 
     # Create img_outdir
     os.makedirs(config.img_outdir, exist_ok=True)
 
     # Remove JSON results file if append=False
-    if not config.append and os.path.exists(config.json):
-        os.remove(config.json)
+    # The job directory already contains the results from previous runs when a persistent job directory is used
+    if not config.append or config.job_dir is not None:
+        for results_file in [config.json] + [f"{config.json}{suffix}" for suffix in PARQUET_TABLES]:
+            if os.path.exists(results_file):
+                os.remove(results_file)
 
     # Read image metadata
     ###########################################
@@ -104,10 +115,18 @@ def main():
     # Parallel image processing time
     multi_start_time = time.time()
     print("Processing images... ", file=sys.stderr)
-    cluster_client = plantcv.parallel.create_dask_cluster(cluster=config.cluster, cluster_config=config.cluster_config)
-    plantcv.parallel.multiprocess(jobs=jobs, client=cluster_client)
+    cluster_client = plantcv.parallel.create_dask_cluster(cluster=config.cluster, cluster_config=config.cluster_config,
+                                                          run_mode=config.run_mode)
+    telemetry = plantcv.parallel.multiprocess(jobs=jobs, client=cluster_client, config=config)
     multi_clock_time = time.time() - multi_start_time
     print(f"Processing images took {multi_clock_time} seconds.", file=sys.stderr)
+    print(_run_report(telemetry=telemetry), file=sys.stderr)
+    # Failed and retried jobs are listed in a machine-readable report next to the results file
+    job_report = _job_report(telemetry=telemetry)
+    with open(f"{config.json}-job-report.json", "w") as fp:
+        json.dump(job_report, fp, indent=4)
+    if len(job_report["failed"]) > 0:
+        print(f"Warning: {len(job_report['failed'])} jobs failed, see {config.json}-job-report.json", file=sys.stderr)
     ###########################################
 
     # Compile image analysis results
@@ -115,22 +134,80 @@ def main():
     # Process results start time
     process_results_start_time = time.time()
     print("Processing results... ", file=sys.stderr)
-    plantcv.parallel.process_results(job_dir=config.tmp_dir, json_file=config.json)
+    plantcv.parallel.process_results(job_dir=config.tmp_dir, json_file=config.json, outformat=config.results_format)
     process_results_clock_time = time.time() - process_results_start_time
     print(f"Processing results took {process_results_clock_time} seconds.", file=sys.stderr)
     ###########################################
 
-    # Convert json results to csv files
+    # Convert json results to csv files (columnar results are already tabulated)
     ###########################################
-    # Convert results start time
-    convert_results_start_time = time.time()
-    print("Converting json to csv... ", file=sys.stderr)
-    plantcv.utils.json2csv(config.json, config.json)
-    convert_results_clock_time = time.time() - convert_results_start_time
-    print(f"Processing results took {convert_results_clock_time} seconds.", file=sys.stderr)
+    if config.results_format == "json":
+        # Convert results start time
+        convert_results_start_time = time.time()
+        print("Converting json to csv... ", file=sys.stderr)
+        plantcv.utils.json2csv(config.json, config.json)
+        convert_results_clock_time = time.time() - convert_results_start_time
+        print(f"Processing results took {convert_results_clock_time} seconds.", file=sys.stderr)
     ###########################################
 
-    # Cleanup
-    if config.cleanup is True:
+    # Cleanup (a persistent job directory is kept for the next run)
+    if config.cleanup is True and config.job_dir is None:
         shutil.rmtree(config.tmp_dir)
 ###########################################
+
+
+# Summarize job telemetry
+###########################################
+def _run_report(telemetry, n_slowest=10):
+    """Summarize the telemetry of the jobs of a run.
+
+    Keyword arguments:
+    telemetry = list of job telemetry dictionaries returned by plantcv.parallel.multiprocess
+    n_slowest = number of slowest jobs to list (default = 10)
+
+    Returns:
+    report    = run summary text
+
+    :param telemetry: list
+    :param n_slowest: int
+    :return report: str
+    """
+    n_failed = sum(job["status"] != 0 for job in telemetry)
+    n_retried = sum((job.get("attempts") or 1) > 1 for job in telemetry)
+    lines = [f"Run summary: {len(telemetry)} jobs, {n_failed} failed, {n_retried} retried."]
+    if len(telemetry) == 0:
+        return lines[0]
+    # Percentiles of each measurement, measurements that are not available on this system are skipped
+    lines.append(f"{'':<22}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}")
+    for key, label, scale in [("wall_time", "Wall time (s)", 1), ("cpu_time", "CPU time (s)", 1),
+                              ("max_rss", "Peak memory (MB)", 1024 ** 2)]:
+        values = [job[key] / scale for job in telemetry if job[key] is not None]
+        if len(values) > 0:
+            percentiles = np.percentile(values, [50, 90, 99, 100])
+            lines.append(f"{label:<22}" + "".join(f"{value:>10.2f}" for value in percentiles))
+    # Jobs whose task failed have no measurements
+    measured = [job for job in telemetry if job["wall_time"] is not None]
+    lines.append(f"Slowest {min(n_slowest, len(measured))} jobs:")
+    for job in sorted(measured, key=lambda job: job["wall_time"], reverse=True)[:n_slowest]:
+        lines.append(f"{job['wall_time']:>10.2f} s  status {job['status']}  {', '.join(map(str, job['images']))}")
+    return "\n".join(lines)
+###########################################
+
+
+# List failed and retried jobs
+###########################################
+def _job_report(telemetry):
+    """List the failed and retried jobs of a run.
+
+    Keyword arguments:
+    telemetry = list of job telemetry dictionaries returned by plantcv.parallel.multiprocess
+
+    Returns:
+    report    = dictionary of "failed" and "retried" job telemetry lists
+
+    :param telemetry: list
+    :return report: dict
+    """
+    return {"failed": [job for job in telemetry if job["status"] != 0],
+            "retried": [job for job in telemetry if (job.get("attempts") or 1) > 1]}
+###########################################
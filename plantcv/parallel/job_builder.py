@@ -1,8 +1,29 @@
 import os
 import sys
 import json
-from copy import deepcopy
 import uuid
+from contextlib import nullcontext
+from plantcv.plantcv.classes import JOB_METADATA_ENV, JOB_METADATA_OFFSET_ENV
+from plantcv.parallel.workflow_inputs import WorkflowInputs
+from plantcv.parallel.manifest import _group_id, _job_key, _read_manifest, _read_telemetry
+
+
+# Shared file of job metadata records, one JSON record per line
+JOB_METADATA_FILE = "job_metadata.jsonl"
+
+
+class _WorkflowCommand(list):
+    """Workflow command-line components of a job, with environment variables that are set when the workflow runs."""
+
+    def __init__(self, command, env):
+        """Initialize a workflow command.
+
+        Keyword arguments:
+        command = workflow command-line components
+        env     = dictionary of environment variables of the workflow
+        """
+        super().__init__(command)
+        self.env = env
 
 
 # Build job list
@@ -15,7 +36,7 @@ def job_builder(meta, config):
     config:       plantcv.parallel.WorkflowConfig object.
 
     Returns:
-    jobs:         List of image processing commands.
+    jobs:         List of image processing commands (or WorkflowInputs objects if config.run_mode is "inprocess").
 
     :param meta: dict
     :param config: plantcv.parallel.WorkflowConfig
@@ -28,50 +49,140 @@ def job_builder(meta, config):
     n_jobs = len(meta)
     print(f"Task list includes {n_jobs} workflows", file=sys.stderr)
 
-    # Each grouping has a tuple of grouped metadata values and a dataframe of image metadata
-    for _, grp_df in meta:
-        # Create a JSON template for each group
-        img_meta = {"metadata": deepcopy(config.metadata_terms), "observations": {}}
+    # In a persistent job directory, jobs that completed with the same inputs in a previous run are skipped
+    completed = set()
+    group_results = {}
+    if config.job_dir is not None:
+        completed = _read_manifest(job_dir=config.job_dir)
+        # Results files (and columnar results tables named after them) are named by group and job key
+        for filename in os.listdir(config.job_dir):
+            if filename.endswith((".json", ".parquet")):
+                group_results.setdefault(filename.split(".")[0], []).append(filename)
+
+    # Input file sizes and elapsed times in previous runs are used to estimate the cost of each job
+    sizes = []
+    wall_times = []
+    previous_wall_times = {}
+    if config.job_order == "cost" and config.job_dir is not None:
+        previous_wall_times = _read_telemetry(job_dir=config.job_dir)
 
-        # Store metadata in JSON
-        img_meta["metadata"]["image"] = {
+    # Metadata term definitions are the same for every group
+    metadata_terms = config.metadata_terms
+    # Job metadata is written to one shared file (subprocess mode) or kept in memory (in-process mode)
+    job_dir = config.tmp_dir if config.job_dir is None else config.job_dir
+    metadata_file = os.path.join(job_dir, JOB_METADATA_FILE)
+
+    with open(metadata_file, "wb") if config.run_mode != "inprocess" else nullcontext() as metafile:
+        # Each grouping has a tuple of grouped metadata values and a dataframe of image metadata
+        for _, grp_df in meta:
+            # Generate image names if set to auto
+            if config.group_name == "auto":
+                names = []
+                for i in range(0, len(grp_df)):
+                    names.append(f"image{i + 1}")
+            else:
+                names = list(grp_df[config.group_name])
+
+            filepaths = grp_df["filepath"].values.tolist()
+            # Create random unique output file to store the image processing results
+            outfile = os.path.join(config.tmp_dir, f"{uuid.uuid4()}.json")
+            if config.job_dir is not None:
+                group_id = _group_id(filepaths=filepaths)
+                filename = f"{group_id}.{_job_key(filepaths=filepaths, names=names, config=config)}.json"
+                if filename in completed and any(result.startswith(filename)
+                                                 for result in group_results.get(group_id, [])):
+                    continue
+                # Remove results from previous runs of the group with different inputs
+                for stale in group_results.get(group_id, []):
+                    os.remove(os.path.join(config.job_dir, stale))
+                outfile = os.path.join(config.job_dir, filename)
+
+            if config.job_order == "cost":
+                sizes.append(sum(os.path.getsize(filepath) for filepath in filepaths))
+                wall_times.append(previous_wall_times.get(tuple(filepaths)))
+
+            # Convert datetime to string before serialization
+            grp_df["timestamp"] = grp_df["timestamp"].dt.strftime(config.timestampformat)
+
+            # Valid metadata
+            img_meta = {}
+            for m, definition in metadata_terms.items():
+                img_meta[m] = {**definition, "value": grp_df[m].values.tolist()}
+
+            # Store metadata
+            img_meta["image"] = {
                 "label": "image files",
                 "datatype": "<class 'str'>",
-                "value": grp_df["filepath"].values.tolist()
+                "value": filepaths
             }
 
-        # Convert datetime to string before serialization
-        grp_df["timestamp"] = grp_df["timestamp"].dt.strftime(config.timestampformat)
-
-        # Valid metadata
-        for m in list(config.metadata_terms.keys()):
-            img_meta["metadata"][m]["value"] = grp_df[m].values.tolist()
-
-        # Create random unique output file to store the image processing results and populate with metadata
-        outfile = os.path.join(config.tmp_dir, f"{uuid.uuid4()}.json")
-        with open(outfile, "w") as fp:
-            json.dump(img_meta, fp, indent=4)
-
-        # Generate image names if set to auto
-        if config.group_name == "auto":
-            names = []
-            for i in range(0, len(grp_df)):
-                names.append(f"image{i + 1}")
-        else:
-            names = list(grp_df[config.group_name])
-
-        # Build job
-        job_parts = ["python", config.workflow, "--outdir", config.img_outdir, "--result", outfile,
-                     "--names", ",".join(map(str, names))]
-        # Add other arguments
-        for key, value in config.other_args.items():
-            job_parts.append(f"--{key}")
-            job_parts.append(value)
-        if config.writeimg:
-            job_parts.append("--writeimg")
-        for fname in grp_df["filepath"].values.tolist():
-            job_parts.append(fname)
-        jobs.append(job_parts)
+            # Build an in-process job as a set of workflow inputs
+            if config.run_mode == "inprocess":
+                jobs.append(WorkflowInputs(images=filepaths,
+                                           names=",".join(map(str, names)), result=outfile, outdir=config.img_outdir,
+                                           writeimg=config.writeimg, metadata=img_meta,
+                                           outformat=config.results_format, **config.other_args))
+                continue
+
+            # Append the metadata to the shared metadata file, the job reads it from its byte offset
+            offset = metafile.tell()
+            metafile.write(json.dumps(img_meta).encode() + b"\n")
+
+            # Build job
+            job_parts = ["python", config.workflow, "--outdir", config.img_outdir, "--result", outfile,
+                         "--names", ",".join(map(str, names))]
+            # Add other arguments
+            for key, value in config.other_args.items():
+                job_parts.append(f"--{key}")
+                job_parts.append(value)
+            if config.writeimg:
+                job_parts.append("--writeimg")
+            if config.results_format != "json":
+                job_parts += ["--outformat", config.results_format]
+            for fname in filepaths:
+                job_parts.append(fname)
+            # The location of the metadata is passed in the environment, so the command line is unchanged
+            jobs.append(_WorkflowCommand(command=job_parts, env={JOB_METADATA_ENV: metadata_file,
+                                                                 JOB_METADATA_OFFSET_ENV: str(offset)}))
+
+    if config.job_dir is not None:
+        print(f"Skipping {n_jobs - len(jobs)} workflows completed in previous runs", file=sys.stderr)
+
+    # Submit the most expensive jobs first so that they do not delay the end of the run
+    if config.job_order == "cost":
+        jobs = _order_by_cost(jobs=jobs, sizes=sizes, wall_times=wall_times)
 
     return jobs
 ###########################################
+
+
+# Order jobs by estimated cost
+###########################################
+def _order_by_cost(jobs, sizes, wall_times):
+    """Order jobs from the highest to the lowest estimated cost.
+
+    The cost of a job is its elapsed time in a previous run, if available, otherwise the total size of its input files
+    scaled by the elapsed time per byte of the jobs that ran before.
+
+    Inputs:
+    jobs:         List of jobs.
+    sizes:        Total input file size (bytes) of each job.
+    wall_times:   Elapsed time (seconds) of each job in a previous run, or None.
+
+    Returns:
+    jobs:         List of jobs ordered by cost.
+
+    :param jobs: list
+    :param sizes: list
+    :param wall_times: list
+    :return jobs: list
+    """
+    known = [(size, wall_time) for size, wall_time in zip(sizes, wall_times) if wall_time is not None]
+    rate = 1
+    if sum(size for size, _ in known) > 0:
+        rate = sum(wall_time for _, wall_time in known) / sum(size for size, _ in known)
+    costs = [size * rate if wall_time is None else wall_time for size, wall_time in zip(sizes, wall_times)]
+    # Sorting is stable, so jobs with the same cost stay in metadata group order
+    order = sorted(range(len(jobs)), key=lambda i: costs[i], reverse=True)
+    return [jobs[i] for i in order]
+###########################################
@@ -0,0 +1,211 @@
+import os
+import json
+import hashlib
+from functools import lru_cache
+
+
+# Name of the completed-job manifest file stored in a persistent job directory
+MANIFEST_FILE = "manifest.jsonl"
+# Name of the job telemetry file stored in a job directory
+TELEMETRY_FILE = "telemetry.jsonl"
+
+
+# Identify an image group by its input files
+###########################################
+def _group_id(filepaths):
+    """Create a stable identifier for an image group from its input file paths.
+
+    Keyword arguments:
+    filepaths = list of input image file paths
+
+    Returns:
+    group_id  = hexadecimal hash of the file paths
+
+    :param filepaths: list
+    :return group_id: str
+    """
+    return hashlib.sha1("\n".join(filepaths).encode()).hexdigest()
+
+
+# Identify a job by everything that can change its results
+###########################################
+def _job_key(filepaths, names, config):
+    """Create a job key from the input files, workflow and workflow arguments.
+
+    Keyword arguments:
+    filepaths = list of input image file paths
+    names     = list of image names passed to the workflow
+    config    = plantcv.parallel.WorkflowConfig object
+
+    Returns:
+    key       = hexadecimal hash of the job inputs
+
+    :param filepaths: list
+    :param names: list
+    :param config: plantcv.parallel.WorkflowConfig
+    :return key: str
+    """
+    hasher = hashlib.sha1()
+    # Input files are identified by path, size and modification time
+    for filepath in filepaths:
+        stat = os.stat(filepath)
+        hasher.update(f"{filepath}:{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+    # A change to the workflow script contents invalidates all previous results
+    hasher.update(_file_digest(filepath=config.workflow, mtime=os.path.getmtime(config.workflow)).encode())
+    # Workflow inputs
+    hasher.update(json.dumps([list(map(str, names)), config.other_args, config.writeimg, config.img_outdir,
+                              config.workflow_function, config.results_format], sort_keys=True, default=str).encode())
+    return hasher.hexdigest()
+
+
+# Hash the contents of a file once per modification time
+###########################################
+@lru_cache(maxsize=None)
+def _file_digest(filepath, mtime):
+    """Hash the contents of a file.
+
+    Keyword arguments:
+    filepath = path to a file
+    mtime    = modification time of the file, used to invalidate the cache
+
+    Returns:
+    digest   = hexadecimal hash of the file contents
+
+    :param filepath: str
+    :param mtime: float
+    :return digest: str
+    """
+    with open(filepath, "rb") as fp:
+        return hashlib.sha1(fp.read()).hexdigest()
+
+
+# Read the completed-job manifest
+###########################################
+def _read_manifest(job_dir):
+    """Read the set of completed job results files from a job directory manifest.
+
+    Keyword arguments:
+    job_dir   = persistent job directory
+
+    Returns:
+    completed = set of completed job results filenames
+
+    :param job_dir: str
+    :return completed: set
+    """
+    completed = set()
+    manifest = os.path.join(job_dir, MANIFEST_FILE)
+    if os.path.exists(manifest):
+        with open(manifest, "r") as fp:
+            for line in fp:
+                # Skip a partially written last line from an interrupted run
+                try:
+                    completed.add(json.loads(line)["result"])
+                except (json.decoder.JSONDecodeError, KeyError):
+                    continue
+    return completed
+
+
+# Append completed jobs to the manifest
+###########################################
+def _record_completed(job_dir, results):
+    """Append completed job results filenames to a job directory manifest.
+
+    Keyword arguments:
+    job_dir = persistent job directory
+    results = list of completed job results filenames
+
+    :param job_dir: str
+    :param results: list
+    """
+    with open(os.path.join(job_dir, MANIFEST_FILE), "a") as fp:
+        for result in results:
+            fp.write(json.dumps({"result": result}) + "\n")
+        fp.flush()
+
+
+# Append job telemetry to the job directory
+###########################################
+def _record_telemetry(job_dir, telemetry):
+    """Append the input images and elapsed time of finished jobs to the telemetry file of a job directory.
+
+    Keyword arguments:
+    job_dir   = job directory
+    telemetry = list of job telemetry dictionaries
+
+    :param job_dir: str
+    :param telemetry: list
+    """
+    with open(os.path.join(job_dir, TELEMETRY_FILE), "a") as fp:
+        for job in telemetry:
+            fp.write(json.dumps({"images": job["images"], "wall_time": job["wall_time"]}) + "\n")
+
+
+# Read job telemetry from previous runs
+###########################################
+def _read_telemetry(job_dir):
+    """Read the elapsed time of jobs in previous runs from the telemetry file of a job directory.
+
+    Keyword arguments:
+    job_dir    = job directory
+
+    Returns:
+    wall_times = dictionary of the latest elapsed time (seconds) of each job, keyed by a tuple of its input images
+
+    :param job_dir: str
+    :return wall_times: dict
+    """
+    wall_times = {}
+    telemetry_file = os.path.join(job_dir, TELEMETRY_FILE)
+    if os.path.exists(telemetry_file):
+        with open(telemetry_file, "r") as fp:
+            for line in fp:
+                # Skip a partially written last line from an interrupted run
+                try:
+                    job = json.loads(line)
+                except json.decoder.JSONDecodeError:
+                    continue
+                wall_times[tuple(job["images"])] = job["wall_time"]
+    return wall_times
+
+
+# Get the results file of a job
+###########################################
+def _job_result(job):
+    """Get the results file path of a job.
+
+    Keyword arguments:
+    job    = workflow command-line components or a WorkflowInputs object
+
+    Returns:
+    result = job results file path
+
+    :param job: list or plantcv.parallel.WorkflowInputs
+    :return result: str
+    """
+    if isinstance(job, list):
+        return job[job.index("--result") + 1]
+    return job.result
+
+
+# Get the input images of a job
+###########################################
+def _job_images(job):
+    """Get the input image file paths of a job.
+
+    Keyword arguments:
+    job    = workflow command-line components or a WorkflowInputs object
+
+    Returns:
+    images = list of input image file paths
+
+    :param job: list or plantcv.parallel.WorkflowInputs
+    :return images: list
+    """
+    if isinstance(job, list):
+        # Image files are the last command-line arguments, one per image name
+        n_images = len(job[job.index("--names") + 1].split(","))
+        return job[-n_images:]
+    if job.metadata is not None:
+        return job.metadata["image"]["value"]
+    return []
@@ -1,6 +1,34 @@
+import os
+import re
+import sys
+import copy
+import json
+import math
+import time
+import traceback
+import threading
+import importlib.util
+from functools import partial
 import dask_jobqueue
-from dask.distributed import Client, progress
-from subprocess import call
+from dask.distributed import Client, progress, as_completed
+from subprocess import call, Popen, TimeoutExpired
+from plantcv.plantcv import params, outputs, Params, fatal_error
+from plantcv.parallel.manifest import _job_result, _job_images, _record_completed, _record_telemetry
+from plantcv.parallel.process_results import _ResultsStream, _add_table_columns, PARQUET_TABLES, SPECULATIVE_SUFFIX
+
+
+# Workflow modules imported by this worker process, keyed by workflow path and modification time
+_workflow_modules = {}
+# Target number of batches per worker when the batch size is set to "auto"
+_BATCHES_PER_WORKER = 10
+# Telemetry keys, metadata terms (and results table columns), labels and data types
+TELEMETRY_TERMS = [
+    ("status", "job_status", "workflow exit status", int),
+    ("wall_time", "job_wall_time", "workflow elapsed time (seconds)", float),
+    ("cpu_time", "job_cpu_time", "workflow CPU time (seconds)", float),
+    ("max_rss", "job_max_rss", "workflow peak resident memory (bytes)", int),
+    ("attempts", "job_attempts", "number of workflow runs", int)
+]
 
 
 # Process images using multiprocessing
@@ -10,30 +38,495 @@ def _process_images_multiproc(job):
 
     Keyword arguments:
     job = workflow command-line components
+
+    Returns:
+    status = workflow exit status
+
+    :param job: list
+    :return status: int
+    """
+    return call(job, env=_job_env(job))
+
+
+# Environment of a workflow subprocess
+###########################################
+def _job_env(job):
+    """Get the environment of a workflow subprocess, with the environment variables of the job (if any).
+
+    Keyword arguments:
+    job = workflow command-line components
+
+    Returns:
+    env = environment variables (None to inherit the environment of this process)
+
+    :param job: list
+    :return env: dict
+    """
+    if not getattr(job, "env", None):
+        return None
+    return {**os.environ, **job.env}
+
+
+# Process images in a subprocess and measure its resource usage
+###########################################
+def _process_images_measured(job, timeout=None):
+    """Process images in a subprocess and measure the CPU time and peak memory of the subprocess.
+
+    Keyword arguments:
+    job       = workflow command-line components
+    timeout   = maximum workflow run time in seconds, the workflow is killed if it runs longer (default = None)
+
+    Returns:
+    status    = workflow exit status
+    cpu_time  = user and system CPU time of the workflow in seconds (None if not available)
+    max_rss   = peak resident memory of the workflow in bytes (None if not available)
+    timed_out = True if the workflow was killed because it exceeded the timeout
+
+    :param job: list
+    :param timeout: float
+    :return status: int
+    :return cpu_time: float
+    :return max_rss: int
+    :return timed_out: bool
+    """
+    # Resource usage of a single child process is only available on Unix-like systems
+    if not hasattr(os, "wait4"):
+        try:
+            return call(job, timeout=timeout, env=_job_env(job)), None, None, False
+        except TimeoutExpired:
+            # subprocess.call kills the workflow when the timeout expires
+            return 1, None, None, True
+    proc = Popen(job, env=_job_env(job))
+    # The workflow is killed by a timer thread unless it was already reaped (its process ID could be reused)
+    lock = threading.Lock()
+    state = {"reaped": False, "timed_out": False}
+
+    def expire():
+        with lock:
+            if not state["reaped"]:
+                state["timed_out"] = True
+                proc.kill()
+
+    timer = threading.Timer(timeout, expire) if timeout is not None else None
+    if timer is not None:
+        timer.start()
+    _, wait_status, usage = os.wait4(proc.pid, 0)
+    with lock:
+        state["reaped"] = True
+    if timer is not None:
+        timer.cancel()
+    # Same exit status as subprocess.call, negative if the workflow was terminated by a signal
+    status = os.WEXITSTATUS(wait_status) if os.WIFEXITED(wait_status) else -os.WTERMSIG(wait_status)
+    proc.returncode = status
+    return status, usage.ru_utime + usage.ru_stime, _rss_bytes(usage.ru_maxrss), state["timed_out"]
+
+
+# Convert a peak resident memory measurement to bytes
+###########################################
+def _rss_bytes(max_rss):
+    """Convert the peak resident memory reported by the resource module to bytes.
+
+    Keyword arguments:
+    max_rss = ru_maxrss value (kilobytes, or bytes on macOS)
+
+    Returns:
+    max_rss = peak resident memory in bytes
+
+    :param max_rss: int
+    :return max_rss: int
+    """
+    if sys.platform == "darwin":
+        return max_rss
+    return max_rss * 1024
+
+
+# Import a workflow script as a module once per worker process
+###########################################
+def _load_workflow(workflow):
+    """Import a workflow script as a module, reusing a previous import if the file is unchanged.
+
+    Keyword arguments:
+    workflow = path to a workflow script
+
+    Returns:
+    module   = imported workflow module
+
+    :param workflow: str
+    :return module: module
+    """
+    key = (os.path.abspath(workflow), os.path.getmtime(workflow))
+    if key not in _workflow_modules:
+        # The module name is not __main__, so the script's command-line entry point is not executed
+        spec = importlib.util.spec_from_file_location("plantcv_workflow", workflow)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _workflow_modules[key] = module
+    return _workflow_modules[key]
+
+
+# Process images within the worker process
+###########################################
+def _process_images_inprocess(job, workflow, function="main"):
+    """Process images by calling a workflow function in the current process.
+
+    Keyword arguments:
+    job      = plantcv.parallel.WorkflowInputs object
+    workflow = path to a workflow script
+    function = name of the workflow function that takes a WorkflowInputs object as input
+
+    Returns:
+    status   = workflow exit status (0 if the workflow completed, otherwise 1)
+
+    :param job: plantcv.parallel.WorkflowInputs
+    :param workflow: str
+    :param function: str
+    :return status: int
+    """
+    # Reset global parameters and outputs so that jobs do not leak state into one another
+    params.__dict__.update(vars(Params()))
+    outputs.clear()
+    # Image metadata is merged into the results when they are saved
+    outputs.job_metadata = job.metadata or {}
+    # Isolate failures so that one bad image group does not stop the worker
+    try:
+        entry = getattr(_load_workflow(workflow), function)
+        entry(job)
+    except (Exception, SystemExit):
+        print(f"Workflow {workflow} failed for images {job.__dict__}:", file=sys.stderr)
+        traceback.print_exc()
+        return 1
+    return 0
+
+
+# Process a batch of jobs within a single task
+###########################################
+def _process_batch(batch, run_mode="subprocess", workflow=None, function="main", timeout=None, retries=0):
+    """Process a batch of jobs sequentially within a single dask task.
+
+    Keyword arguments:
+    batch     = list of jobs
+    run_mode  = "subprocess" or "inprocess" (default = "subprocess")
+    workflow  = path to a workflow script (required if run_mode is "inprocess")
+    function  = name of the workflow function (default = "main")
+    timeout   = maximum run time of each job in seconds, subprocess mode only (default = None)
+    retries   = number of times a failed job is run again (default = 0)
+
+    Returns:
+    telemetry = list of job telemetry dictionaries (exit status, wall time, CPU time, peak memory, number of attempts
+                and whether the last attempt timed out), one per job
+
+    :param batch: list
+    :param run_mode: str
+    :param workflow: str
+    :param function: str
+    :param timeout: float
+    :param retries: int
+    :return telemetry: list
+    """
+    # Each job writes its own results file and reports its own failures, so one job does not stop the batch
+    telemetry = []
+    for job in batch:
+        start_time = time.perf_counter()
+        total_cpu_time = None
+        for attempt in range(1, retries + 2):
+            timed_out = False
+            if run_mode == "inprocess":
+                # In-process jobs run in the thread of the task, other threads of the worker are not counted
+                cpu_start_time = time.thread_time()
+                status = _process_images_inprocess(job, workflow=workflow, function=function)
+                cpu_time = time.thread_time() - cpu_start_time
+                # The peak memory of the worker process includes other jobs and the worker itself
+                max_rss = None
+            else:
+                status, cpu_time, max_rss, timed_out = _process_images_measured(job, timeout=timeout)
+            if cpu_time is not None:
+                total_cpu_time = (total_cpu_time or 0) + cpu_time
+            if status == 0:
+                break
+        telemetry.append({"status": status, "wall_time": time.perf_counter() - start_time,
+                          "cpu_time": total_cpu_time, "max_rss": max_rss, "attempts": attempt, "timed_out": timed_out})
+    return telemetry
+
+
+# Redirect the results of a copy of a batch
+###########################################
+def _speculative_batch(batch, attempt):
+    """Copy a batch of jobs so that each job saves its results to a separate speculative results file.
+
+    With speculative execution, the original batch (attempt 0) and its duplicate (attempt 1) both save their results
+    to speculative results files. Only the results of the copy that finishes first are moved to the results files, so
+    the other copy, which can still be running, never writes to them.
+
+    Keyword arguments:
+    batch   = list of jobs
+    attempt = number of the copy of the batch
+
+    Returns:
+    batch   = list of copied jobs
+
+    :param batch: list
+    :param attempt: int
+    :return batch: list
+    """
+    duplicates = []
+    for job in batch:
+        result = f"{_job_result(job)}{SPECULATIVE_SUFFIX}{attempt}"
+        # Copies keep the environment variables of workflow commands
+        job = copy.copy(job)
+        if isinstance(job, list):
+            job[job.index("--result") + 1] = result
+        else:
+            job.result = result
+        duplicates.append(job)
+    return duplicates
+
+
+class _BatchRecorder:
+    """Record the results and telemetry of job batches as their dask futures finish."""
+
+    def __init__(self, batches, job_dir=None, manifest=False):
+        """Initialize a recorder.
+
+        Keyword arguments:
+        batches  = list of job batches, in the same order as the futures
+        job_dir  = job directory where job results are streamed (default = None, results are not streamed)
+        manifest = record successful jobs in the completed-job manifest of the job directory (default = False)
+        """
+        self.batches = batches
+        self.job_dir = job_dir
+        self.manifest = manifest
+        self.stream = None if job_dir is None else _ResultsStream(job_dir=job_dir)
+        self.telemetry = []
+        self.recorded = set()
+        self.lock = threading.Lock()
+
+    def record(self, future, index, attempt=None):
+        """Record the jobs of a finished batch future (once).
+
+        Keyword arguments:
+        future  = dask future of a batch of jobs
+        index   = index of the batch
+        attempt = number of the copy of the batch created by _speculative_batch (default = None, the batch saves its
+                  results to the results files)
+        """
+        with self.lock:
+            if index in self.recorded or future.status != "finished":
+                return
+            self.recorded.add(index)
+            batch_telemetry = future.result()
+            results = [_job_result(job) for job in self.batches[index]]
+            if attempt is not None:
+                # Move the results of the copy that finished first to the results files of the batch
+                for result in results:
+                    for suffix in [""] + PARQUET_TABLES:
+                        if os.path.exists(f"{result}{SPECULATIVE_SUFFIX}{attempt}{suffix}"):
+                            os.replace(f"{result}{SPECULATIVE_SUFFIX}{attempt}{suffix}", f"{result}{suffix}")
+            speculative = attempt is not None and attempt > 0
+            telemetry = [{"images": _job_images(job), "result": os.path.basename(result), "speculative": speculative,
+                          **job_telemetry}
+                         for job, result, job_telemetry in zip(self.batches[index], results, batch_telemetry)]
+            self._record_telemetry(telemetry=telemetry)
+            if self.stream is None:
+                return
+            # Stream the results before marking jobs completed so that completed jobs always have streamed results
+            for result, job_telemetry in zip(results, batch_telemetry):
+                self.stream.add(result_file=result, metadata=_telemetry_metadata(telemetry=job_telemetry))
+                # Columnar results (results_format "parquet") are not streamed, the telemetry is added to the table
+                if os.path.exists(f"{result}{PARQUET_TABLES[0]}"):
+                    _add_table_columns(table_file=f"{result}{PARQUET_TABLES[0]}",
+                                       columns={term: (datatype, job_telemetry[key])
+                                                for key, term, _, datatype in TELEMETRY_TERMS})
+            self.stream.flush()
+            if self.manifest:
+                _record_completed(job_dir=self.job_dir,
+                                  results=[os.path.basename(result) for result, job_telemetry
+                                           in zip(results, batch_telemetry) if job_telemetry["status"] == 0])
+
+    def record_error(self, index, error):
+        """Record the jobs of a batch whose task failed (e.g. the worker died) as failed jobs.
+
+        Keyword arguments:
+        index = index of the batch
+        error = task exception
+        """
+        with self.lock:
+            if index in self.recorded:
+                return
+            self.recorded.add(index)
+            self._record_telemetry(telemetry=[
+                {"images": _job_images(job), "result": os.path.basename(_job_result(job)), "speculative": False,
+                 "status": None, "wall_time": None, "cpu_time": None, "max_rss": None, "attempts": None,
+                 "timed_out": False, "error": repr(error)} for job in self.batches[index]])
+
+    def close(self):
+        """Close the results stream."""
+        if self.stream is not None:
+            self.stream.close()
+
+    def _record_telemetry(self, telemetry):
+        """Keep job telemetry and, in a job directory, save elapsed times to order jobs by cost in later runs.
+
+        Keyword arguments:
+        telemetry = list of job telemetry dictionaries
+        """
+        self.telemetry += telemetry
+        if self.job_dir is not None:
+            _record_telemetry(job_dir=self.job_dir, telemetry=telemetry)
+
+
+# Describe job telemetry as metadata terms
+###########################################
+def _telemetry_metadata(telemetry):
+    """Convert the telemetry of a job to metadata terms of its results.
+
+    Keyword arguments:
+    telemetry = job telemetry dictionary
+
+    Returns:
+    metadata  = dictionary of metadata terms
+
+    :param telemetry: dict
+    :return metadata: dict
     """
-    call(job)
+    metadata = {}
+    for key, term, label, datatype in TELEMETRY_TERMS:
+        metadata[term] = {"label": label, "datatype": str(datatype), "value": [telemetry[key]]}
+    return metadata
+
+
+# Calculate the number of jobs per batch
+###########################################
+def _batch_size(n_jobs, config):
+    """Calculate the number of jobs to run per dask task.
+
+    Keyword arguments:
+    n_jobs = total number of jobs
+    config = plantcv.parallel.WorkflowConfig object
+
+    Returns:
+    size   = number of jobs per batch
+
+    :param n_jobs: int
+    :param config: plantcv.parallel.WorkflowConfig
+    :return size: int
+    """
+    if config.batch_size == "auto":
+        n_workers = config.cluster_config.get("n_workers") or 1
+        return max(1, math.ceil(n_jobs / (n_workers * _BATCHES_PER_WORKER)))
+    return config.batch_size
+
+
+# Wait for batches and duplicate stragglers
+###########################################
+def _wait_speculative(client, futures, duplicate):
+    """Wait for batch futures to finish, running duplicates of the longest running batches on idle workers.
+
+    When fewer batches remain than worker threads, the remaining batches that started first are run again on the idle
+    threads. A batch is done when either of its futures finishes, the other future is then cancelled.
+
+    Keyword arguments:
+    client     = dask cluster client object
+    futures    = list of batch futures
+    duplicate  = function that submits a duplicate of a batch given its index and returns the future
+
+    Returns:
+    duplicates = list of (index, future) pairs of the duplicate batches
+
+    :param client: distributed.client.Client
+    :param futures: list
+    :param duplicate: function
+    :return duplicates: list
+    """
+    index = {future.key: i for i, future in enumerate(futures)}
+    attempts = {i: [future] for i, future in enumerate(futures)}
+    remaining = set(attempts)
+    duplicates = []
+    completed = as_completed(futures)
+    for future in completed:
+        i = index[future.key]
+        if i in remaining and (future.status == "finished" or all(f.done() for f in attempts[i])):
+            remaining.discard(i)
+            client.cancel([f for f in attempts[i] if f is not future and not f.done()])
+        if len(remaining) == 0:
+            break
+        # Batches are started in submission order, the lowest remaining indices have been running the longest
+        n_threads = sum(worker["nthreads"] for worker in client.scheduler_info()["workers"].values())
+        duplicated = {j for j, _ in duplicates}
+        n_idle = n_threads - len(remaining) - len(duplicated & remaining)
+        for j in sorted(remaining - duplicated)[:max(0, n_idle)]:
+            print(f"Running a duplicate of batch {j} on an idle worker", file=sys.stderr)
+            speculative_future = duplicate(j)
+            index[speculative_future.key] = j
+            attempts[j].append(speculative_future)
+            duplicates.append((j, speculative_future))
+            completed.add(speculative_future)
+    return duplicates
+
+
+# Group jobs into batches
+###########################################
+def _batch_jobs(jobs, size, job_resources=None):
+    """Group jobs into batches of jobs that require the same worker resources.
+
+    Keyword arguments:
+    jobs          = list of jobs, in the order they should start
+    size          = maximum number of jobs per batch
+    job_resources = dictionary of regular expressions matched to job input image paths and the dask worker resources
+                    required by matching jobs (default = None)
+
+    Returns:
+    batches       = list of job batches, in the order of their first job
+    resources     = worker resources required by each batch (None if no resources are required)
+
+    :param jobs: list
+    :param size: int
+    :param job_resources: dict
+    :return batches: list
+    :return resources: list
+    """
+    # Jobs are grouped by the resources they require, keeping their order within each group
+    groups = {}
+    for i, job in enumerate(jobs):
+        required = {}
+        for pattern, pattern_resources in (job_resources or {}).items():
+            if any(re.search(pattern, str(image)) for image in _job_images(job)):
+                for resource_name, amount in pattern_resources.items():
+                    required[resource_name] = max(amount, required.get(resource_name, 0))
+        groups.setdefault(json.dumps(required, sort_keys=True), []).append((i, job))
+    batches = []
+    for required, group in groups.items():
+        for i in range(0, len(group), size):
+            batch = group[i:i + size]
+            batches.append((batch[0][0], [job for _, job in batch], json.loads(required) or None))
+    batches.sort(key=lambda batch: batch[0])
+    return [batch for _, batch, _ in batches], [required for _, _, required in batches]
 
 
 # Create a dask local or distributed cluster
 ###########################################
-def create_dask_cluster(cluster, cluster_config):
+def create_dask_cluster(cluster, cluster_config, run_mode="subprocess"):
     """Create a dask cluster and return the cluster client
     Inputs:
     cluster        = string-based name of cluster class
     cluster_config = dictionary of cluster configuration keywords/parameters
+    run_mode       = "subprocess" or "inprocess", in-process workers run one job at a time (default = "subprocess")
 
     Returns:
     client         = dask cluster client object
 
     :param cluster: str
     :param cluster_config: dict
+    :param run_mode: str
     :return client: distributed.client.Client
     """
+    # In-process jobs share the PlantCV params and outputs of the worker process, so each worker runs a single thread
+    threads_per_worker = 1 if run_mode == "inprocess" else None
     # There is one decision point
     # If the requested cluster is a LocalCluster we get it from dask.distributed
     if cluster == "LocalCluster":
-        # Create a local cluster client with n_workers
-        client = Client(n_workers=cluster_config.get("n_workers"))
+        # Create a local cluster client with n_workers (and optional worker resources)
+        client = Client(n_workers=cluster_config.get("n_workers"), threads_per_worker=threads_per_worker,
+                        resources=cluster_config.get("resources"))
     # Otherwise the cluster is a class from dask_jobqueue (a distributed resource scheduler)
     else:
         # Retrieve the scheduler class from dask-jobqueue
@@ -41,6 +534,21 @@ def create_dask_cluster(cluster, cluster_config):
         # The user must request the scheduler by the correct name, otherwise stop
         if sched is None:
             raise ValueError(f"The cluster {cluster} is not LocalCluster or a valid dask-jobqueue cluster.")
+        cluster_config = dict(cluster_config)
+        # Each job is split into worker processes with cores / processes threads each
+        if run_mode == "inprocess":
+            cluster_config.setdefault("processes", cluster_config.get("cores"))
+            if (cluster_config.get("cores") or 1) > (cluster_config.get("processes") or 1):
+                fatal_error("In-process workers must run a single thread, set processes equal to cores.")
+        # Worker resources are not a cluster parameter, they are passed on the dask worker command line
+        resources = cluster_config.pop("resources", None)
+        if resources:
+            worker_extra_args = list(cluster_config.get("worker_extra_args") or [])
+            if not isinstance(resources, dict) or "--resources" in worker_extra_args:
+                fatal_error("Cluster resources must be a dictionary of resource names and amounts, "
+                            "and cannot also be set with --resources in worker_extra_args.")
+            cluster_config["worker_extra_args"] = worker_extra_args + [
+                "--resources", " ".join(f"{name}={amount}" for name, amount in resources.items())]
         # Configure the job scheduler by passing the cluster_config dictionary as keyword/value arguments
         drm = sched(**cluster_config)
         # Create a client for the cluster
@@ -50,17 +558,88 @@ def create_dask_cluster(cluster, cluster_config):
 
 # Process jobs using a dask cluster
 ###########################################
-def multiprocess(jobs, client):
+def multiprocess(jobs, client, config=None):
     """Process jobs using a dask cluster.
     Inputs:
-    jobs   = list of jobs where each job is a list of workflow scripts and parameters
-    client = dask cluster client object
+    jobs      = list of jobs where each job is a list of workflow scripts and parameters
+                (or a WorkflowInputs object if config.run_mode is "inprocess")
+    client    = dask cluster client object
+    config    = plantcv.parallel.WorkflowConfig object (optional, default = None runs each job as a subprocess
+                in its own task)
+
+    Returns:
+    telemetry = list of job telemetry dictionaries (images, results file, exit status, wall time, CPU time and peak
+                memory) for the jobs that ran
 
     :param jobs: list
     :param client: distributed.client.Client
+    :param config: plantcv.parallel.WorkflowConfig
+    :return telemetry: list
     """
-    # Keep a list of job futures
-    futures = client.map(_process_images_multiproc, jobs)
-    # Watch job progress and print a progress bar
-    progress(futures)
+    # Without a configuration each job is run as a subprocess in its own task
+    run_mode, workflow, function, size, job_resources = "subprocess", None, "main", 1, None
+    timeout, retries, speculative = None, 0, False
+    if config is not None:
+        run_mode, workflow, function = config.run_mode, config.workflow, config.workflow_function
+        size = _batch_size(n_jobs=len(jobs), config=config)
+        job_resources = config.job_resources
+        timeout, retries, speculative = config.job_timeout, config.job_retries, config.speculative
+    # In-process jobs share the PlantCV params and outputs of the worker process and cannot run in parallel threads
+    if run_mode == "inprocess" and any(worker["nthreads"] > 1
+                                       for worker in client.scheduler_info()["workers"].values()):
+        fatal_error("In-process jobs require dask workers with a single thread (threads_per_worker=1).")
+    # Group jobs into batches to reduce the number of tasks the scheduler has to manage
+    batches, resources = _batch_jobs(jobs=jobs, size=size, job_resources=job_resources)
+    # Failed jobs are run again by the worker. Batches are not retried by dask, which would run the jobs again, but the
+    # scheduler still reruns the batches of a worker that dies (see the distributed.scheduler.allowed-failures setting)
+    task = partial(_process_batch, run_mode=run_mode, workflow=workflow, function=function, timeout=timeout,
+                   retries=retries)
+    # With speculative execution, the original and duplicate of a batch save their results to speculative results files
+    attempt = 0 if speculative else None
+    # Keep a list of batch futures
+    # Batches are prioritized in job order, so the first jobs (e.g. the most expensive jobs) start first
+    futures = [client.submit(task, batch if attempt is None else _speculative_batch(batch, attempt=attempt),
+                             priority=len(batches) - i, resources=required)
+               for i, (batch, required) in enumerate(zip(batches, resources))]
+    # Collect job telemetry and stream job results to the job directory as soon as each batch finishes
+    # Successful jobs are also recorded in the manifest of a persistent job directory
+    job_dir = None
+    if config is not None:
+        job_dir = config.tmp_dir if config.job_dir is None else config.job_dir
+    recorder = _BatchRecorder(batches=batches, job_dir=job_dir,
+                              manifest=config is not None and config.job_dir is not None)
+    for i, future in enumerate(futures):
+        future.add_done_callback(partial(recorder.record, index=i, attempt=attempt))
+    duplicates = []
+    if speculative:
+        def duplicate(i):
+            future = client.submit(task, _speculative_batch(batches[i], attempt=1), priority=len(batches),
+                                   resources=resources[i])
+            future.add_done_callback(partial(recorder.record, index=i, attempt=1))
+            return future
+
+        duplicates = _wait_speculative(client=client, futures=futures, duplicate=duplicate)
+    else:
+        # Watch job progress and print a progress bar
+        progress(futures)
+    # Record any batches whose callbacks have not run yet
+    for i, future in enumerate(futures):
+        recorder.record(future, index=i, attempt=attempt)
+    for i, future in duplicates:
+        recorder.record(future, index=i, attempt=1)
+    # Remove the results of the copies of batches that lost (a copy that is still running leaves speculative results
+    # files, which are not read by process_results)
+    if speculative:
+        for batch in batches:
+            for job in batch:
+                for copy_attempt in [0, 1]:
+                    for suffix in [""] + PARQUET_TABLES:
+                        if os.path.exists(f"{_job_result(job)}{SPECULATIVE_SUFFIX}{copy_attempt}{suffix}"):
+                            os.remove(f"{_job_result(job)}{SPECULATIVE_SUFFIX}{copy_attempt}{suffix}")
+    # Jobs of batches that did not finish (e.g. the worker died more than the number of allowed failures) failed
+    for i, future in enumerate(futures):
+        if future.status == "error":
+            recorder.record_error(index=i, error=future.exception())
+    recorder.close()
+    return recorder.telemetry
 ###########################################
@@ -4,6 +4,12 @@ import json
 import glob
 import pandas as pd
 import itertools
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+
+
+# Minimum number of filenames to parse before parsing is split across processes
+_PARALLEL_PARSE_MIN_FILES = 50000
 
 
 # Parse dataset metadata
@@ -89,20 +95,15 @@ def _dataset2dataframe(dataset, config):
     :param config: plantcv.parallel.WorkflowConfig
     :return df: pandas.core.frame.DataFrame
     """
-    # Build a metadata dictionary of lists of metadata values
+    images = dataset["images"]
+    # Build the dataframe from one list (column) of values per metadata term
     metadata = {
-        "filepath": [],
-        "n_metadata_terms": []
+        "filepath": [os.path.join(config.input_dir, image) for image in images],
+        "n_metadata_terms": [img_meta.get("n_metadata_terms") for img_meta in images.values()]
     }
     # Populate metadata terms from the standard metadata vocabulary
     for term in config.metadata_terms:
-        metadata[term] = []
-    # Iterate over all image metadata and append metadata values to the dictionary
-    for image in dataset["images"]:
-        metadata["filepath"].append(os.path.join(config.input_dir, image))
-        metadata["n_metadata_terms"].append(dataset["images"][image].get("n_metadata_terms"))
-        for term in config.metadata_terms:
-            metadata[term].append(dataset["images"][image].get(term))
+        metadata[term] = [img_meta.get(term) for img_meta in images.values()]
     df = pd.DataFrame(data=metadata)
     utc = bool("Z" in config.timestampformat)
     df["timestamp"] = pd.to_datetime(df.timestamp, format=config.timestampformat, utc=utc)
@@ -474,37 +475,190 @@ def _read_filenames(config):
     extensions = config.imgformat
     if isinstance(config.imgformat, str):
         extensions = _replace_string_extension(config.imgformat)
-    # Get a list of all files
-    if config.include_all_subdirs is False:
-        # If subdirectories are excluded, use glob to get a list of all image files
-        fns = [f for ext in extensions for f in glob.glob(os.path.join(config.input_dir, "*[.]" + ext))]
-    else:
-        # If subdirectories are included, recursively walk through the path
-        fns = []
-        for root, _, files in os.walk(config.input_dir):
-            for file in files:
-                if file.lower().endswith(tuple(extensions)):
-                    # Keep the files that end with the image extension
-                    fns.append(os.path.join(root, file))
     # Create a dataset
     dataset = _init_dataset()
     # Name the experiment with the input directory
     dataset["dataset"]["experiment"] = config.input_dir
     # Index filename metadata based on user-supplied parsing parameters
     metadata_index, config = _filename_metadata_index(config=config)
-    for filepath in fns:
-        # Get the image dataset-relative path to use as the dataset key
-        rel_path = os.path.relpath(filepath, start=config.input_dir)
-        # Pull off the filename
-        filename = os.path.basename(filepath)
-        # Remove the extension
-        metadata, _ = os.path.splitext(filename)
-        # Store the image filename metadata
-        dataset["images"][rel_path] = _parse_filename(filename=metadata, config=config, metadata_index=metadata_index)
+    # Directory listings and parsed filenames from previous runs
+    cache = _read_metadata_cache(config=config)
+    # Get a list of all files (dataset-relative paths)
+    fns, cache["dirs"] = _list_image_files(config=config, extensions=extensions, dirs=cache["dirs"])
+    # Only filenames that were not parsed in previous runs are parsed
+    new_fns = [rel_path for rel_path in fns if rel_path not in cache["images"]]
+    # Remove the extension from the filename
+    filenames = [os.path.splitext(os.path.basename(rel_path))[0] for rel_path in new_fns]
+    parser = partial(_parse_filenames, config=config, metadata_index=metadata_index)
+    if len(filenames) >= _PARALLEL_PARSE_MIN_FILES:
+        # Split large datasets into one chunk of filenames per process
+        n_procs = os.cpu_count() or 1
+        chunksize = -(-len(filenames) // n_procs)
+        chunks = [filenames[i:i + chunksize] for i in range(0, len(filenames), chunksize)]
+        with ProcessPoolExecutor(max_workers=n_procs) as executor:
+            parsed = list(itertools.chain.from_iterable(executor.map(parser, chunks)))
+    else:
+        parsed = parser(filenames)
+    cache["images"].update(zip(new_fns, parsed))
+    # Store the image filename metadata using the image dataset-relative path as the dataset key
+    dataset["images"] = {rel_path: cache["images"][rel_path] for rel_path in fns}
+    if config.metadata_cache is not None:
+        # Images that were removed from the dataset are removed from the cache
+        cache["images"] = dataset["images"]
+        _write_metadata_cache(config=config, cache=cache)
     return dataset
 ###########################################
 
 
+# List the image files of a filename-based dataset
+###########################################
+def _list_image_files(config, extensions, dirs):
+    """List image files, reusing the listings of directories that did not change since they were cached.
+
+    Keyword arguments:
+    config = plantcv.parallel.WorkflowConfig object
+    extensions = list of image file extensions
+    dirs = cached directory listings keyed by dataset-relative directory path
+
+    Outputs:
+    fns = list of dataset-relative image file paths
+    listings = directory listings keyed by dataset-relative directory path
+
+    :param config: plantcv.parallel.WorkflowConfig
+    :param extensions: list
+    :param dirs: dict
+    :return fns: list
+    :return listings: dict
+    """
+    fns = []
+    listings = {}
+    # Like os.walk, a missing input directory has no files
+    pending = ["."] if os.path.isdir(config.input_dir) else []
+    # Directories are listed top-down, subdirectories are added to the end of the list
+    for rel_dir in pending:
+        directory = os.path.normpath(os.path.join(config.input_dir, rel_dir))
+        # A directory's modification time changes when files are added, removed or renamed
+        mtime = os.stat(directory).st_mtime_ns
+        listing = dirs.get(rel_dir)
+        if listing is None or listing["mtime_ns"] != mtime:
+            listing = {"mtime_ns": mtime, "files": [], "subdirs": []}
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if not entry.is_dir():
+                        listing["files"].append(entry.name)
+                    # Like os.walk, symbolic links to directories are not followed
+                    elif not entry.is_symlink():
+                        listing["subdirs"].append(entry.name)
+        listings[rel_dir] = listing
+        if config.include_all_subdirs is False:
+            # If subdirectories are excluded, match image files the same way as glob ("*[.]ext")
+            fns += [file for ext in extensions for file in listing["files"]
+                    if file.endswith(f".{ext}") and not file.startswith(".")]
+        else:
+            # If subdirectories are included, keep the files that end with the image extension
+            fns += [os.path.normpath(os.path.join(rel_dir, file)) for file in listing["files"]
+                    if file.lower().endswith(tuple(extensions))]
+            pending += [os.path.normpath(os.path.join(rel_dir, subdir)) for subdir in listing["subdirs"]]
+    return fns, listings
+###########################################
+
+
+# Parse a list of filenames
+###########################################
+def _parse_filenames(filenames, config, metadata_index):
+    """Parse metadata from a list of filenames.
+
+    Keyword arguments:
+    filenames = list of filenames without extensions
+    config = plantcv.parallel.WorkflowConfig object
+    metadata_index = dictionary of metadata terms and positions
+
+    Outputs:
+    parsed = list of image metadata dictionaries
+
+    :param filenames: list
+    :param config: plantcv.parallel.WorkflowConfig
+    :param metadata_index: dict
+    :return parsed: list
+    """
+    return [_parse_filename(filename=filename, config=config, metadata_index=metadata_index) for filename in filenames]
+###########################################
+
+
+# Read the filename metadata cache
+###########################################
+def _read_metadata_cache(config):
+    """Read cached directory listings and parsed filename metadata.
+
+    The cache is only used if it was created for the same input directory and filename parsing settings.
+
+    Keyword arguments:
+    config = plantcv.parallel.WorkflowConfig object
+
+    Outputs:
+    cache = dictionary of directory listings ("dirs") and image metadata ("images")
+
+    :param config: plantcv.parallel.WorkflowConfig
+    :return cache: dict
+    """
+    cache = {"settings": _metadata_cache_settings(config=config), "dirs": {}, "images": {}}
+    if config.metadata_cache is not None and os.path.exists(config.metadata_cache):
+        with open(config.metadata_cache, "r") as fp:
+            try:
+                cached = json.load(fp)
+            except json.decoder.JSONDecodeError:
+                return cache
+        if cached.get("settings") == cache["settings"]:
+            cache["dirs"] = cached["dirs"]
+            cache["images"] = cached["images"]
+    return cache
+###########################################
+
+
+# Write the filename metadata cache
+###########################################
+def _write_metadata_cache(config, cache):
+    """Write directory listings and parsed filename metadata to the metadata cache file.
+
+    Keyword arguments:
+    config = plantcv.parallel.WorkflowConfig object
+    cache = dictionary of directory listings ("dirs") and image metadata ("images")
+
+    :param config: plantcv.parallel.WorkflowConfig
+    :param cache: dict
+    """
+    # Replace the cache only when it is complete
+    tmp_file = f"{config.metadata_cache}.tmp"
+    with open(tmp_file, "w") as fp:
+        json.dump(cache, fp)
+    os.replace(tmp_file, config.metadata_cache)
+###########################################
+
+
+# Filename metadata cache settings
+###########################################
+def _metadata_cache_settings(config):
+    """Collect the configuration settings that change the parsed filename metadata.
+
+    Keyword arguments:
+    config = plantcv.parallel.WorkflowConfig object
+
+    Outputs:
+    settings = dictionary of filename parsing settings
+
+    :param config: plantcv.parallel.WorkflowConfig
+    :return settings: dict
+    """
+    # Serialize to JSON and back so that the settings compare equal to the cached settings
+    return json.loads(json.dumps({
+        "input_dir": os.path.abspath(config.input_dir),
+        "delimiter": config.delimiter,
+        "filename_metadata": config.filename_metadata,
+        "metadata_terms": config.metadata_terms
+    }))
+###########################################
+
+
 def _anti_join(df1, df2=None):
     """Anti join function for pandas dataframes
     Parameters
@@ -1,50 +1,339 @@
 import os
 import mimetypes
 import json
+import threading
+import pyarrow as pa
+import pyarrow.parquet as pq
 from plantcv.plantcv import fatal_error
+from plantcv.utils.converters import _JSONStream, _SEPARATORS
+
+
+# Line-delimited stream of job results, one entity per line
+RESULTS_STREAM = "results.jsonl"
+# Results filename, byte offset and length of each entity in the results stream
+RESULTS_INDEX = "results.index"
+# Variables dictionary of all streamed results
+RESULTS_VARIABLES = "variables.json"
+# Suffixes of the columnar results tables written by Outputs.save_results(outformat="parquet")
+PARQUET_TABLES = ["-single-value-traits.parquet", "-multi-value-traits.parquet"]
+# Suffix of the results files of the copies of batches run by speculative execution
+SPECULATIVE_SUFFIX = ".speculative"
 
 
 # Process results. Parse individual image output files.
 ###########################################
-def process_results(job_dir, json_file):
+def process_results(job_dir, json_file, outformat="json"):
     """Get results from individual files and combine into final JSON file.
 
+    If job results were streamed to the job directory as jobs finished (see multiprocess), the streamed results are
+    copied to the JSON file one entity at a time. Otherwise the individual results files in the job directory are read.
+
+    If outformat is "parquet", the columnar results tables of each job are instead concatenated into the tables
+    json_file + "-single-value-traits.parquet" and json_file + "-multi-value-traits.parquet".
+
     Args:
         job_dir:              Intermediate file output directory.
         json_file:            Json data table filehandle object.
+        outformat:            Results format of the jobs, "json" or "parquet" (default = "json").
 
     :param job_dir: str
     :param json_file: obj
+    :param outformat: str
     """
-    # Data dictionary
-    data = {"variables": {}, "entities": []}
-    if os.path.exists(json_file):
-        with open(json_file, 'r') as datafile:
+    if outformat == "parquet":
+        for suffix in PARQUET_TABLES:
+            _concat_tables(job_dir=job_dir, table_file=f"{json_file}{suffix}", suffix=suffix)
+        return
+
+    # Write the combined results to a temporary file so that an existing results file is replaced only when complete
+    tmp_file = f"{json_file}.tmp"
+    with open(tmp_file, "w") as datafile:
+        datafile.write('{"entities": [')
+        n_entities = 0
+        variables = {}
+        # Existing entities
+        if os.path.exists(json_file):
             try:
-                data = json.load(datafile)
-                if "variables" not in data or "entities" not in data:
-                    fatal_error("Invalid JSON file")
+                variables, n_entities = _copy_entities(json_file=json_file, datafile=datafile)
             except json.decoder.JSONDecodeError:
+                variables = None
+            if variables is None:
+                datafile.close()
+                os.remove(tmp_file)
                 fatal_error("Invalid JSON file")
+        if os.path.exists(os.path.join(job_dir, RESULTS_STREAM)):
+            # Copy streamed results without parsing them
+            for entity in _read_stream(job_dir=job_dir):
+                n_entities = _write_entity(datafile=datafile, entity=entity, n_entities=n_entities)
+            variables.update(_read_variables(job_dir=job_dir))
+        else:
+            # Walk through the image processing job directory and process data from each file
+            for (dirpath, _, filenames) in os.walk(job_dir):
+                for filename in filenames:
+                    # Make sure file is a text or json file
+                    if filename not in [RESULTS_VARIABLES] and \
+                            ('text/plain' in mimetypes.guess_type(filename) or
+                             'application/json' in mimetypes.guess_type(filename)):
+                        # Open results file
+                        with open(os.path.join(dirpath, filename)) as results:
+                            obs = json.load(results)
+                        n_entities = _write_entity(datafile=datafile, entity=json.dumps(obs), n_entities=n_entities)
+                        _update_variables(variables=variables, obs=obs)
+        # Write the variables after the entities so that they can be collected while streaming
+        datafile.write('], "variables": ' + json.dumps(variables) + '}')
+    os.replace(tmp_file, json_file)
+
+
+def _concat_tables(job_dir, table_file, suffix):
+    """Concatenate the columnar results tables of all jobs into one table, one job at a time.
+
+    Keyword arguments:
+    job_dir    = job directory
+    table_file = output table file, existing rows are kept
+    suffix     = filename suffix of the job tables
 
-    # Walk through the image processing job directory and process data from each file
+    :param job_dir: str
+    :param table_file: str
+    :param suffix: str
+    """
+    tables = [table_file] if os.path.exists(table_file) else []
     for (dirpath, _, filenames) in os.walk(job_dir):
-        for filename in filenames:
-            # Make sure file is a text or json file
-            if 'text/plain' in mimetypes.guess_type(filename) or 'application/json' in mimetypes.guess_type(filename):
-                # Open results file
-                with open(os.path.join(dirpath, filename)) as results:
-                    obs = json.load(results)
-                    data["entities"].append(obs)
-                    # Keep track of all metadata variables stored
-                    for var in obs["metadata"]:
-                        data["variables"][var] = {"category": "metadata", "datatype": "<class 'str'>"}
-                    # Keep track of all observations variables stored
-                    for sample in obs["observations"]:
-                        for othervars in obs["observations"][sample]:
-                            data["variables"][othervars] = {"category": "observations",
-                                                            "datatype": obs["observations"][sample][othervars]["datatype"]}
-
-    # Write out json file with info from all images
-    with open(json_file, 'w') as datafile:
-        json.dump(data, datafile, indent=4)
+        # Speculative results files of batch copies that lost are not job results
+        tables += [os.path.join(dirpath, filename) for filename in sorted(filenames)
+                   if filename.endswith(suffix) and SPECULATIVE_SUFFIX not in filename]
+    # Jobs can measure different traits, the output table has the columns of all job tables
+    schemas = [pq.read_schema(table) for table in tables]
+    schema = pa.unify_schemas(schemas, promote_options="permissive").remove_metadata() if schemas else pa.schema([])
+    tmp_file = f"{table_file}.tmp"
+    with pq.ParquetWriter(tmp_file, schema) as writer:
+        for table in tables:
+            data = pq.read_table(table)
+            columns = [data[field.name].cast(field.type) if field.name in data.column_names else
+                       pa.nulls(data.num_rows, type=field.type) for field in schema]
+            writer.write_table(pa.Table.from_arrays(columns, schema=schema))
+    os.replace(tmp_file, table_file)
+
+
+def _add_table_columns(table_file, columns):
+    """Add columns with a single value to a results table, before the sample column.
+
+    Keyword arguments:
+    table_file = results table file
+    columns    = dictionary of column names and (data type, value) pairs, the data type is int, float or str
+
+    :param table_file: str
+    :param columns: dict
+    """
+    arrow_types = {int: pa.int64(), float: pa.float64(), str: pa.string()}
+    table = pq.read_table(table_file)
+    table = table.drop_columns([name for name in columns if name in table.column_names])
+    position = table.column_names.index("sample") if "sample" in table.column_names else 0
+    for name, (datatype, value) in columns.items():
+        table = table.add_column(position, name, pa.array([value] * table.num_rows, type=arrow_types[datatype]))
+        position += 1
+    tmp_file = f"{table_file}.tmp"
+    pq.write_table(table, tmp_file)
+    os.replace(tmp_file, table_file)
+
+
+def _copy_entities(json_file, datafile):
+    """Copy the entities of an existing results file to an open results file, one entity at a time.
+
+    Keyword arguments:
+    json_file  = existing JSON results file
+    datafile   = open output file
+
+    Returns:
+    variables  = variables dictionary of the existing results (None if the results have no variables or entities)
+    n_entities = number of entities written
+
+    :param json_file: str
+    :param datafile: file
+    :return variables: dict
+    :return n_entities: int
+    """
+    variables = None
+    has_entities = False
+    n_entities = 0
+    with open(json_file, "rb") as fp:
+        stream = _JSONStream(fp)
+        stream.expect("{")
+        while stream.peek(skip=_SEPARATORS) != "}":
+            key = stream.decode()
+            stream.expect(":")
+            if key != "entities":
+                value = stream.decode()
+                if key == "variables":
+                    variables = value
+                continue
+            has_entities = True
+            stream.expect("[")
+            while stream.peek(skip=_SEPARATORS) != "]":
+                n_entities = _write_entity(datafile=datafile, entity=json.dumps(stream.decode()), n_entities=n_entities)
+            stream.expect("]")
+    if not has_entities:
+        variables = None
+    return variables, n_entities
+
+
+def _write_entity(datafile, entity, n_entities):
+    """Write a serialized entity to the entities list of an open results file.
+
+    Keyword arguments:
+    datafile   = open output file
+    entity     = JSON-serialized entity
+    n_entities = number of entities written so far
+
+    Returns:
+    n_entities = updated number of entities written
+
+    :param datafile: file
+    :param entity: str
+    :param n_entities: int
+    :return n_entities: int
+    """
+    if n_entities > 0:
+        datafile.write(",\n")
+    datafile.write(entity)
+    return n_entities + 1
+
+
+def _update_variables(variables, obs):
+    """Update a variables dictionary with the metadata and observation variables of one entity.
+
+    Keyword arguments:
+    variables = variables dictionary
+    obs       = results entity
+
+    Returns:
+    changed   = True if a variable was added or changed
+
+    :param variables: dict
+    :param obs: dict
+    :return changed: bool
+    """
+    changed = False
+    new_vars = {}
+    # Keep track of all metadata variables stored
+    for var in obs["metadata"]:
+        new_vars[var] = {"category": "metadata", "datatype": "<class 'str'>"}
+    # Keep track of all observations variables stored
+    for sample in obs["observations"]:
+        for othervars in obs["observations"][sample]:
+            new_vars[othervars] = {"category": "observations",
+                                   "datatype": obs["observations"][sample][othervars]["datatype"]}
+    for var, definition in new_vars.items():
+        if variables.get(var) != definition:
+            variables[var] = definition
+            changed = True
+    return changed
+
+
+def _read_stream(job_dir):
+    """Read the serialized entities of a results stream, keeping only the latest results of each job.
+
+    Keyword arguments:
+    job_dir = job directory
+
+    Returns:
+    entity  = generator of JSON-serialized entities
+
+    :param job_dir: str
+    :return entity: generator
+    """
+    # Each index line has the results filename, byte offset and length of an entity in the stream
+    index = []
+    with open(os.path.join(job_dir, RESULTS_INDEX), "r") as fp:
+        for line in fp:
+            fields = line.rstrip("\n").split("\t")
+            # Skip a partially written last line from an interrupted run
+            if line.endswith("\n") and len(fields) == 3:
+                index.append((fields[0], int(fields[1]), int(fields[2])))
+    # Only the last streamed results of each job that still has a results file are kept
+    existing = set(os.listdir(job_dir))
+    latest = {name: i for i, (name, _, _) in enumerate(index)}
+    with open(os.path.join(job_dir, RESULTS_STREAM), "rb") as fp:
+        for i, (name, offset, length) in enumerate(index):
+            if latest[name] == i and name in existing:
+                fp.seek(offset)
+                yield fp.read(length).decode()
+
+
+def _read_variables(job_dir):
+    """Read the variables dictionary of a results stream.
+
+    Keyword arguments:
+    job_dir   = job directory
+
+    Returns:
+    variables = variables dictionary
+
+    :param job_dir: str
+    :return variables: dict
+    """
+    variables_file = os.path.join(job_dir, RESULTS_VARIABLES)
+    if os.path.exists(variables_file):
+        with open(variables_file, "r") as fp:
+            return json.load(fp)
+    return {}
+
+
+class _ResultsStream:
+    """Append job results to a line-delimited results stream as jobs finish.
+
+    The stream and index files are kept open for the whole run and flushed after each batch of jobs.
+    """
+
+    def __init__(self, job_dir):
+        """Initialize a results stream in a job directory.
+
+        Keyword arguments:
+        job_dir = job directory
+        """
+        self.job_dir = job_dir
+        # Variables from previous runs in the same job directory
+        self.variables = _read_variables(job_dir=job_dir)
+        self.lock = threading.Lock()
+        # Results from previous runs in the same job directory are kept, new results are appended
+        self.stream = open(os.path.join(job_dir, RESULTS_STREAM), "ab")
+        self.index = open(os.path.join(job_dir, RESULTS_INDEX), "a")
+
+    def add(self, result_file, metadata=None):
+        """Append the results of a finished job to the stream.
+
+        Keyword arguments:
+        result_file = job results file
+        metadata    = additional metadata terms of the job, e.g. job telemetry (default = None)
+        """
+        if not os.path.exists(result_file):
+            return
+        with open(result_file, "r") as fp:
+            try:
+                obs = json.load(fp)
+            except json.decoder.JSONDecodeError:
+                return
+        obs["metadata"].update(metadata or {})
+        with self.lock:
+            # Write the entity before its index entry so that every indexed entity is complete
+            entity = json.dumps(obs).encode()
+            offset = self.stream.tell()
+            self.stream.write(entity + b"\n")
+            self.index.write(f"{os.path.basename(result_file)}\t{offset}\t{len(entity)}\n")
+            # The variables file is only rewritten when a new variable is found
+            if _update_variables(variables=self.variables, obs=obs):
+                tmp_file = os.path.join(self.job_dir, f"{RESULTS_VARIABLES}.tmp")
+                with open(tmp_file, "w") as fp:
+                    json.dump(self.variables, fp)
+                os.replace(tmp_file, os.path.join(self.job_dir, RESULTS_VARIABLES))
+
+    def flush(self):
+        """Write the buffered results to the stream files, the stream before the index."""
+        with self.lock:
+            self.stream.flush()
+            self.index.flush()
+
+    def close(self):
+        """Flush and close the stream files."""
+        with self.lock:
+            self.stream.close()
+            self.index.close()
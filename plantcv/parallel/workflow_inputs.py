@@ -1,11 +1,12 @@
 import argparse
+from plantcv.plantcv import outputs
 
 
 class WorkflowInputs:
     """Class for setting workflow inputs in Jupyter."""
 
     def __init__(self, images: list, names: str, result: str, outdir: str = ".", writeimg: bool = False,
-                 debug: str = None, **kwargs):
+                 debug: str = None, metadata: dict = None, outformat: str = "json", **kwargs):
         """Configure input variables for a PlantCV workflow.
 
         Keyword arguments:
@@ -15,12 +16,16 @@ class WorkflowInputs:
         outdir = An output directory for saved images (default = '.').
         writeimg = Save output images (default = False).
         debug = Set debug mode to None, 'print', or 'plot' (default = None).
+        metadata = Image metadata saved with the workflow results (default = None).
+        outformat = Results file format, "json" or "parquet" (default = "json").
         kwargs = Additional, user-defined workflow inputs.
         """
         self.result = result
         self.outdir = outdir
         self.writeimg = writeimg
         self.debug = debug
+        self.metadata = metadata
+        self.outformat = outformat
         self.__dict__.update(kwargs)
         self.__dict__.update(_name_images(names=names, img_list=images))
 
@@ -45,11 +50,16 @@ def workflow_inputs(*other_args) -> argparse.Namespace:
     parser.add_argument("--writeimg", help="Save output images.", default=False, action="store_true")
     parser.add_argument("--debug", help="Turn on debug, prints/plot intermediate images.",
                         choices=[None, "print", "plot"], default=None)
+    parser.add_argument("--outformat", help="Output workflow results file format.", choices=["json", "parquet"],
+                        default="json")
     # Parse additional user-defined workflow inputs
     for arg in other_args:
         parser.add_argument(f"--{arg}", help="Additional, user-defined workflow input.", required=False)
     args = parser.parse_args()
 
+    # Image metadata of a plantcv-run-workflow job, read from the job environment when plantcv is imported
+    args.metadata = outputs.job_metadata or None
+
     images = _name_images(names=args.names, img_list=args.images)
     args.__dict__.update(images)
     return args
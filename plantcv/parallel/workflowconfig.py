@@ -15,6 +15,8 @@ class WorkflowConfig:
         self.img_outdir = "./output_images"
         self.include_all_subdirs = True
         self.tmp_dir = "."
+        self.job_dir = None
+        self.metadata_cache = None
         self.start_date = None
         self.end_date = None
         self.imgformat = "all"
@@ -28,6 +30,15 @@ class WorkflowConfig:
         self.group_name = "auto"
         self.cleanup = True
         self.append = False
+        self.run_mode = "subprocess"
+        self.workflow_function = "main"
+        self.batch_size = 1
+        self.results_format = "json"
+        self.job_order = "metadata"
+        self.job_resources = {}
+        self.job_timeout = None
+        self.job_retries = 0
+        self.speculative = False
         self.cluster = "LocalCluster"
         self.cluster_config = {
             "n_workers": 1,
@@ -103,6 +114,49 @@ class WorkflowConfig:
                   file=sys.stderr)
             checks.append(False)
 
+        # Validate the workflow execution mode
+        valid_run_modes = ["subprocess", "inprocess"]
+        if self.run_mode not in valid_run_modes:
+            print(f"Error: the run mode {self.run_mode} is not supported. "
+                  f"Valid run modes include: {', '.join(valid_run_modes)}.", file=sys.stderr)
+            checks.append(False)
+
+        # Validate the number of jobs per batch
+        if self.batch_size != "auto" and (not isinstance(self.batch_size, int) or self.batch_size < 1):
+            print(f"Error: batch_size must be a positive integer or 'auto' but is {self.batch_size}.",
+                  file=sys.stderr)
+            checks.append(False)
+
+        # Validate the results format
+        valid_results_formats = ["json", "parquet"]
+        if self.results_format not in valid_results_formats:
+            print(f"Error: the results format {self.results_format} is not supported. "
+                  f"Valid results formats include: {', '.join(valid_results_formats)}.", file=sys.stderr)
+            checks.append(False)
+
+        # Validate the job order
+        valid_job_orders = ["metadata", "cost"]
+        if self.job_order not in valid_job_orders:
+            print(f"Error: the job order {self.job_order} is not supported. "
+                  f"Valid job orders include: {', '.join(valid_job_orders)}.", file=sys.stderr)
+            checks.append(False)
+
+        # Validate the job timeout, in-process jobs run in a worker thread that cannot be stopped
+        if self.job_timeout is not None:
+            if isinstance(self.job_timeout, bool) or not isinstance(self.job_timeout, (int, float)) or \
+                    self.job_timeout <= 0:
+                print(f"Error: job_timeout must be a positive number of seconds but is {self.job_timeout}.",
+                      file=sys.stderr)
+                checks.append(False)
+            elif self.run_mode == "inprocess":
+                print("Error: job_timeout is only supported with the subprocess run mode.", file=sys.stderr)
+                checks.append(False)
+
+        # Validate the number of job retries
+        if isinstance(self.job_retries, bool) or not isinstance(self.job_retries, int) or self.job_retries < 0:
+            print(f"Error: job_retries must be a non-negative integer but is {self.job_retries}.", file=sys.stderr)
+            checks.append(False)
+
         # Validate start_date and end_date formats
         if self.start_date is not None:
             try:
@@ -26,3 +26,14 @@ def _debug(visual, filename=None, **kwargs):
     elif params.debug == "plot":
         # If debug is plot, print to the plotting device
         plot_image(img=visual, **kwargs)
+
+
+def _build_visuals():
+    """
+    Check whether diagnostic images and plots should be built.
+
+    Visuals are skipped only if pcv.params.visuals is False and debug mode is off.
+
+    :return build: bool
+    """
+    return params.visuals or params.debug is not None
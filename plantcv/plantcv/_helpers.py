@@ -1,6 +1,10 @@
 import cv2
 import numpy as np
 import math
+import weakref
+from copy import copy
+from collections import OrderedDict
+from scipy import ndimage
 from skimage import morphology
 from plantcv.plantcv import fatal_error, warn
 from plantcv.plantcv import params
@@ -166,13 +170,13 @@ def _find_segment_ends(skel_img, leaf_objects, plotting_img, size):
     Inputs:
     skel_img         = Skeletonized image
     leaf_objects     = List of leaf segments
-    plotting_img     = Mask for debugging, might be a copy of the Skeletonized image
+    plotting_img     = Mask for debugging, might be a copy of the Skeletonized image (None to skip the debug image)
     size             = Size of inner segment ends (in pixels)
     :param skel_img: numpy.ndarray
     :param leaf_objects: list
     :param plotting_img: numpy.ndarray
     """
-    labeled_img = cv2.cvtColor(plotting_img, cv2.COLOR_GRAY2RGB)
+    labeled_img = None if plotting_img is None else cv2.cvtColor(plotting_img, cv2.COLOR_GRAY2RGB)
     tips, _, _ = _find_tips(skel_img)
     # Initialize list of tip data points
     labels = []
@@ -185,9 +189,11 @@ def _find_segment_ends(skel_img, leaf_objects, plotting_img, size):
     for i in range(len(leaf_objects)):
         labels.append(i)
         # Draw leaf objects
-        find_segment_tangents = np.zeros(labeled_img.shape[:2], np.uint8)
+        find_segment_tangents = np.zeros(skel_img.shape[:2], np.uint8)
         cv2.drawContours(find_segment_tangents, leaf_objects, i, 255, 1, lineType=8)
-        cv2.drawContours(labeled_img, leaf_objects, i, (150, 150, 150), params.line_thickness, lineType=8)  # segments debug
+        if labeled_img is not None:
+            cv2.drawContours(labeled_img, leaf_objects, i, (150, 150, 150), params.line_thickness,
+                             lineType=8)  # segments debug
         # Prune back ends of leaves
         pruned_segment = _iterative_prune(find_segment_tangents, size)
         # Segment ends are the portions pruned off
@@ -207,15 +213,18 @@ def _find_segment_ends(skel_img, leaf_objects, plotting_img, size):
             # If none of the tips are within a segment_end then it's an insertion segment
             if np.sum(overlap_img) == 0:
                 inner_list.append(coord)
-                cv2.circle(labeled_img, coord, params.line_thickness, (50, 0, 255), -1)  # Red auricles/branch points
+                # Red auricles/branch points
+                if labeled_img is not None:
+                    cv2.circle(labeled_img, coord, params.line_thickness, (50, 0, 255), -1)
                 branch_pt_found = True
             else:
                 tip_list.append(coord)
-                cv2.circle(labeled_img, coord, params.line_thickness, (0, 255, 0), -1)  # green tips
+                if labeled_img is not None:
+                    cv2.circle(labeled_img, coord, params.line_thickness, (0, 255, 0), -1)  # green tips
         if not branch_pt_found:  # there is no branch point associated with a given segment and therefore it cannot be sorted
             remove.append(i)
             # Plot the ends if found
-            if len(coords) > 1:
+            if len(coords) > 1 and labeled_img is not None:
                 # Plot the tip that is closest to the stem
                 x_min, y_min, w, h = cv2.boundingRect(skel_img)
                 cx = int((x_min + (w / 2)))
@@ -254,29 +263,12 @@ def _iterative_prune(skel_img, size):
     :return pruned_img: numpy.ndarray
     """
     pruned_img = skel_img.copy()
-    # Store debug
-    debug = params.debug
-    params.debug = None
 
     # Iteratively remove endpoints (tips) from a skeleton
     for _ in range(0, size):
         endpoints, _, _ = _find_tips(pruned_img)
         pruned_img = _image_subtract(pruned_img, endpoints)
 
-    # Make debugging image
-    pruned_plot = np.zeros(skel_img.shape[:2], np.uint8)
-    pruned_plot = cv2.cvtColor(pruned_plot, cv2.COLOR_GRAY2RGB)
-    skel_obj, skel_hierarchy = _cv2_findcontours(bin_img=pruned_img)
-    pruned_obj, pruned_hierarchy = _cv2_findcontours(bin_img=pruned_img)
-
-    # Reset debug mode
-    params.debug = debug
-
-    cv2.drawContours(pruned_plot, skel_obj, -1, (0, 0, 255), params.line_thickness,
-                     lineType=8, hierarchy=skel_hierarchy)
-    cv2.drawContours(pruned_plot, pruned_obj, -1, (255, 255, 255), params.line_thickness,
-                     lineType=8, hierarchy=pruned_hierarchy)
-
     return pruned_img
 
 
@@ -286,16 +278,17 @@ def _find_tips(skel_img, mask=None):
 
     Inputs:
     skel_img    = Skeletonized image
-    mask        = (Optional) binary mask for debugging. If provided, debug image will be overlaid on the mask.
-    label       = Optional label parameter, modifies the variable name of
-                  observations recorded (default = pcv.params.sample_label).
+    mask        = (Optional) binary mask, not used
     Returns:
     tip_img   = Image with just tips, rest 0
+    tip_list  = List of tip coordinates
+    tip_labels = List of tip IDs
 
     :param skel_img: numpy.ndarray
     :param mask: numpy.ndarray
-    :param label: str
     :return tip_img: numpy.ndarray
+    :return tip_list: list
+    :return tip_labels: list
     """
     # In a kernel: 1 values line up with 255s, -1s line up with 0s, and 0s correspond to dont care
     endpoint1 = np.array([[-1, -1, -1],
@@ -318,24 +311,8 @@ def _find_tips(skel_img, mask=None):
         tip_img = np.logical_or(cv2.morphologyEx(skel_img, op=cv2.MORPH_HITMISS, kernel=endpoint,
                                                  borderType=cv2.BORDER_CONSTANT, borderValue=0), tip_img)
     tip_img = tip_img.astype(np.uint8) * 255
-    # Store debug
-    debug = params.debug
-    params.debug = None
     tip_objects, _ = _cv2_findcontours(bin_img=tip_img)
 
-    if mask is None:
-        # Make debugging image
-        dilated_skel = _dilate(skel_img, params.line_thickness, 1)
-        tip_plot = cv2.cvtColor(dilated_skel, cv2.COLOR_GRAY2RGB)
-
-    else:
-        # Make debugging image on mask
-        mask_copy = mask.copy()
-        tip_plot = cv2.cvtColor(mask_copy, cv2.COLOR_GRAY2RGB)
-        skel_obj, skel_hier = _cv2_findcontours(bin_img=skel_img)
-        cv2.drawContours(tip_plot, skel_obj, -1, (150, 150, 150), params.line_thickness,
-                         lineType=8, hierarchy=skel_hier)
-
     # Initialize list of tip data points
     tip_list = []
     tip_labels = []
@@ -344,14 +321,33 @@ def _find_tips(skel_img, mask=None):
         coord = (int(x), int(y))
         tip_list.append(coord)
         tip_labels.append(i)
-        cv2.circle(tip_plot, (x, y), params.line_thickness, (0, 255, 0), -1)
-
-    # Reset debug mode
-    params.debug = debug
 
     return tip_img, tip_list, tip_labels
 
 
+def _segment_tips(segment):
+    """Find the tips of one skeleton segment.
+
+    The segment is drawn on an image the size of its bounding box, so the cost does not depend on the image size.
+
+    Inputs:
+    segment     = Segment contour
+
+    Returns:
+    tip_objects = Contours of the segment tips, in image coordinates
+
+    :param segment: numpy.ndarray
+    :return tip_objects: list
+    """
+    x, y, w, h = cv2.boundingRect(segment)
+    # Keep a background border around the segment
+    segment_img = np.zeros((h + 2, w + 2), np.uint8)
+    cv2.drawContours(segment_img, [segment], -1, 255, 1, lineType=8, offset=(1 - x, 1 - y))
+    segment_tips, _, _ = _find_tips(segment_img)
+    tip_objects, _ = _cv2_findcontours(bin_img=segment_tips, offset=(x - 1, y - 1))
+    return tip_objects
+
+
 def _hough_circle(gray_img, mindist, candec, accthresh, minradius, maxradius, maxfound=None):
     """
     Hough Circle Detection
@@ -439,7 +435,7 @@ def _hough_circle(gray_img, mindist, candec, accthresh, minradius, maxradius, ma
     return df, cimg
 
 
-def _cv2_findcontours(bin_img):
+def _cv2_findcontours(bin_img, offset=(0, 0)):
     """
     Helper function for OpenCV findContours.
 
@@ -447,12 +443,15 @@ def _cv2_findcontours(bin_img):
 
     Keyword inputs:
     bin_img = Binary image (np.ndarray)
+    offset  = (x, y) offset added to every contour point, e.g. the position of a cropped image (default = (0, 0))
 
     :param bin_img: np.ndarray
+    :param offset: tuple
     :return contours: list
     :return hierarchy: np.array
     """
-    contours, hierarchy = cv2.findContours(np.copy(bin_img), cv2.RETR_TREE, cv2.CHAIN_APPROX_NONE)[-2:]
+    contours, hierarchy = cv2.findContours(np.copy(bin_img), cv2.RETR_TREE, cv2.CHAIN_APPROX_NONE,
+                                           offset=offset)[-2:]
 
     return contours, hierarchy
 
@@ -582,14 +581,23 @@ def _roi_filter(img, roi, obj, hierarchy, roi_type="partial"):
     return kept_cnt, kept_hierarchy, mask
 
 
-def _iterate_analysis(img, labeled_mask, n_labels, label, function, **kwargs):
+def _iterate_analysis(img, labeled_mask, n_labels, label, function, crop=False, offset=False, **kwargs):
     """Iterate over labels and apply an analysis function.
+
+    The bounding box of each label is found in one pass over the labeled mask, so each submask is only built within
+    the bounding box of its label instead of over the full image.
+
     Inputs:
     img      = image to be used for visualization
     mask     = labeled mask
     n_labels = number of expected labels
     label    = label parameter, modifies the variable name of observations recorded
     function = analysis function to apply to each submask
+    crop     = if True, the analysis function gets the image and submask cropped to the bounding box of each label.
+               Only for functions whose measurements do not depend on pixel positions, the image returned by the
+               function is not used (default = False)
+    offset   = if True, the analysis function also gets the row and column of the cropped region in the image as
+               offset, for functions that measure pixel positions on cropped submasks (default = False)
     kwargs   = additional keyword arguments to pass to the analysis function
 
     :param img: np.ndarray
@@ -597,8 +605,50 @@ def _iterate_analysis(img, labeled_mask, n_labels, label, function, **kwargs):
     :param n_labels: int
     :param label: str
     :param function: function
+    :param crop: bool
+    :param offset: bool
     :param kwargs: dict
     """
+    mask_copy, samples = _label_samples(labeled_mask=labeled_mask, n_labels=n_labels, label=label)
+    # Bounding box (slices) of each label, None for labels that are not in the mask
+    boxes = ndimage.find_objects(mask_copy, max_label=n_labels)
+    # Masks that are not 2D are passed to the analysis function uncropped, for its own input validation
+    crop = crop and mask_copy.ndim == 2
+    for i, (box, sample) in enumerate(zip(boxes, samples), start=1):
+        if offset:
+            # Submasks that are not cropped start at the top left corner of the image
+            kwargs["offset"] = (box[0].start, box[1].start) if box is not None and crop else (0, 0)
+        if box is not None and crop:
+            submask = (mask_copy[box] == i).astype(np.uint8) * 255
+            _ = function(img=_crop_image(img=img, box=box), mask=submask, label=sample, **kwargs)
+            continue
+        submask = np.zeros(mask_copy.shape, dtype=np.uint8)
+        if box is not None:
+            submask[box] = (mask_copy[box] == i).astype(np.uint8) * 255
+        analysis_img = function(img=img, mask=submask, label=sample, **kwargs)
+        if not crop:
+            img = analysis_img
+    return img
+
+
+def _label_samples(labeled_mask, n_labels, label):
+    """Prepare a labeled mask and the sample name of each label for analysis.
+
+    Inputs:
+    labeled_mask = labeled mask, or a binary mask (0 and 255) of one object
+    n_labels     = number of expected labels
+    label        = label parameter, a string or a list of one label per object
+
+    Returns:
+    mask         = labeled mask (a copy, binary masks are converted to label 1)
+    samples      = list of sample names, one per label
+
+    :param labeled_mask: np.ndarray
+    :param n_labels: int
+    :param label: str or list
+    :return mask: np.ndarray
+    :return samples: list
+    """
     # Set labels to label
     labels = label
     # If label is a string, make a list of labels
@@ -610,10 +660,54 @@ def _iterate_analysis(img, labeled_mask, n_labels, label, function, **kwargs):
     mask_copy = np.copy(labeled_mask)
     if len(np.unique(mask_copy)) == 2 and np.max(mask_copy) == 255:
         mask_copy = np.where(mask_copy == 255, 1, 0).astype(np.uint8)
-    for i in range(1, n_labels + 1):
-        submask = np.where(mask_copy == i, 255, 0).astype(np.uint8)
-        img = function(img=img, mask=submask, label=f"{labels[i - 1]}_{i}", **kwargs)
-    return img
+    return mask_copy, [f"{labels[i - 1]}_{i}" for i in range(1, n_labels + 1)]
+
+
+def _label_pixels(labeled_mask, n_labels):
+    """Find the pixels of each labeled object, grouped by label.
+
+    Inputs:
+    labeled_mask = labeled mask
+    n_labels     = number of expected labels
+
+    Returns:
+    pixels       = tuple of row and column indices of the pixels of labels 1 to n_labels, sorted by label
+    bounds       = positions in the pixel indices where each label starts, and the end of the last label
+                   (the pixels of label i are pixels[bounds[i - 1]:bounds[i]])
+
+    :param labeled_mask: np.ndarray
+    :param n_labels: int
+    :return pixels: tuple
+    :return bounds: np.ndarray
+    """
+    flat_mask = labeled_mask.ravel()
+    index = np.flatnonzero((flat_mask > 0) & (flat_mask <= n_labels))
+    # A stable sort keeps the pixels of each label in row-major order
+    index = index[np.argsort(flat_mask[index], kind="stable")]
+    counts = np.bincount(flat_mask[index].astype(np.int64), minlength=n_labels + 1)[1:]
+    bounds = np.concatenate([[0], np.cumsum(counts)])
+    return np.unravel_index(index, labeled_mask.shape), bounds
+
+
+def _crop_image(img, box):
+    """Crop an image or the array data of a Spectral_data object to a bounding box.
+
+    Inputs:
+    img     = image or Spectral_data object
+    box     = tuple of row and column slices
+
+    Returns:
+    cropped = cropped view of the image, or a copy of the Spectral_data object with cropped array data
+
+    :param img: np.ndarray or plantcv.plantcv.classes.Spectral_data
+    :param box: tuple
+    :return cropped: np.ndarray or plantcv.plantcv.classes.Spectral_data
+    """
+    if isinstance(img, np.ndarray):
+        return img[box]
+    cropped = copy(img)
+    cropped.array_data = img.array_data[box]
+    return cropped
 
 
 def _object_composition(contours, hierarchy):
@@ -688,7 +782,7 @@ def _rgb2lab(rgb_img, channel):
         fatal_error("Channel " + str(channel) + " is not l, a or b!")
 
     # Convert the input BGR image to LAB colorspace
-    lab = cv2.cvtColor(rgb_img, cv2.COLOR_BGR2LAB)
+    lab = _convert_colorspace(rgb_img=rgb_img, conversion="lab")
     # Split LAB channels
     l, a, b = cv2.split(lab)
     # Create a channel dictionaries for lookups by a channel name index
@@ -717,7 +811,7 @@ def _rgb2hsv(rgb_img, channel):
         fatal_error("Channel " + str(channel) + " is not h, s or v!")
 
     # Convert the input BGR image to HSV colorspace
-    hsv = cv2.cvtColor(rgb_img, cv2.COLOR_BGR2HSV)
+    hsv = _convert_colorspace(rgb_img=rgb_img, conversion="hsv")
     # Split HSV channels
     h, s, v = cv2.split(hsv)
     # Create a channel dictionaries for lookups by a channel name index
@@ -741,13 +835,37 @@ def _rgb2cmyk(rgb_img, channel):
     numpy.ndarray
         grayscale image from one CMYK color channel
     """
-    # Set NumPy to ignore divide by zero errors
-    _ = np.seterr(divide='ignore', invalid='ignore')
     # The allowable channel inputs are c, m , y or k
     channel = channel.lower()
     if channel not in ["c", "m", "y", "k"]:
         fatal_error("Channel " + str(channel) + " is not c, m, y or k!")
 
+    # Convert the input BGR image to CMYK colorspace
+    cmyk = _convert_colorspace(rgb_img=rgb_img, conversion="cmyk")
+    # Split CMYK channels
+    y, m, c, k = cv2.split(cmyk)
+    # Create a channel dictionaries for lookups by a channel name index
+    channels = {"c": c, "m": m, "y": y, "k": k}
+
+    return channels[channel]
+
+
+def _bgr2cmyk(rgb_img):
+    """Convert image from RGB colorspace to CMYK colorspace.
+
+    Parameters
+    ----------
+    rgb_img : numpy.ndarray
+        RGB image data
+
+    Returns
+    -------
+    numpy.ndarray
+        CMYK image data
+    """
+    # Set NumPy to ignore divide by zero errors
+    _ = np.seterr(divide='ignore', invalid='ignore')
+
     # Create float
     bgr = rgb_img.astype(float)/255.
 
@@ -764,13 +882,7 @@ def _rgb2cmyk(rgb_img, channel):
     y = (1 - bgr[..., 0] - k) / (1 - k)
 
     # Convert the input BGR image to LAB colorspace
-    cmyk = (np.dstack((c, m, y, k)) * 255).astype(np.uint8)
-    # Split CMYK channels
-    y, m, c, k = cv2.split(cmyk)
-    # Create a channel dictionaries for lookups by a channel name index
-    channels = {"c": c, "m": m, "y": y, "k": k}
-
-    return channels[channel]
+    return (np.dstack((c, m, y, k)) * 255).astype(np.uint8)
 
 
 def _rgb2gray(rgb_img):
@@ -786,9 +898,77 @@ def _rgb2gray(rgb_img):
     numpy.ndarray
         grayscale image
     """
-    gray = cv2.cvtColor(rgb_img, cv2.COLOR_BGR2GRAY)
+    gray = _convert_colorspace(rgb_img=rgb_img, conversion="gray")
+
+    # Cached images are read-only
+    return gray if gray.flags.writeable else gray.copy()
+
+
+# Colorspace conversions of RGB (BGR) images
+COLORSPACES = {
+    "lab": lambda rgb_img: cv2.cvtColor(rgb_img, cv2.COLOR_BGR2LAB),
+    "hsv": lambda rgb_img: cv2.cvtColor(rgb_img, cv2.COLOR_BGR2HSV),
+    "cmyk": _bgr2cmyk,
+    "gray": lambda rgb_img: cv2.cvtColor(rgb_img, cv2.COLOR_BGR2GRAY)
+}
+# Colorspace conversions of recently used RGB images, least recently used first, keyed by the source image buffer
+_COLORSPACE_CACHE = OrderedDict()
+
+
+def _convert_colorspace(rgb_img, conversion):
+    """Convert an RGB image to another colorspace, reusing recent conversions of the same image.
 
-    return gray
+    Conversions are cached when params.colorspace_cache is greater than zero, for up to that many RGB images (all
+    conversions of an image are kept together). Cached images are read-only and are matched to the source image object
+    and its buffer, so images modified in place must be removed from the cache with _clear_colorspace_cache.
+
+    Parameters
+    ----------
+    rgb_img : numpy.ndarray
+        RGB image data
+    conversion : str
+        colorspace, one of the COLORSPACES keys
+
+    Returns
+    -------
+    numpy.ndarray
+        converted image data
+    """
+    convert = COLORSPACES[conversion]
+    if params.colorspace_cache <= 0 or not isinstance(rgb_img, np.ndarray):
+        return convert(rgb_img)
+
+    key = (rgb_img.__array_interface__["data"][0], rgb_img.shape, rgb_img.strides, rgb_img.dtype.str)
+    cached = _COLORSPACE_CACHE.get(key)
+    # A different image can reuse the buffer of a deleted image, so the source image object must also match
+    if cached is None or cached[0]() is not rgb_img:
+        # Conversions are removed from the cache when the source image is deleted
+        cached = (weakref.ref(rgb_img, lambda _: _COLORSPACE_CACHE.pop(key, None)), {})
+        _COLORSPACE_CACHE[key] = cached
+    _COLORSPACE_CACHE.move_to_end(key)
+    if conversion not in cached[1]:
+        converted = convert(rgb_img)
+        converted.flags.writeable = False
+        cached[1][conversion] = converted
+    while len(_COLORSPACE_CACHE) > params.colorspace_cache:
+        _COLORSPACE_CACHE.popitem(last=False)
+    return cached[1][conversion]
+
+
+def _clear_colorspace_cache(rgb_img=None):
+    """Remove the cached colorspace conversions of an image, or of all images.
+
+    Parameters
+    ----------
+    rgb_img : numpy.ndarray or None
+        RGB image data, or None to clear the whole cache
+    """
+    if rgb_img is None:
+        _COLORSPACE_CACHE.clear()
+        return
+    for key, (source, _) in list(_COLORSPACE_CACHE.items()):
+        if source() is rgb_img:
+            del _COLORSPACE_CACHE[key]
 
 
 def _logical_operation(bin_img1, bin_img2, operation):
@@ -925,3 +1105,60 @@ def _rect_replace(img, sub_img, roi):
     full_img = np.copy(img)
     full_img[ystart:yend, xstart:xend] = sub_img
     return full_img
+
+
+# numpy.pad modes equivalent to the scipy.ndimage border modes
+PAD_MODES = {"reflect": "symmetric", "grid-mirror": "symmetric", "mirror": "reflect", "nearest": "edge",
+             "wrap": "wrap", "grid-wrap": "wrap", "constant": "constant", "grid-constant": "constant"}
+
+
+def _pad_borders(img, ksize, borders):
+    """Pad an image for a ksize x ksize filter the way scipy.ndimage filters extend the image borders.
+
+    Each window of the padded image, img[i:i + ksize, j:j + ksize], is the neighborhood a scipy.ndimage filter
+    with size=ksize uses for pixel (i, j) of the image.
+
+    Parameters
+    ----------
+    img : numpy.ndarray
+        Grayscale image
+    ksize : int
+        Kernel size
+    borders : str
+        How the array borders are handled, either 'reflect', 'constant', 'nearest', 'mirror', or 'wrap'
+
+    Returns
+    -------
+    numpy.ndarray
+        Padded image
+    """
+    if borders not in PAD_MODES:
+        fatal_error(f"Border mode {borders} is not supported, must be one of {', '.join(PAD_MODES)}")
+    # Windows are centered on the pixel, an even kernel has one more pixel before the center than after it
+    before = ksize // 2
+    after = ksize - 1 - before
+    return np.pad(img, ((before, after), (before, after)), mode=PAD_MODES[borders])
+
+
+def _box_sum(img, height, width):
+    """Sum the values of each height x width window of an image using an integral image.
+
+    Parameters
+    ----------
+    img : numpy.ndarray
+        Image (integer images are summed exactly)
+    height : int
+        Window height
+    width : int
+        Window width
+
+    Returns
+    -------
+    numpy.ndarray
+        Window sums, with one value per window position, i.e. the shape of the image minus the window size plus one
+    """
+    dtype = np.int64 if img.dtype.kind in "biu" else np.float64
+    integral = np.zeros((img.shape[0] + 1, img.shape[1] + 1), dtype=dtype)
+    np.cumsum(np.cumsum(img, axis=0, dtype=dtype), axis=1, out=integral[1:, 1:])
+    return (integral[height:, width:] - integral[:-height, width:] -
+            integral[height:, :-width] + integral[:-height, :-width])
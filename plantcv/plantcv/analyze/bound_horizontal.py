@@ -2,7 +2,7 @@
 import os
 import cv2
 import numpy as np
-from plantcv.plantcv._debug import _debug
+from plantcv.plantcv._debug import _debug, _build_visuals
 from plantcv.plantcv._helpers import _iterate_analysis, _grayscale_to_rgb, _scale_size
 from plantcv.plantcv import params
 from plantcv.plantcv import outputs
@@ -112,16 +112,16 @@ def bound_horizontal(img, labeled_mask, line_position, n_labels=1, label=None):
     if label is None:
         label = params.sample_label
 
-    img = _iterate_analysis(img=img, labeled_mask=labeled_mask, n_labels=n_labels,
-                            label=label, function=_analyze_bound_horizontal,
-                            **{"line_position": line_position})
-    img = _boundary_img_annotation(img, labeled_mask, line_position, 0)
+    _ = _iterate_analysis(img=img, labeled_mask=labeled_mask, n_labels=n_labels,
+                          label=label, function=_analyze_bound_horizontal, crop=True, offset=True,
+                          **{"line_position": line_position, "height": np.shape(labeled_mask)[0]})
+    img = _boundary_img_annotation(_grayscale_to_rgb(img), labeled_mask, line_position, 0) if _build_visuals() else None
     # Debugging
     _debug(visual=img, filename=os.path.join(params.debug_outdir, str(params.device) + '_boundary_on_img.png'))
     return img
 
 
-def _analyze_bound_horizontal(img, mask, line_position, label):
+def _analyze_bound_horizontal(img, mask, line_position, label, height, offset=(0, 0)):
     """
     User-input boundary line analysis for individual objects.
 
@@ -130,11 +130,15 @@ def _analyze_bound_horizontal(img, mask, line_position, label):
     img : numpy.ndarray
         RGB or grayscale image data for plotting.
     mask : numpy.ndarray
-        Binary image data.
+        Binary image data, cropped to the object.
     line_position : int
         Position of boundary line in pixels from top to bottom.
     label : str
         Label of object.
+    height : int
+        Height of the uncropped mask.
+    offset : tuple, optional
+        Row and column of the cropped mask in the uncropped mask (default = (0, 0)).
 
     Returns
     -------
@@ -148,18 +152,19 @@ def _analyze_bound_horizontal(img, mask, line_position, label):
     percent_bound_area_above = 0
     below_bound_area = 0
     percent_bound_area_below = 0
-    ori_img = np.copy(img)
+    ori_img = img
     # Skip empty masks
     if np.count_nonzero(mask) != 0 and line_position >= 0:
-        ori_img = _grayscale_to_rgb(ori_img)
+        ori_img = _grayscale_to_rgb(img)
         # make copy of mask for above and below threshold
         top_mask = np.copy(mask).astype(bool)
         bottom_mask = np.copy(mask).astype(bool)
+        # The area below the boundary starts one row above the line, or at the last row of the uncropped mask
+        # when the line is at the top
+        bottom_start = line_position - 1 if line_position > 0 else height - 1
         # fill in area on opposite side of threshold with 0s
-        top_mask[line_position:np.shape(top_mask)[0] + 1] = np.zeros(
-            np.shape(top_mask[line_position:np.shape(top_mask)[0] + 1]))
-        bottom_mask[0:line_position - 1] = np.zeros(
-            np.shape(top_mask[0:line_position - 1]))
+        top_mask[max(line_position - offset[0], 0):] = False
+        bottom_mask[:max(bottom_start - offset[0], 0)] = False
         tot_area = np.sum(mask.astype(bool))
         # calculate values above and below boundary
         above_bound_area, height_above_bound, percent_bound_area_above = _get_boundary_values(top_mask, tot_area, 0)
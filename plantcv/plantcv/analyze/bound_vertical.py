@@ -1,7 +1,7 @@
 """Analyze the horizontal distribution of the plant relative to a vertical reference line."""
 import os
 import numpy as np
-from plantcv.plantcv._debug import _debug
+from plantcv.plantcv._debug import _debug, _build_visuals
 from plantcv.plantcv._helpers import _iterate_analysis, _grayscale_to_rgb, _scale_size
 from plantcv.plantcv.analyze.bound_horizontal import _get_boundary_values, _boundary_img_annotation
 from plantcv.plantcv import params
@@ -34,16 +34,16 @@ def bound_vertical(img, labeled_mask, line_position, n_labels=1, label=None):
     if label is None:
         label = params.sample_label
 
-    img = _iterate_analysis(img=img, labeled_mask=labeled_mask, n_labels=n_labels,
-                            label=label, function=_analyze_bound_vertical,
-                            **{"line_position": line_position})
-    img = _boundary_img_annotation(img, labeled_mask, line_position, 1)
+    _ = _iterate_analysis(img=img, labeled_mask=labeled_mask, n_labels=n_labels,
+                          label=label, function=_analyze_bound_vertical, crop=True, offset=True,
+                          **{"line_position": line_position, "width": np.shape(labeled_mask)[1]})
+    img = _boundary_img_annotation(_grayscale_to_rgb(img), labeled_mask, line_position, 1) if _build_visuals() else None
     # Debugging
     _debug(visual=img, filename=os.path.join(params.debug_outdir, str(params.device) + '_boundary_on_img.png'))
     return img
 
 
-def _analyze_bound_vertical(img, mask, line_position, label):
+def _analyze_bound_vertical(img, mask, line_position, label, width, offset=(0, 0)):
     """
     Analyze the mask relative to a user-input vertical boundary line.
 
@@ -52,11 +52,15 @@ def _analyze_bound_vertical(img, mask, line_position, label):
     img : numpy.ndarray
         RGB or grayscale image data for plotting.
     mask : numpy.ndarray
-        Binary mask made from selected contours.
+        Binary mask made from selected contours, cropped to the object.
     line_position : int
         Position of boundary line in pixels from left to right (a value of 0 draws the line through the left of the image).
     label : str
         Optional label parameter, modifies the variable name of observations recorded.
+    width : int
+        Width of the uncropped mask.
+    offset : tuple, optional
+        Row and column of the cropped mask in the uncropped mask (default = (0, 0)).
 
     Returns
     -------
@@ -71,17 +75,18 @@ def _analyze_bound_vertical(img, mask, line_position, label):
     right_bound_area = 0
     percent_bound_area_right = 0
 
-    ori_img = np.copy(img)
+    ori_img = img
     # Skip empty masks
     if np.count_nonzero(mask) != 0 and line_position >= 0:
         # Draw line horizontal line through bottom of image, that is adjusted to user input height
         ori_img = _grayscale_to_rgb(img)
         left_mask = np.copy(mask).astype(bool)
         right_mask = np.copy(mask).astype(bool)
-        left_mask[:, line_position:np.shape(left_mask)[1] + 1] = np.zeros(
-            np.shape(left_mask[:, line_position:np.shape(left_mask)[1] + 1]))
-        right_mask[:, 0:line_position - 1] = np.zeros(
-            np.shape(right_mask[:, 0:line_position - 1]))
+        # The area right of the boundary starts one column left of the line, or at the last column of the uncropped
+        # mask when the line is at the left
+        right_start = line_position - 1 if line_position > 0 else width - 1
+        left_mask[:, max(line_position - offset[1], 0):] = False
+        right_mask[:, :max(right_start - offset[1], 0)] = False
         tot_area = np.sum(mask.astype(bool))
         left_bound_area, width_left_bound, percent_bound_area_left = _get_boundary_values(left_mask, tot_area, 1)
         right_bound_area, width_right_bound, percent_bound_area_right = _get_boundary_values(right_mask, tot_area, 1)
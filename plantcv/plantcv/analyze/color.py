@@ -2,13 +2,18 @@
 import os
 import cv2
 import numpy as np
-from scipy import stats
 from plantcv.plantcv import fatal_error
 from plantcv.plantcv import params
-from plantcv.plantcv._debug import _debug
+from plantcv.plantcv._debug import _debug, _build_visuals
 from plantcv.plantcv import outputs
-from plantcv.plantcv.visualize import histogram
-from plantcv.plantcv._helpers import _iterate_analysis
+from plantcv.plantcv._helpers import _label_samples
+
+
+# Histogram channels of each colorspace
+HIST_TYPES = {"all": ("b", "g", "r", "l", "m", "y", "h", "s", "v"),
+              "rgb": ("b", "g", "r"),
+              "lab": ("l", "m", "y"),
+              "hsv": ("h", "s", "v")}
 
 
 def color(rgb_img, labeled_mask, n_labels=1, colorspaces="hsv", label=None):
@@ -35,109 +40,69 @@ def color(rgb_img, labeled_mask, n_labels=1, colorspaces="hsv", label=None):
     if label is None:
         label = params.sample_label
 
-    _ = _iterate_analysis(img=rgb_img, labeled_mask=labeled_mask, n_labels=n_labels, label=label, function=_analyze_color,
-                          **{"colorspaces": colorspaces})
-    hue_chart = outputs.plot_dists(variable="hue_frequencies")
+    if colorspaces.lower() not in HIST_TYPES:
+        fatal_error(f"Colorspace '{colorspaces}' is not supported, must be be one of the following: "
+                    f"{', '.join(map(str, HIST_TYPES.keys()))}")
+
+    mask, samples = _label_samples(labeled_mask=labeled_mask, n_labels=n_labels, label=label)
+    _analyze_color(img=rgb_img, labeled_mask=mask, n_labels=n_labels, samples=samples, colorspaces=colorspaces)
+    hue_chart = None
+    if _build_visuals():
+        hue_chart = outputs.plot_dists(variable="hue_frequencies")
     _debug(visual=hue_chart, filename=os.path.join(params.debug_outdir, str(params.device) + '_hue_hist.png'))
     return hue_chart
 
 
-def _analyze_color(img, mask, colorspaces="hsv", label=None):
-    """Analyze the color properties of an image object
+def _analyze_color(img, labeled_mask, n_labels, samples, colorspaces="hsv"):
+    """Analyze the color properties of all objects of a labeled mask at once
+
+    The image is converted to each colorspace once and the histograms of all objects are counted together, binned by
+    label and channel value.
+
     Inputs:
     img              = RGB image data
-    mask             = Binary mask made from selected contours
+    labeled_mask     = Labeled mask of objects
+    n_labels         = Total number expected individual objects
+    samples          = Sample names, one per label
     colorspaces      = 'all', 'rgb', 'lab', or 'hsv'
-    label            = optional label parameter, modifies the variable name of observations recorded
 
-    Returns:
-    analysis_image   = histogram output
-
-    :param rgb_img: numpy.ndarray
-    :param mask: numpy.ndarray
+    :param img: numpy.ndarray
+    :param labeled_mask: numpy.ndarray
+    :param n_labels: int
+    :param samples: list
     :param colorspaces: str
-    :param label: str
-    :return analysis_images: list
     """
-    # Initialize output data
-    # Histogram plot types
-    hist_types = {"all": ("b", "g", "r", "l", "m", "y", "h", "s", "v"),
-                  "rgb": ("b", "g", "r"),
-                  "lab": ("l", "m", "y"),
-                  "hsv": ("h", "s", "v")}
-
-    if colorspaces.lower() not in hist_types:
-        fatal_error(f"Colorspace '{colorspaces}' is not supported, must be be one of the following: "
-                    f"{', '.join(map(str, hist_types.keys()))}")
+    # Pixels of the expected objects, label 0 is the background
+    in_mask = (labeled_mask > 0) & (labeled_mask <= n_labels)
+    labels = labeled_mask[in_mask].astype(np.int64)
+    # Number of pixels in each object
+    pixels = np.bincount(labels, minlength=n_labels + 1)[1:]
 
     # Empty histograms
-    histograms = {
-        "b": {"label": "blue", "graph_color": "blue",
-              "hist": [0] * 256},
-        "g": {"label": "green", "graph_color": "forestgreen",
-              "hist": [0] * 256},
-        "r": {"label": "red", "graph_color": "red",
-              "hist": [0] * 256},
-        "l": {"label": "lightness", "graph_color": "dimgray",
-              "hist": [0] * 256},
-        "m": {"label": "green-magenta", "graph_color": "magenta",
-              "hist": [0] * 256},
-        "y": {"label": "blue-yellow", "graph_color": "yellow",
-              "hist": [0] * 256},
-        "h": {"label": "hue", "graph_color": "blueviolet",
-              "hist": [0] * 256},
-        "s": {"label": "saturation", "graph_color": "cyan",
-              "hist": [0] * 256},
-        "v": {"label": "value", "graph_color": "orange",
-              "hist": [0] * 256}
-    }
-
-    # Undefined defaults
-    hue_median = np.nan
-    hue_circular_mean = np.nan
-    hue_circular_std = np.nan
+    counts = {channel: np.zeros((n_labels, 256), dtype=np.int64) for channel in HIST_TYPES["all"]}
 
     # Skip empty masks
-    if np.count_nonzero(mask) != 0:
-        # Save user debug setting
-        debug = params.debug
+    if len(labels) > 0:
         if len(np.shape(img)) < 3:
             fatal_error("rgb_img must be an RGB image")
-
-        # Mask the input image
-        masked = cv2.bitwise_and(img, img, mask=mask)
-        # Extract the blue, green, and red channels
-        b, g, r = cv2.split(masked)
-        # Convert the BGR image to LAB
-        lab = cv2.cvtColor(masked, cv2.COLOR_BGR2LAB)
-        # Extract the lightness, green-magenta, and blue-yellow channels
-        l, m, y = cv2.split(lab)
-        # Convert the BGR image to HSV
-        hsv = cv2.cvtColor(masked, cv2.COLOR_BGR2HSV)
-        # Extract the hue, saturation, and value channels
-        h, s, v = cv2.split(hsv)
-
-        # Color channel dictionary
-        channels = {"b": b, "g": g, "r": r, "l": l, "m": m, "y": y, "h": h, "s": s, "v": v}
-
-        # Calculate histogram
-        params.debug = None
-        for channel in hist_types["all"]:
-            histograms[channel]["hist"] = histogram(channels[channel], mask, 256, 0, 255,
-                                                    hist_data=True)[1]['proportion of pixels (%)'].tolist()
-
-        # Restore user debug setting
-        params.debug = debug
-
-        # Hue values of zero are red but are also the value for pixels where hue is undefined. The hue value of a pixel will
-        # be undef. when the color values are saturated. Therefore, hue values of 0 are excluded from the calculations below
-        # Calculate the median hue value (median is rescaled from the encoded 0-179 range to the 0-359 degree range)
-        hue_median = np.median(h[np.where(h > 0)]) * 2
-
-        # Calculate the circular mean and standard deviation of the encoded hue values
-        # The mean and standard-deviation are rescaled from the encoded 0-179 range to the 0-359 degree range
-        hue_circular_mean = stats.circmean(h[np.where(h > 0)], high=179, low=0) * 2
-        hue_circular_std = stats.circstd(h[np.where(h > 0)], high=179, low=0) * 2
+        # Convert the object pixels (as a one pixel wide image) to LAB and HSV
+        bgr = img[in_mask].reshape(-1, 1, 3)
+        lab = cv2.cvtColor(bgr, cv2.COLOR_BGR2LAB)
+        hsv = cv2.cvtColor(bgr, cv2.COLOR_BGR2HSV)
+        channels = np.concatenate([bgr, lab, hsv], axis=2).reshape(-1, 9)
+        # Count the pixels of each (label, channel value) pair
+        for i, channel in enumerate(HIST_TYPES["all"]):
+            counts[channel] = np.bincount(labels * 256 + channels[:, i],
+                                          minlength=(n_labels + 1) * 256).reshape(n_labels + 1, 256)[1:]
+
+    # Histograms as the proportion of pixels (%) of each object
+    with np.errstate(divide="ignore", invalid="ignore"):
+        histograms = {channel: np.where(pixels[:, None] > 0, hist / pixels[:, None] * 100, 0)
+                      for channel, hist in counts.items()}
+
+    # Hue values of zero are red but are also the value for pixels where hue is undefined. The hue value of a pixel will
+    # be undef. when the color values are saturated. Therefore, hue values of 0 are excluded from the calculations below
+    hue_median, hue_circular_mean, hue_circular_std = _hue_stats(hue_counts=counts["h"][:, 1:180])
 
     # Store into global measurements
     # RGB signal values are in an unsigned 8-bit scale of 0-255
@@ -150,48 +115,86 @@ def _analyze_color(img, mask, colorspaces="hsv", label=None):
     diverging_values = list(range(-128, 128))
 
     if colorspaces.upper() in ('RGB', 'ALL'):
-        outputs.add_observation(sample=label, variable='blue_frequencies', trait='blue frequencies',
-                                method='plantcv.plantcv.analyze.color', scale='frequency', datatype=list,
-                                value=histograms["b"]["hist"], label=rgb_values)
-        outputs.add_observation(sample=label, variable='green_frequencies', trait='green frequencies',
-                                method='plantcv.plantcv.analyze.color', scale='frequency', datatype=list,
-                                value=histograms["g"]["hist"], label=rgb_values)
-        outputs.add_observation(sample=label, variable='red_frequencies', trait='red frequencies',
-                                method='plantcv.plantcv.analyze.color', scale='frequency', datatype=list,
-                                value=histograms["r"]["hist"], label=rgb_values)
+        outputs.add_observations(samples=samples, variable='blue_frequencies', trait='blue frequencies',
+                                 method='plantcv.plantcv.analyze.color', scale='frequency', datatype=list,
+                                 values=histograms["b"], label=rgb_values)
+        outputs.add_observations(samples=samples, variable='green_frequencies', trait='green frequencies',
+                                 method='plantcv.plantcv.analyze.color', scale='frequency', datatype=list,
+                                 values=histograms["g"], label=rgb_values)
+        outputs.add_observations(samples=samples, variable='red_frequencies', trait='red frequencies',
+                                 method='plantcv.plantcv.analyze.color', scale='frequency', datatype=list,
+                                 values=histograms["r"], label=rgb_values)
 
     if colorspaces.upper() in ('LAB', 'ALL'):
-        outputs.add_observation(sample=label, variable='lightness_frequencies', trait='lightness frequencies',
-                                method='plantcv.plantcv.analyze.color', scale='frequency', datatype=list,
-                                value=histograms["l"]["hist"], label=percent_values)
-        outputs.add_observation(sample=label, variable='green-magenta_frequencies',
-                                trait='green-magenta frequencies',
-                                method='plantcv.plantcv.analyze.color', scale='frequency', datatype=list,
-                                value=histograms["m"]["hist"], label=diverging_values)
-        outputs.add_observation(sample=label, variable='blue-yellow_frequencies', trait='blue-yellow frequencies',
-                                method='plantcv.plantcv.analyze.color', scale='frequency', datatype=list,
-                                value=histograms["y"]["hist"], label=diverging_values)
+        outputs.add_observations(samples=samples, variable='lightness_frequencies', trait='lightness frequencies',
+                                 method='plantcv.plantcv.analyze.color', scale='frequency', datatype=list,
+                                 values=histograms["l"], label=percent_values)
+        outputs.add_observations(samples=samples, variable='green-magenta_frequencies',
+                                 trait='green-magenta frequencies',
+                                 method='plantcv.plantcv.analyze.color', scale='frequency', datatype=list,
+                                 values=histograms["m"], label=diverging_values)
+        outputs.add_observations(samples=samples, variable='blue-yellow_frequencies', trait='blue-yellow frequencies',
+                                 method='plantcv.plantcv.analyze.color', scale='frequency', datatype=list,
+                                 values=histograms["y"], label=diverging_values)
 
     if colorspaces.upper() in ('HSV', 'ALL'):
-        outputs.add_observation(sample=label, variable='hue_frequencies', trait='hue frequencies',
-                                method='plantcv.plantcv.analyze.color', scale='frequency', datatype=list,
-                                value=histograms["h"]["hist"][0:180], label=hue_values)
-        outputs.add_observation(sample=label, variable='saturation_frequencies', trait='saturation frequencies',
-                                method='plantcv.plantcv.analyze.color', scale='frequency', datatype=list,
-                                value=histograms["s"]["hist"], label=percent_values)
-        outputs.add_observation(sample=label, variable='value_frequencies', trait='value frequencies',
-                                method='plantcv.plantcv.analyze.color', scale='frequency', datatype=list,
-                                value=histograms["v"]["hist"], label=percent_values)
+        outputs.add_observations(samples=samples, variable='hue_frequencies', trait='hue frequencies',
+                                 method='plantcv.plantcv.analyze.color', scale='frequency', datatype=list,
+                                 values=histograms["h"][:, 0:180], label=hue_values)
+        outputs.add_observations(samples=samples, variable='saturation_frequencies', trait='saturation frequencies',
+                                 method='plantcv.plantcv.analyze.color', scale='frequency', datatype=list,
+                                 values=histograms["s"], label=percent_values)
+        outputs.add_observations(samples=samples, variable='value_frequencies', trait='value frequencies',
+                                 method='plantcv.plantcv.analyze.color', scale='frequency', datatype=list,
+                                 values=histograms["v"], label=percent_values)
 
     # Always save hue stats
-    outputs.add_observation(sample=label, variable='hue_circular_mean', trait='hue circular mean',
-                            method='plantcv.plantcv.analyze.color', scale='degrees', datatype=float,
-                            value=hue_circular_mean, label='degrees')
-    outputs.add_observation(sample=label, variable='hue_circular_std', trait='hue circular standard deviation',
-                            method='plantcv.plantcv.analyze.color', scale='degrees', datatype=float,
-                            value=hue_circular_std, label='degrees')
-    outputs.add_observation(sample=label, variable='hue_median', trait='hue median',
-                            method='plantcv.plantcv.analyze.color', scale='degrees', datatype=float,
-                            value=hue_median, label='degrees')
-
-    return img
+    outputs.add_observations(samples=samples, variable='hue_circular_mean', trait='hue circular mean',
+                             method='plantcv.plantcv.analyze.color', scale='degrees', datatype=float,
+                             values=hue_circular_mean, label='degrees')
+    outputs.add_observations(samples=samples, variable='hue_circular_std', trait='hue circular standard deviation',
+                             method='plantcv.plantcv.analyze.color', scale='degrees', datatype=float,
+                             values=hue_circular_std, label='degrees')
+    outputs.add_observations(samples=samples, variable='hue_median', trait='hue median',
+                             method='plantcv.plantcv.analyze.color', scale='degrees', datatype=float,
+                             values=hue_median, label='degrees')
+
+
+def _hue_stats(hue_counts):
+    """Calculate hue statistics of each object from its hue histogram
+
+    The statistics are rescaled from the encoded 0-179 range to the 0-359 degree range, objects without hue values are
+    NaN.
+
+    Inputs:
+    hue_counts        = Number of pixels of each object (rows) with encoded hue values 1-179 (columns)
+
+    Returns:
+    hue_median        = Median hue of each object
+    hue_circular_mean = Circular mean hue of each object
+    hue_circular_std  = Circular standard deviation of the hue of each object
+
+    :param hue_counts: numpy.ndarray
+    :return hue_median: numpy.ndarray
+    :return hue_circular_mean: numpy.ndarray
+    :return hue_circular_std: numpy.ndarray
+    """
+    hue_values = np.arange(1, 180)
+    n_hues = hue_counts.sum(axis=1)
+    valid = n_hues > 0
+    # The median is the mean of the two middle values of the sorted hues (the same value for an odd count)
+    cumulative = np.cumsum(hue_counts, axis=1)
+    lower = hue_values[np.argmax(cumulative > ((n_hues - 1) // 2)[:, None], axis=1)]
+    upper = hue_values[np.argmax(cumulative > (n_hues // 2)[:, None], axis=1)]
+    hue_median = np.where(valid, (lower + upper) / 2 * 2, np.nan)
+    # Circular statistics of the encoded hues as angles (same as scipy.stats.circmean and circstd, high=179, low=0)
+    angles = hue_values * 2 * np.pi / 179
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sin_mean = hue_counts @ np.sin(angles) / n_hues
+        cos_mean = hue_counts @ np.cos(angles) / n_hues
+    circular_mean = np.arctan2(sin_mean, cos_mean) % (2 * np.pi)
+    hue_circular_mean = np.where(valid, circular_mean * 179 / (2 * np.pi) * 2, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        circular_std = np.sqrt(-2 * np.log(np.minimum(1, np.hypot(sin_mean, cos_mean))))
+    hue_circular_std = np.where(valid, circular_std * 179 / (2 * np.pi) * 2, np.nan)
+    return hue_median, hue_circular_mean, hue_circular_std
@@ -2,7 +2,7 @@
 import os
 import numpy as np
 from plantcv.plantcv import auto_crop, outputs, params
-from plantcv.plantcv._debug import _debug
+from plantcv.plantcv._debug import _debug, _build_visuals
 from plantcv.plantcv._helpers import _iterate_analysis
 
 
@@ -47,13 +47,16 @@ def distribution(labeled_mask, n_labels=1, direction="down", bin_size=100, hist_
 
     # Iterate over each labeled object and analyze the distribution
     _ = _iterate_analysis(img=img, labeled_mask=labeled_mask, n_labels=n_labels, label=label,
-                          function=_analyze_distribution,
-                          **{"bin_size": bin_size, "direction": axis, "hist_range": hist_range})
+                          function=_analyze_distribution, crop=True, offset=True,
+                          **{"bin_size": bin_size, "direction": axis, "hist_range": hist_range,
+                             "height": np.shape(labeled_mask)[0]})
 
     # Plot distributions
-    dist_chart = outputs.plot_dists(variable=f"{axis}_frequencies")
-    # Add plot labels
-    dist_chart = dist_chart.properties(title=f"{axis}-axis distribution")
+    dist_chart = None
+    if _build_visuals():
+        dist_chart = outputs.plot_dists(variable=f"{axis}_frequencies")
+        # Add plot labels
+        dist_chart = dist_chart.properties(title=f"{axis}-axis distribution")
 
     # Display or save the debug plot
     _debug(visual=dist_chart, filename=os.path.join(params.debug_outdir, f"{params.device}_{axis}_distribution_hist.png"))
@@ -61,12 +64,15 @@ def distribution(labeled_mask, n_labels=1, direction="down", bin_size=100, hist_
     return dist_chart
 
 
-def _analyze_distribution(img, mask, direction="y", bin_size=100, hist_range="absolute", label=None):
+def _analyze_distribution(img, mask, direction="y", bin_size=100, hist_range="absolute", label=None, height=None,
+                          offset=(0, 0)):
     """Analyze the color properties of an image object
     Inputs:
-    mask             = Binary mask made from selected contours
+    mask             = Binary mask made from selected contours, cropped to the object
     bin_size         = Size in pixels of the histogram bins
     label            = optional label parameter, modifies the variable name of observations recorded
+    height           = height of the uncropped mask, by default the height of mask
+    offset           = row and column of the cropped mask in the uncropped mask
 
     Returns:
     distribution_image   = histogram output
@@ -75,6 +81,8 @@ def _analyze_distribution(img, mask, direction="y", bin_size=100, hist_range="ab
     :param mask: numpy.ndarray
     :param bin_size: int
     :param label: str
+    :param height: int
+    :param offset: tuple
     :return distribution_images: list
     """
     # Image not needed
@@ -84,13 +92,16 @@ def _analyze_distribution(img, mask, direction="y", bin_size=100, hist_range="ab
     debug = params.debug
     params.debug = None
 
+    # The histogram range is the height of the uncropped mask
+    if height is None:
+        height = mask.shape[0]
     # Autocrop the mask if hist_range is "relative" to set the scale to the object size
     if hist_range == "relative" and np.count_nonzero(mask) != 0:
         mask = auto_crop(img=mask, mask=mask, padding_x=0, padding_y=0, color="black")
+        height = mask.shape[0]
+        offset = (0, 0)
 
     # Initialize output data
-    # find the height, in pixels, for this image
-    height = mask.shape[0]
     num_bins = height // bin_size
 
     # Initialize output measurements
@@ -104,9 +115,9 @@ def _analyze_distribution(img, mask, direction="y", bin_size=100, hist_range="ab
     # Skip empty masks
     if np.count_nonzero(mask) != 0:
         # Calculate histogram
-        for i in range(0, height, bin_size):
+        for i in range(offset[0] - offset[0] % bin_size, offset[0] + mask.shape[0], bin_size):
             # Extract a slice from the mask the width of bin_size at each step
-            mask_slice = mask[i:min(i+bin_size, height), :]
+            mask_slice = mask[max(i - offset[0], 0):i + bin_size - offset[0], :]
             count = np.count_nonzero(mask_slice)  # Count white pixels
             bin_index = min(i // bin_size, num_bins - 1)  # Ensure index within range
             hist[bin_index] += count  # Add count to the bin
@@ -1,7 +1,7 @@
 """Analyzes the grayscale values of objects in an image."""
 import os
 import numpy as np
-from plantcv.plantcv._debug import _debug
+from plantcv.plantcv._debug import _debug, _build_visuals
 from plantcv.plantcv import params, outputs
 from plantcv.plantcv.visualize import histogram
 from plantcv.plantcv._helpers import _iterate_analysis
@@ -33,8 +33,10 @@ def grayscale(gray_img, labeled_mask, n_labels=1, bins=100, label=None):
         label = params.sample_label
 
     _ = _iterate_analysis(img=gray_img, labeled_mask=labeled_mask, n_labels=n_labels, label=label, function=_analyze_grayscale,
-                          **{"bins": bins})
-    gray_chart = outputs.plot_dists(variable="gray_frequencies")
+                          crop=True, **{"bins": bins})
+    gray_chart = None
+    if _build_visuals():
+        gray_chart = outputs.plot_dists(variable="gray_frequencies")
     _debug(visual=gray_chart, filename=os.path.join(params.debug_outdir, str(params.device) + '_hue_hist.png'))
     return gray_chart
 
@@ -1,12 +1,13 @@
 """Fluorescence Analysis (NPQ parameter)."""
 import os
+import warnings
 import numpy as np
 import pandas as pd
-import xarray as xr
 from math import ceil, floor
 from plantcv.plantcv import params, outputs, fatal_error
-from plantcv.plantcv._debug import _debug
-from plantcv.plantcv.photosynthesis import reassign_frame_labels
+from plantcv.plantcv._debug import _debug, _build_visuals
+from plantcv.plantcv._helpers import _label_pixels
+from plantcv.plantcv.photosynthesis.reassign_frame_labels import _fm_frames
 
 
 def npq(ps_da_light, ps_da_dark, labeled_mask, n_labels=1, auto_fm=False, min_bin=0, max_bin="auto",
@@ -58,11 +59,6 @@ def npq(ps_da_light, ps_da_dark, labeled_mask, n_labels=1, auto_fm=False, min_bi
                     f"ps_da_light: {ps_da_light.name}, ps_da_dark: {ps_da_dark.name}"
                     )
 
-    # Make an zeroed array of the same shape as the input DataArray
-    npq_global = xr.zeros_like(ps_da_light, dtype=float)
-    # Drop the frame_label coordinate
-    npq_global = npq_global[:, :, 0, :].drop_vars('frame_label')
-
     # Make a copy of the labeled mask
     mask_copy = np.copy(labeled_mask)
 
@@ -70,32 +66,34 @@ def npq(ps_da_light, ps_da_dark, labeled_mask, n_labels=1, auto_fm=False, min_bi
     if len(np.unique(mask_copy)) == 2 and np.max(mask_copy) == 255:
         mask_copy = np.where(mask_copy == 255, 1, 0).astype(np.uint8)
 
-    # Iterate over the label values 1 to n_labels
+    # Pixels of each labeled region, grouped by label
+    pixels, bounds = _label_pixels(labeled_mask=mask_copy, n_labels=n_labels)
+    n_pixels = np.diff(bounds)
+
+    # If auto_fm is True, choose the best Fm and Fm' frames for each labeled region
+    if auto_fm:
+        fmp_frames = _fm_frames(ps_da=ps_da_light, pixels=pixels, bounds=bounds)
+        fm_frames = _fm_frames(ps_da=ps_da_dark, pixels=pixels, bounds=bounds)
+    else:
+        fmp_frames = np.full(n_labels, ps_da_light.frame_label.values.tolist().index('Fmp'))
+        fm_frames = np.full(n_labels, ps_da_dark.frame_label.values.tolist().index('Fm'))
+
+    # Fm of the labeled pixels in the first dark-adapted measurement and Fm' in each light-adapted measurement
+    fm = ps_da_dark.values[pixels[0], pixels[1], np.repeat(fm_frames, n_pixels),
+                           ps_da_dark.measurement.values.tolist().index('t0')].astype(float)
+    fmp = ps_da_light.values[pixels[0], pixels[1], np.repeat(fmp_frames, n_pixels)].astype(float)
+    # Calculate NPQ of all labeled pixels at once, 0 where it is undefined
+    npq_px = _calc_npq(fmp=fmp, fm=fm[:, None])
+    # Make a zeroed array of the NPQ values with the coordinates of the input DataArray (without frame_label)
+    npq_values = np.zeros(ps_da_light.shape[:2] + ps_da_light.shape[3:])
+    npq_values[pixels] = npq_px
+    npq_global = ps_da_light[:, :, 0, :].drop_vars('frame_label').copy(data=npq_values)
+
+    # Record observations for each labeled region
     for i in range(1, n_labels + 1):
-        # Create a binary submask for each label
-        submask = np.where(mask_copy == i, 255, 0).astype(np.uint8)
-
-        # If auto_fm is True, reassign frame labels to choose the best Fm or Fm' for each labeled region
-        if auto_fm:
-            ps_da_light = reassign_frame_labels(ps_da=ps_da_light, mask=submask)
-            ps_da_dark = reassign_frame_labels(ps_da=ps_da_dark, mask=submask)
-
-        # Mask the Fm frame with the label submask
-        fm = ps_da_dark.sel(measurement='t0', frame_label='Fm').where(submask > 0, other=0)
-        # Calculate NPQ for the labeled region
-        npq_lbl = ps_da_light.sel(frame_label='Fmp').groupby('measurement', squeeze=False).map(_calc_npq, fm=fm)
-
-        # Drop the frame_label coordinate - not needed with xarray v2022.11.0+
-        # npq_lbl = npq_lbl.drop_vars('frame_label')
-        # Fill NaN values with 0 so that we can add DataArrays together
-        npq_lbl = npq_lbl.fillna(0)
-        # Add the NPQ values for this label to the NPQ DataArray
-        npq_global = npq_global + npq_lbl
-
-        # Record observations for each labeled region
-        _add_observations(npq_da=npq_lbl, measurements=ps_da_light.measurement.values,
+        _add_observations(npq_px=npq_px[bounds[i - 1]:bounds[i]], measurements=ps_da_light.measurement.values,
                           measurement_labels=measurement_labels, label=f"{labels[i - 1]}_{i}",
-                          max_bin=max_bin, min_bin=min_bin)
+                          max_bin=max_bin, min_bin=min_bin, background=n_pixels[i - 1] < mask_copy.size)
 
     # Convert the labeled mask to a binary mask
     bin_mask = np.where(labeled_mask > 0, 255, 0)
@@ -111,7 +109,9 @@ def npq(ps_da_light, ps_da_dark, labeled_mask, n_labels=1, auto_fm=False, min_bi
     npq_global = npq_global.drop_vars(res)  # does not fail if res is []
 
     # Create a ridgeline plot of the NPQ values
-    npq_chart = _ridgeline_plots(measurements=ps_da_light.measurement.values, measurement_labels=measurement_labels)
+    npq_chart = None
+    if _build_visuals():
+        npq_chart = _ridgeline_plots(measurements=ps_da_light.measurement.values, measurement_labels=measurement_labels)
 
     # Plot/print dataarray
     _debug(visual=npq_global,
@@ -142,13 +142,11 @@ def _set_labels(label, n_labels):
 
 
 def _calc_npq(fmp, fm):
-    """NPQ = Fm/Fmp - 1."""
-    out_flt = np.ones(shape=fm.shape) * np.nan
-    fmp = np.squeeze(fmp)
+    """NPQ = Fm/Fmp - 1, where Fm > Fmp > 0 (otherwise 0)."""
+    out_flt = np.zeros(shape=np.broadcast(fm, fmp).shape)
     where_arr = np.logical_and(fm > 0, np.logical_and(fmp > 0, fm > fmp))
-    div = np.divide(fm, fmp, out=out_flt, where=where_arr.to_numpy())
-    sub = np.subtract(div, 1, out=out_flt.copy(), where=div.to_numpy() >= 1)
-    return sub
+    div = np.divide(fm, fmp, out=out_flt, where=where_arr)
+    return np.subtract(div, 1, out=div, where=where_arr)
 
 
 def _create_histogram(npq_img, mlabel, min_bin, max_bin):
@@ -192,18 +190,26 @@ def _create_histogram(npq_img, mlabel, min_bin, max_bin):
     return hist_df, npq_mode
 
 
-def _add_observations(npq_da, measurements, measurement_labels, label, max_bin, min_bin):
+def _add_observations(npq_px, measurements, measurement_labels, label, max_bin, min_bin, background):
     """Add observations for each labeled region."""
+    # The NPQ image of the region includes zeros outside the region, unless the region fills the image
+    npq_img = np.append(npq_px, 0) if background else npq_px
     # Auto calculate max_bin if set
     if isinstance(max_bin, str) and (max_bin.upper() == "AUTO"):
-        max_bin = ceil(np.nanmax(npq_da))  # Auto bins will detect the max value to use for calculating labels/bins
+        max_bin = ceil(np.nanmax(npq_img))  # Auto bins will detect the max value to use for calculating labels/bins
     if isinstance(min_bin, str) and (min_bin.upper() == "AUTO"):
-        min_bin = floor(np.nanmin(npq_da))  # Auto bins will detect the min value to use for calculating labels/bins
-
-    # compute observations to store in Outputs, per labeled region
-    npq_mean = npq_da.where(npq_da > 0).groupby('measurement').mean(['x', 'y']).values
-    npq_median = npq_da.where(npq_da > 0).groupby('measurement').median(['x', 'y']).values
-    npq_max = npq_da.where(npq_da > 0).groupby('measurement').max(['x', 'y']).values
+        min_bin = floor(np.nanmin(npq_img))  # Auto bins will detect the min value to use for calculating labels/bins
+
+    # compute observations to store in Outputs, per labeled region (one row per pixel, one column per measurement)
+    npq_pos = np.where(npq_px > 0, npq_px, np.nan)
+    # Statistics of a region without pixels are NaN
+    if len(npq_pos) == 0:
+        npq_pos = np.full((1, len(measurements)), np.nan)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        npq_mean = np.nanmean(npq_pos, axis=0)
+        npq_median = np.nanmedian(npq_pos, axis=0)
+        npq_max = np.nanmax(npq_pos, axis=0)
 
     # Create variables to label traits based on measurement label in data array
     for i, mlabel in enumerate(measurements):
@@ -223,7 +229,7 @@ def _add_observations(npq_da, measurements, measurement_labels, label, max_bin,
                                 method='plantcv.plantcv.analyze.npq', scale='none', datatype=float,
                                 value=float(npq_max[i]), label='none')
 
-        hist_df, npq_mode = _create_histogram(npq_da.isel({'measurement': i}).values, mlabel, min_bin, max_bin)
+        hist_df, npq_mode = _create_histogram(npq_px[:, i], mlabel, min_bin, max_bin)
 
         # mode value
         outputs.add_observation(sample=label, variable=f"npq_mode_{mlabel}", trait="mode npq value",
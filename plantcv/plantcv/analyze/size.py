@@ -2,11 +2,12 @@
 import os
 import cv2
 import numpy as np
+from scipy import ndimage
 from scipy.spatial.distance import euclidean
-from plantcv.plantcv._helpers import _iterate_analysis, _cv2_findcontours, _object_composition, _grayscale_to_rgb, _scale_size
-from plantcv.plantcv import outputs, within_frame
+from plantcv.plantcv._helpers import _label_samples, _cv2_findcontours, _object_composition, _grayscale_to_rgb, _scale_size
+from plantcv.plantcv import outputs, fatal_error
 from plantcv.plantcv import params
-from plantcv.plantcv._debug import _debug
+from plantcv.plantcv._debug import _debug, _build_visuals
 
 
 def size(img, labeled_mask, n_labels=1, label=None):
@@ -32,167 +33,188 @@ def size(img, labeled_mask, n_labels=1, label=None):
     if label is None:
         label = params.sample_label
 
-    img = _iterate_analysis(img=img, labeled_mask=labeled_mask, n_labels=n_labels, label=label, function=_analyze_size)
+    mask, samples = _label_samples(labeled_mask=labeled_mask, n_labels=n_labels, label=label)
+    img = _analyze_size(img=img, labeled_mask=mask, n_labels=n_labels, samples=samples)
     # Debugging
     _debug(visual=img, filename=os.path.join(params.debug_outdir, str(params.device) + '_shapes.png'))
     return img
 
 
-def _analyze_size(img, mask, label):
-    """Analyze the size of individual objects.
+def _analyze_size(img, labeled_mask, n_labels, samples):
+    """Analyze the size of all objects of a labeled mask.
+
+    Object contours and shapes are measured on the bounding box of each object, and the areas and centers of mass of
+    all objects are measured together.
 
     Inputs:
-    img   = RGB or grayscale image data for plotting
-    mask  = Binary image data
-    label = Label of object
+    img          = RGB or grayscale image data for plotting
+    labeled_mask = Labeled mask of objects
+    n_labels     = Total number expected individual objects
+    samples      = Sample names, one per label
 
     Returns:
     analysis_image = Diagnostic image showing measurements
 
-    :param mask: numpy.ndarray
-    :param label: int
+    :param img: numpy.ndarray
+    :param labeled_mask: numpy.ndarray
+    :param n_labels: int
+    :param samples: list
     :return analysis_image: numpy.ndarray
     """
-    params.device += 1
+    if len(np.shape(labeled_mask)) > 2:
+        fatal_error("Mask should be a binary image of 0 and nonzero values.")
+    height, width = np.shape(labeled_mask)
     # Initialize analysis output values
-    area = 0
-    hull_area = 0
-    solidity = 0
-    perimeter = 0
-    total_edge_length = 0
-    width = 0
-    height = 0
-    caliper_length = 0
-    longest_path = 0
-    cmx = 0
-    cmy = 0
-    hull_vertices = 0
-    ellipse_center = 0, 0
-    ellipse_major_axis = 0
-    ellipse_minor_axis = 0
-    ellipse_angle = 0
-    ellipse_eccentricity = 0
-    # Check is object is touching image boundaries (QC)
-    in_bounds = within_frame(mask=mask, label=label)
-
-    # Convert grayscale images to color
-    img = _grayscale_to_rgb(img)
-    # Plot image
-    plt_img = np.copy(img)
-
-    # Find contours
-    cnt, cnt_str = _cv2_findcontours(bin_img=mask)
-
-    # Consolidate contours
-    obj = _object_composition(contours=cnt, hierarchy=cnt_str)
-
-    # Analyze shape properties if the object is large enough
-    if len(obj) > 5:
-        # Convex Hull
-        hull = cv2.convexHull(obj)
-        # Number of convex hull vertices
-        hull_vertices = len(hull)
-        # Convex Hull area
-        hull_area = cv2.contourArea(hull)
-        # Moments
-        m = cv2.moments(mask, binaryImage=True)
-        # Area
-        area = m['m00']
-        # Solidity
-        solidity = area / hull_area if hull_area != 0 else 1
-        # Perimeter
-        perimeter = cv2.arcLength(obj, closed=True)
-        # Total edge legnth
-        for contour in cnt:
-            total_edge_length += cv2.arcLength(contour, True)
-        # Bounding rectangle
-        x, y, width, height = cv2.boundingRect(obj)
-        # Centroid/Center of Mass
-        cmx = m['m10'] / m['m00']
-        cmy = m['m01'] / m['m00']
-        # Bounding ellipse
-        ellipse_center, axes, ellipse_angle = cv2.fitEllipse(obj)
-        major_axis_idx = np.argmax(axes)
-        minor_axis_idx = 1 - major_axis_idx
-        ellipse_major_axis = float(axes[major_axis_idx])
-        ellipse_minor_axis = float(axes[minor_axis_idx])
-        ellipse_eccentricity = float(np.sqrt(1 - (axes[minor_axis_idx] / axes[major_axis_idx]) ** 2))
-        # Caliper length
-        caliper_length, caliper_transpose = _longest_axis(height=img.shape[0], width=img.shape[1],
-                                                          hull=hull, cmx=cmx, cmy=cmy)
-        longest_path = euclidean(tuple(caliper_transpose[caliper_length - 1]), tuple(caliper_transpose[0]))
-
-        # Add measurements onto the diagnostic image
-        # color blind friendly palette in BGR: (255, 0, 255) = magenta; (255, 0, 0) = blue
-        # Draw convex hull
-        cv2.drawContours(plt_img, [hull], -1, (255, 0, 255), params.line_thickness)
-        # Draw perimeter outline
-        cv2.drawContours(plt_img, cnt, -1, (255, 0, 0), params.line_thickness)
-        # Draw width
-        cv2.line(plt_img, (x, y), (x + width, y), (255, 0, 255), params.line_thickness)
-        # Draw height
-        cv2.line(plt_img, (int(cmx), y), (int(cmx), y + height), (255, 0, 255), params.line_thickness)
-        # Draw centroid
-        cv2.circle(plt_img, (int(cmx), int(cmy)), 10, (255, 0, 255), params.line_thickness)
-        # Draw longest path
-        cv2.line(plt_img, (tuple(caliper_transpose[caliper_length - 1])), (tuple(caliper_transpose[0])),
-                 (255, 0, 255), params.line_thickness)
-        if params.verbose:
-            # Label the object with object label
-            cv2.putText(img=plt_img, text=label, org=(int(cmx), int(cmy)), fontFace=cv2.FONT_HERSHEY_SIMPLEX,
-                        fontScale=params.text_size, color=(187, 187, 187), thickness=params.text_thickness)
+    measurements = {name: [0] * n_labels for name in
+                    ("area", "hull_area", "solidity", "perimeter", "total_edge_length", "width", "height",
+                     "longest_path", "hull_vertices", "ellipse_major_axis", "ellipse_minor_axis", "ellipse_angle",
+                     "ellipse_eccentricity")}
+    measurements["center_of_mass"] = [(0, 0)] * n_labels
+    measurements["ellipse_center"] = [(0, 0)] * n_labels
+    in_bounds = [True] * n_labels
+
+    # Area and center of mass of all objects (label 0 is the background)
+    ys, xs = np.nonzero((labeled_mask > 0) & (labeled_mask <= n_labels))
+    labels = labeled_mask[ys, xs].astype(np.int64)
+    areas = np.bincount(labels, minlength=n_labels + 1)
+    sum_x = np.bincount(labels, weights=xs, minlength=n_labels + 1)
+    sum_y = np.bincount(labels, weights=ys, minlength=n_labels + 1)
+
+    # Plot image, a color copy of the image if diagnostic images are built
+    plt_img = np.copy(_grayscale_to_rgb(img)) if _build_visuals() else None
+
+    for i, box in enumerate(ndimage.find_objects(labeled_mask, max_label=n_labels)):
+        params.device += 1
+        if box is None:
+            continue
+        rows, cols = box
+        # Check is object is touching image boundaries (QC)
+        in_bounds[i] = rows.start > 0 and cols.start > 0 and rows.stop < height and cols.stop < width
+
+        # Find contours in the bounding box of the object, with a background border
+        submask = np.pad((labeled_mask[box] == i + 1).astype(np.uint8) * 255, 1)
+        cnt, cnt_str = _cv2_findcontours(bin_img=submask, offset=(cols.start - 1, rows.start - 1))
+
+        # Consolidate contours
+        obj = _object_composition(contours=cnt, hierarchy=cnt_str)
+
+        # Analyze shape properties if the object is large enough
+        if len(obj) > 5:
+            # Convex Hull
+            hull = cv2.convexHull(obj)
+            # Number of convex hull vertices
+            measurements["hull_vertices"][i] = len(hull)
+            # Convex Hull area
+            hull_area = cv2.contourArea(hull)
+            measurements["hull_area"][i] = hull_area
+            # Area
+            area = int(areas[i + 1])
+            measurements["area"][i] = area
+            # Solidity
+            measurements["solidity"][i] = area / hull_area if hull_area != 0 else 1
+            # Perimeter
+            measurements["perimeter"][i] = cv2.arcLength(obj, closed=True)
+            # Total edge legnth
+            measurements["total_edge_length"][i] = sum(cv2.arcLength(contour, True) for contour in cnt)
+            # Bounding rectangle
+            x, y, obj_width, obj_height = cv2.boundingRect(obj)
+            measurements["width"][i] = obj_width
+            measurements["height"][i] = obj_height
+            # Centroid/Center of Mass
+            cmx = sum_x[i + 1] / area
+            cmy = sum_y[i + 1] / area
+            measurements["center_of_mass"][i] = (cmx, cmy)
+            # Bounding ellipse
+            ellipse_center, axes, ellipse_angle = cv2.fitEllipse(obj)
+            major_axis_idx = np.argmax(axes)
+            minor_axis_idx = 1 - major_axis_idx
+            measurements["ellipse_center"][i] = (ellipse_center[0], ellipse_center[1])
+            measurements["ellipse_major_axis"][i] = float(axes[major_axis_idx])
+            measurements["ellipse_minor_axis"][i] = float(axes[minor_axis_idx])
+            measurements["ellipse_angle"][i] = float(ellipse_angle)
+            measurements["ellipse_eccentricity"][i] = float(np.sqrt(1 - (axes[minor_axis_idx] /
+                                                                         axes[major_axis_idx]) ** 2))
+            # Caliper length
+            caliper_length, caliper_transpose = _longest_axis(height=height, width=width, hull=hull, cmx=cmx, cmy=cmy)
+            measurements["longest_path"][i] = float(euclidean(tuple(caliper_transpose[caliper_length - 1]),
+                                                              tuple(caliper_transpose[0])))
+
+            # Add measurements onto the diagnostic image
+            if plt_img is not None:
+                # color blind friendly palette in BGR: (255, 0, 255) = magenta; (255, 0, 0) = blue
+                # Draw convex hull
+                cv2.drawContours(plt_img, [hull], -1, (255, 0, 255), params.line_thickness)
+                # Draw perimeter outline
+                cv2.drawContours(plt_img, cnt, -1, (255, 0, 0), params.line_thickness)
+                # Draw width
+                cv2.line(plt_img, (x, y), (x + obj_width, y), (255, 0, 255), params.line_thickness)
+                # Draw height
+                cv2.line(plt_img, (int(cmx), y), (int(cmx), y + obj_height), (255, 0, 255), params.line_thickness)
+                # Draw centroid
+                cv2.circle(plt_img, (int(cmx), int(cmy)), 10, (255, 0, 255), params.line_thickness)
+                # Draw longest path
+                cv2.line(plt_img, (tuple(caliper_transpose[caliper_length - 1])), (tuple(caliper_transpose[0])),
+                         (255, 0, 255), params.line_thickness)
+                if params.verbose:
+                    # Label the object with object label
+                    cv2.putText(img=plt_img, text=samples[i], org=(int(cmx), int(cmy)),
+                                fontFace=cv2.FONT_HERSHEY_SIMPLEX, fontScale=params.text_size, color=(187, 187, 187),
+                                thickness=params.text_thickness)
 
     # Store outputs
     outputs.add_metadata(term="image_height", datatype=int, value=np.shape(img)[0])
     outputs.add_metadata(term="image_width", datatype=int, value=np.shape(img)[1])
-    outputs.add_observation(sample=label, variable='area', trait='area',
-                            method='plantcv.plantcv.analyze.size', scale=params.unit, datatype=int,
-                            value=_scale_size(area, "area"), label=params.unit)
-    outputs.add_observation(sample=label, variable='convex_hull_area', trait='convex hull area',
-                            method='plantcv.plantcv.analyze.size', scale=params.unit, datatype=int,
-                            value=_scale_size(hull_area, "area"), label=params.unit)
-    outputs.add_observation(sample=label, variable='solidity', trait='solidity',
-                            method='plantcv.plantcv.analyze.size', scale='none', datatype=float,
-                            value=solidity, label='none')
-    outputs.add_observation(sample=label, variable='perimeter', trait='perimeter',
-                            method='plantcv.plantcv.analyze.size', scale=params.unit, datatype=int,
-                            value=_scale_size(perimeter), label=params.unit)
-    outputs.add_observation(sample=label, variable='total_edge_length', trait='total length of object edges',
-                            method='plantcv.plantcv.analyze.size', scale=params.unit, datatype=int,
-                            value=_scale_size(total_edge_length), label=params.unit)
-    outputs.add_observation(sample=label, variable='width', trait='width',
-                            method='plantcv.plantcv.analyze.size', scale=params.unit, datatype=int,
-                            value=_scale_size(width), label=params.unit)
-    outputs.add_observation(sample=label, variable='height', trait='height',
-                            method='plantcv.plantcv.analyze.size', scale=params.unit, datatype=int,
-                            value=_scale_size(height), label=params.unit)
-    outputs.add_observation(sample=label, variable='longest_path', trait='longest path',
-                            method='plantcv.plantcv.analyze.size', scale=params.unit, datatype=int,
-                            value=_scale_size(float(longest_path)), label=params.unit)
-    outputs.add_observation(sample=label, variable='center_of_mass', trait='center of mass',
-                            method='plantcv.plantcv.analyze.size', scale='none', datatype=tuple,
-                            value=(cmx, cmy), label=("x", "y"))
-    outputs.add_observation(sample=label, variable='convex_hull_vertices', trait='convex hull vertices',
-                            method='plantcv.plantcv.analyze.size', scale='none', datatype=int,
-                            value=hull_vertices, label='none')
-    outputs.add_observation(sample=label, variable='object_in_frame', trait='object in frame',
-                            method='plantcv.plantcv.analyze.size', scale='none', datatype=bool,
-                            value=in_bounds, label='none')
-    outputs.add_observation(sample=label, variable='ellipse_center', trait='ellipse center',
-                            method='plantcv.plantcv.analyze.size', scale='none', datatype=tuple,
-                            value=(ellipse_center[0], ellipse_center[1]), label=("x", "y"))
-    outputs.add_observation(sample=label, variable='ellipse_major_axis', trait='ellipse major axis length',
-                            method='plantcv.plantcv.analyze.size', scale=params.unit, datatype=int,
-                            value=_scale_size(ellipse_major_axis), label=params.unit)
-    outputs.add_observation(sample=label, variable='ellipse_minor_axis', trait='ellipse minor axis length',
-                            method='plantcv.plantcv.analyze.size', scale=params.unit, datatype=int,
-                            value=_scale_size(ellipse_minor_axis), label=params.unit)
-    outputs.add_observation(sample=label, variable='ellipse_angle', trait='ellipse major axis angle',
-                            method='plantcv.plantcv.analyze.size', scale='degrees', datatype=float,
-                            value=float(ellipse_angle), label='degrees')
-    outputs.add_observation(sample=label, variable='ellipse_eccentricity', trait='ellipse eccentricity',
-                            method='plantcv.plantcv.analyze.size', scale='none', datatype=float,
-                            value=float(ellipse_eccentricity), label='none')
+    outputs.add_observations(samples=samples, variable='in_bounds', trait='whether the plant goes out of bounds ',
+                             method='plantcv.plantcv.within_frame', scale='none', datatype=bool,
+                             values=in_bounds, label='none')
+    outputs.add_observations(samples=samples, variable='area', trait='area',
+                             method='plantcv.plantcv.analyze.size', scale=params.unit, datatype=int,
+                             values=_scale_size(measurements["area"], "area"), label=params.unit)
+    outputs.add_observations(samples=samples, variable='convex_hull_area', trait='convex hull area',
+                             method='plantcv.plantcv.analyze.size', scale=params.unit, datatype=int,
+                             values=_scale_size(measurements["hull_area"], "area"), label=params.unit)
+    outputs.add_observations(samples=samples, variable='solidity', trait='solidity',
+                             method='plantcv.plantcv.analyze.size', scale='none', datatype=float,
+                             values=measurements["solidity"], label='none')
+    outputs.add_observations(samples=samples, variable='perimeter', trait='perimeter',
+                             method='plantcv.plantcv.analyze.size', scale=params.unit, datatype=int,
+                             values=_scale_size(measurements["perimeter"]), label=params.unit)
+    outputs.add_observations(samples=samples, variable='total_edge_length', trait='total length of object edges',
+                             method='plantcv.plantcv.analyze.size', scale=params.unit, datatype=int,
+                             values=_scale_size(measurements["total_edge_length"]), label=params.unit)
+    outputs.add_observations(samples=samples, variable='width', trait='width',
+                             method='plantcv.plantcv.analyze.size', scale=params.unit, datatype=int,
+                             values=_scale_size(measurements["width"]), label=params.unit)
+    outputs.add_observations(samples=samples, variable='height', trait='height',
+                             method='plantcv.plantcv.analyze.size', scale=params.unit, datatype=int,
+                             values=_scale_size(measurements["height"]), label=params.unit)
+    outputs.add_observations(samples=samples, variable='longest_path', trait='longest path',
+                             method='plantcv.plantcv.analyze.size', scale=params.unit, datatype=int,
+                             values=_scale_size(measurements["longest_path"]), label=params.unit)
+    outputs.add_observations(samples=samples, variable='center_of_mass', trait='center of mass',
+                             method='plantcv.plantcv.analyze.size', scale='none', datatype=tuple,
+                             values=measurements["center_of_mass"], label=("x", "y"))
+    outputs.add_observations(samples=samples, variable='convex_hull_vertices', trait='convex hull vertices',
+                             method='plantcv.plantcv.analyze.size', scale='none', datatype=int,
+                             values=measurements["hull_vertices"], label='none')
+    outputs.add_observations(samples=samples, variable='object_in_frame', trait='object in frame',
+                             method='plantcv.plantcv.analyze.size', scale='none', datatype=bool,
+                             values=in_bounds, label='none')
+    outputs.add_observations(samples=samples, variable='ellipse_center', trait='ellipse center',
+                             method='plantcv.plantcv.analyze.size', scale='none', datatype=tuple,
+                             values=measurements["ellipse_center"], label=("x", "y"))
+    outputs.add_observations(samples=samples, variable='ellipse_major_axis', trait='ellipse major axis length',
+                             method='plantcv.plantcv.analyze.size', scale=params.unit, datatype=int,
+                             values=_scale_size(measurements["ellipse_major_axis"]), label=params.unit)
+    outputs.add_observations(samples=samples, variable='ellipse_minor_axis', trait='ellipse minor axis length',
+                             method='plantcv.plantcv.analyze.size', scale=params.unit, datatype=int,
+                             values=_scale_size(measurements["ellipse_minor_axis"]), label=params.unit)
+    outputs.add_observations(samples=samples, variable='ellipse_angle', trait='ellipse major axis angle',
+                             method='plantcv.plantcv.analyze.size', scale='degrees', datatype=float,
+                             values=measurements["ellipse_angle"], label='degrees')
+    outputs.add_observations(samples=samples, variable='ellipse_eccentricity', trait='ellipse eccentricity',
+                             method='plantcv.plantcv.analyze.size', scale='none', datatype=float,
+                             values=measurements["ellipse_eccentricity"], label='none')
     return plt_img
 
 
@@ -200,6 +222,9 @@ def _longest_axis(height, width, hull, cmx, cmy):
     """
     Calculate the line through center of mass and point on the convex hull that is furthest away
 
+    The convex hull and center point are drawn, and the caliper is found, only in the region of the image around the
+    convex hull, which contains the caliper, so the cost does not depend on the size of the image.
+
     :param height: int
     :param width: int
     :param hull: numpy.ndarray
@@ -207,14 +232,26 @@ def _longest_axis(height, width, hull, cmx, cmy):
     :param cmy: int
     :return caliper_length: int
     """
-    background = np.zeros((height, width, 3), np.uint8)
+    # Region around the convex hull, large enough for the center point marker
+    hull_x, hull_y, hull_width, hull_height = cv2.boundingRect(hull)
+    x0 = max(hull_x - 6, 0)
+    y0 = max(hull_y - 6, 0)
+    x1 = min(hull_x + hull_width + 6, width)
+    y1 = min(hull_y + hull_height + 6, height)
+    # Shapes are drawn in region coordinates
+    shift = np.array([x0, y0])
+    local_hull = hull - shift
+
+    background = np.zeros((y1 - y0, x1 - x0, 3), np.uint8)
+    # The rasterization of thick lines depends on the image size, so the line is drawn on a full size image, of which
+    # only the line pixels are written, and is then cut to the region
     background1 = np.zeros((height, width), np.uint8)
-    background2 = np.zeros((height, width), np.uint8)
+    background2 = np.zeros((y1 - y0, x1 - x0), np.uint8)
     # Longest Axis: line through center of mass and point on the convex hull that is furthest away
-    cv2.circle(background, (int(cmx), int(cmy)), 4, (255, 255, 255), -1)
+    cv2.circle(background, (int(cmx) - x0, int(cmy) - y0), 4, (255, 255, 255), -1)
     center_p = cv2.cvtColor(background, cv2.COLOR_BGR2GRAY)
     _, centerp_binary = cv2.threshold(center_p, 0, 255, cv2.THRESH_BINARY)
-    centerpoint, _ = _cv2_findcontours(bin_img=centerp_binary)
+    centerpoint, _ = _cv2_findcontours(bin_img=centerp_binary, offset=(x0, y0))
 
     dist = []
     vhull = np.vstack(hull)
@@ -252,14 +289,14 @@ def _longest_axis(height, width, hull, cmx, cmy):
     else:
         cv2.line(background1, (width, caliper_mid_y), (0, caliper_mid_y), (255), params.line_thickness)
 
-    _, line_binary = cv2.threshold(background1, 0, 255, cv2.THRESH_BINARY)
+    _, line_binary = cv2.threshold(background1[y0:y1, x0:x1], 0, 255, cv2.THRESH_BINARY)
 
-    cv2.drawContours(background2, [hull], -1, (255), -1)
+    cv2.drawContours(background2, [local_hull], -1, (255), -1)
     _, hullp_binary = cv2.threshold(background2, 0, 255, cv2.THRESH_BINARY)
 
     caliper = cv2.multiply(line_binary, hullp_binary)
 
-    caliper_y, caliper_x = np.array(caliper.nonzero())
+    caliper_y, caliper_x = np.array(caliper.nonzero()) + shift[::-1, None]
     caliper_matrix = np.vstack((caliper_x, caliper_y))
     caliper_transpose = np.transpose(caliper_matrix)
     caliper_length = len(caliper_transpose)
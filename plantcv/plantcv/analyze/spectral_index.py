@@ -2,7 +2,7 @@
 import os
 import numpy as np
 from plantcv.plantcv import outputs, params
-from plantcv.plantcv._debug import _debug
+from plantcv.plantcv._debug import _debug, _build_visuals
 from plantcv.plantcv import fatal_error, warn
 from plantcv.plantcv.visualize import histogram
 from plantcv.plantcv._helpers import _iterate_analysis
@@ -38,8 +38,10 @@ def spectral_index(index_img, labeled_mask, n_labels=1, bins=100, min_bin=0, max
         label = params.sample_label
 
     _ = _iterate_analysis(img=index_img, labeled_mask=labeled_mask, n_labels=n_labels, label=label, function=_analyze_index,
-                          **{"bins": bins, "min_bin": min_bin, "max_bin": max_bin})
-    index_hist = outputs.plot_dists(variable=f"index_frequencies_{index_img.array_type}")
+                          crop=True, **{"bins": bins, "min_bin": min_bin, "max_bin": max_bin})
+    index_hist = None
+    if _build_visuals():
+        index_hist = outputs.plot_dists(variable=f"index_frequencies_{index_img.array_type}")
     _debug(visual=index_hist, filename=os.path.join(params.debug_outdir, str(params.device) + "_index_hist.png"))
     return index_hist
 
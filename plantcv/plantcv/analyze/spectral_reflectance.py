@@ -2,7 +2,7 @@
 import os
 import numpy as np
 from plantcv.plantcv import outputs, params
-from plantcv.plantcv._debug import _debug
+from plantcv.plantcv._debug import _debug, _build_visuals
 from plantcv.plantcv._helpers import _iterate_analysis
 
 
@@ -28,8 +28,11 @@ def spectral_reflectance(hsi, labeled_mask, n_labels=1, label=None):
     if label is None:
         label = params.sample_label
 
-    _ = _iterate_analysis(img=hsi, labeled_mask=labeled_mask, n_labels=n_labels, label=label, function=_analyze_spectral)
-    spectral_chart = outputs.plot_dists(variable="wavelength_means")
+    _ = _iterate_analysis(img=hsi, labeled_mask=labeled_mask, n_labels=n_labels, label=label, function=_analyze_spectral,
+                          crop=True)
+    spectral_chart = None
+    if _build_visuals():
+        spectral_chart = outputs.plot_dists(variable="wavelength_means")
     _debug(visual=spectral_chart, filename=os.path.join(params.debug_outdir, str(params.device) + '_mean_reflectance.png'))
     return spectral_chart
 
@@ -2,7 +2,7 @@
 import os
 import numpy as np
 from plantcv.plantcv import params, outputs
-from plantcv.plantcv._debug import _debug
+from plantcv.plantcv._debug import _debug, _build_visuals
 from plantcv.plantcv.visualize import histogram
 from plantcv.plantcv._helpers import _iterate_analysis
 
@@ -32,8 +32,10 @@ def thermal(thermal_img, labeled_mask, n_labels=1, bins=100, label=None):
         label = params.sample_label
 
     _ = _iterate_analysis(img=thermal_img, labeled_mask=labeled_mask, n_labels=n_labels, label=label,
-                          function=_analyze_thermal,  **{"bins": bins})
-    temp_chart = outputs.plot_dists(variable="thermal_frequencies")
+                          function=_analyze_thermal, crop=True, **{"bins": bins})
+    temp_chart = None
+    if _build_visuals():
+        temp_chart = outputs.plot_dists(variable="thermal_frequencies")
     _debug(visual=temp_chart, filename=os.path.join(params.debug_outdir, str(params.device) + '_temperature_hist.png'))
     return temp_chart
 
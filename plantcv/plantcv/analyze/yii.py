@@ -1,11 +1,12 @@
 """Fluorescence Analysis (Fv/Fm parameter)."""
 import os
+import warnings
 import numpy as np
 import pandas as pd
-import xarray as xr
-from plantcv.plantcv._debug import _debug
+from plantcv.plantcv._debug import _debug, _build_visuals
 from plantcv.plantcv import params, outputs, fatal_error
-from plantcv.plantcv.photosynthesis import reassign_frame_labels
+from plantcv.plantcv._helpers import _label_pixels
+from plantcv.plantcv.photosynthesis.reassign_frame_labels import _fm_frames
 
 
 def yii(ps_da, labeled_mask, n_labels=1, auto_fm=False, measurement_labels=None, label=None):
@@ -52,11 +53,6 @@ def yii(ps_da, labeled_mask, n_labels=1, auto_fm=False, measurement_labels=None,
     if var not in ['ojip_dark', 'ojip_light', 'pam_dark', 'pam_light']:
         fatal_error(f"Unsupported DataArray type: {var}")
 
-    # Make an zeroed array of the same shape as the input DataArray
-    yii_global = xr.zeros_like(ps_da, dtype=float)
-    # Drop the frame_label coordinate
-    yii_global = yii_global[:, :, 0, :].drop_vars('frame_label')
-
     # Make a copy of the labeled mask
     mask_copy = np.copy(labeled_mask)
 
@@ -64,41 +60,37 @@ def yii(ps_da, labeled_mask, n_labels=1, auto_fm=False, measurement_labels=None,
     if len(np.unique(mask_copy)) == 2 and np.max(mask_copy) == 255:
         mask_copy = np.where(mask_copy == 255, 1, 0).astype(np.uint8)
 
-    # Iterate over the label values 1 to n_labels
+    # Pixels of each labeled region, grouped by label
+    pixels, bounds = _label_pixels(labeled_mask=mask_copy, n_labels=n_labels)
+    n_pixels = np.diff(bounds)
+
+    # Dark-adapted datasets (Fv/Fm) or light-adapted datasets (Fq'/Fm')
+    f_label, fm_label = ("F0", "Fm") if var in ['ojip_dark', 'pam_dark'] else ("Fp", "Fmp")
+    frame_labels = ps_da.frame_label.values.tolist()
+
+    # If auto_fm is True, choose the best Fm or Fm' frame for each labeled region
+    if auto_fm:
+        fm_frames = _fm_frames(ps_da=ps_da, pixels=pixels, bounds=bounds)
+    else:
+        fm_frames = np.full(n_labels, frame_labels.index(fm_label))
+
+    # Fluorescence of the labeled pixels in each measurement
+    fm = ps_da.values[pixels[0], pixels[1], np.repeat(fm_frames, n_pixels)].astype(float)
+    f = ps_da.values[pixels[0], pixels[1], frame_labels.index(f_label)].astype(float)
+    # Calculate Fv/Fm or Fq'/Fm' of all labeled pixels at once
+    with np.errstate(divide="ignore", invalid="ignore"):
+        yii_px = (fm - f) / fm
+    # Fill NaN values with 0
+    yii_px[np.isnan(yii_px)] = 0
+    # Make a zeroed array of the yii values with the coordinates of the input DataArray (without frame_label)
+    yii_values = np.zeros(ps_da.shape[:2] + ps_da.shape[3:])
+    yii_values[pixels] = yii_px
+    yii_global = ps_da[:, :, 0, :].drop_vars('frame_label').copy(data=yii_values)
+
+    # Record observations for each labeled region
     for i in range(1, n_labels + 1):
-        # Create a binary submask for each label
-        submask = np.where(mask_copy == i, 255, 0).astype(np.uint8)
-
-        # Expand the submask to the same shape as the input DataArray
-        submask = submask[..., None, None]
-
-        # If auto_fm is True, reassign frame labels to choose the best Fm or Fm' for each labeled region
-        if auto_fm:
-            ps_da = reassign_frame_labels(ps_da=ps_da, mask=submask.squeeze().squeeze())
-
-        # Mask the input DataArray with the submask
-        yii_masked = ps_da.astype('float').where(submask > 0, other=np.nan)
-
-        # Dark-adapted datasets (Fv/Fm)
-        if var in ['ojip_dark', 'pam_dark']:
-            # Calculate Fv/Fm
-            yii_lbl = (yii_masked.sel(frame_label='Fm') - yii_masked.sel(frame_label='F0')) / yii_masked.sel(frame_label='Fm')
-
-        # Light-adapted datasets (Fq'/Fm')
-        if var in ['ojip_light', 'pam_light']:
-            # Calculate Fq'/Fm'
-            yii_lbl = yii_masked.groupby('measurement', squeeze=False).map(_calc_yii)
-
-        # Drop the frame_label coordinate
-        yii_lbl = yii_lbl.drop_vars('frame_label')
-        # Fill NaN values with 0 so that we can add DataArrays together
-        yii_lbl = yii_lbl.fillna(0)
-        # Add the Fv/Fm values for this label to the yii DataArray
-        yii_global = yii_global + yii_lbl
-
-        # Record observations for each labeled region
-        _add_observations(yii_da=yii_lbl, measurements=ps_da.measurement.values, label=f"{labels[i - 1]}_{i}",
-                          measurement_labels=measurement_labels)
+        _add_observations(yii_px=yii_px[bounds[i - 1]:bounds[i]], measurements=ps_da.measurement.values,
+                          label=f"{labels[i - 1]}_{i}", measurement_labels=measurement_labels)
 
     # Convert the labeled mask to a binary mask
     bin_mask = np.where(labeled_mask > 0, 255, 0)
@@ -114,7 +106,9 @@ def yii(ps_da, labeled_mask, n_labels=1, auto_fm=False, measurement_labels=None,
     yii_global = yii_global.drop_vars(res)  # does not fail if res is []
 
     # Create a ridgeline plot of the YII values
-    yii_chart = _ridgeline_plots(measurements=ps_da.measurement.values, measurement_labels=measurement_labels)
+    yii_chart = None
+    if _build_visuals():
+        yii_chart = _ridgeline_plots(measurements=ps_da.measurement.values, measurement_labels=measurement_labels)
 
     # Create a pseudocolor image of the YII values
     _debug(visual=yii_global,
@@ -181,12 +175,18 @@ def _create_histogram(yii_img, mlabel):
     return hist_df, yii_mode
 
 
-def _add_observations(yii_da, measurements, measurement_labels, label):
+def _add_observations(yii_px, measurements, measurement_labels, label):
     """Add observations for each labeled region."""
-    # compute observations to store in Outputs, per labeled region
-    yii_mean = yii_da.where(yii_da > 0).groupby('measurement').mean(['x', 'y']).values
-    yii_median = yii_da.where(yii_da > 0).groupby('measurement').median(['x', 'y']).values
-    yii_max = yii_da.where(yii_da > 0).groupby('measurement').max(['x', 'y']).values
+    # compute observations to store in Outputs, per labeled region (one row per pixel, one column per measurement)
+    yii_pos = np.where(yii_px > 0, yii_px, np.nan)
+    # Statistics of a region without pixels are NaN
+    if len(yii_pos) == 0:
+        yii_pos = np.full((1, len(measurements)), np.nan)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        yii_mean = np.nanmean(yii_pos, axis=0)
+        yii_median = np.nanmedian(yii_pos, axis=0)
+        yii_max = np.nanmax(yii_pos, axis=0)
 
     # Create variables to label traits based on measurement label in data array
     for n, mlabel in enumerate(measurements):
@@ -206,7 +206,7 @@ def _add_observations(yii_da, measurements, measurement_labels, label):
                                 method='plantcv.plantcv.analyze.yii', scale='none', datatype=float,
                                 value=float(yii_max[n]), label='none')
 
-        hist_df, yii_mode = _create_histogram(yii_da.isel({'measurement': n}).values, mlabel)
+        hist_df, yii_mode = _create_histogram(yii_px[:, n], mlabel)
 
         # mode value
         outputs.add_observation(sample=label, variable=f"yii_mode_{mlabel}", trait="mode yii value",
@@ -219,11 +219,6 @@ def _add_observations(yii_da, measurements, measurement_labels, label):
                                 label=np.around(hist_df[mlabel].values.tolist(), decimals=2).tolist())
 
 
-def _calc_yii(da):
-    """Apply the Fq'/Fm' calculation to the DataArray."""
-    return (da.sel(frame_label='Fmp') - da.sel(frame_label='Fp')) / da.sel(frame_label='Fmp')
-
-
 def _ridgeline_plots(measurements, measurement_labels):
     """Create ridgeline plots of YII values."""
     yii_chart = None
@@ -4,6 +4,7 @@ import cv2
 import json
 import numpy as np
 import datetime
+from copy import deepcopy
 from plantcv.plantcv import __version__ as ver
 from plantcv.plantcv import fatal_error
 from plantcv.plantcv.annotate.points import _find_closest_pt
@@ -13,13 +14,19 @@ import altair as alt
 import pandas as pd
 
 
+# Environment variables with the location of the metadata of a parallel job (shared metadata file and byte offset)
+JOB_METADATA_ENV = "PLANTCV_JOB_METADATA"
+JOB_METADATA_OFFSET_ENV = "PLANTCV_JOB_METADATA_OFFSET"
+
+
 class Params:
     """PlantCV parameters class."""
 
     def __init__(self, device=0, debug=None, debug_outdir=".", line_thickness=5,
                  line_color=(255, 0, 255), dpi=100, text_size=0.55,
                  text_thickness=2, marker_size=60, color_scale="gist_rainbow", color_sequence="sequential",
-                 sample_label="default", saved_color_scale=None, verbose=True, unit="pixels", px_height=1, px_width=1):
+                 sample_label="default", saved_color_scale=None, verbose=True, unit="pixels", px_height=1, px_width=1,
+                 visuals=True, colorspace_cache=0):
         """Initialize parameters.
 
         Keyword arguments/parameters:
@@ -40,6 +47,10 @@ class Params:
         unit              = Units of size trait outputs. (default: "pixels")
         px_height         = Size scaling information about pixel height (default: 1)
         px_width          = Size scaling information about pixel width (default: 1)
+        visuals           = Build the diagnostic images and plots returned by functions. If False (and debug is None)
+                            they are replaced by None. (default: True)
+        colorspace_cache  = Number of recent RGB images whose colorspace conversions are reused, 0 disables the cache.
+                            (default: 0)
 
 
         :param device: int
@@ -58,6 +69,8 @@ class Params:
         :param unit: str
         :param px_height: float
         :param px_width: float
+        :param visuals: bool
+        :param colorspace_cache: int
 
         """
         self.device = device
@@ -77,6 +90,8 @@ class Params:
         self.unit = unit
         self.px_height = px_height
         self.px_width = px_width
+        self.visuals = visuals
+        self.colorspace_cache = colorspace_cache
 
 
 class Outputs:
@@ -87,6 +102,27 @@ class Outputs:
         self.images = []
         self.observations = {}
         self.metadata = {}
+        # Metadata of the current parallel job, merged into new JSON results files and not removed by clear()
+        self.job_metadata = _read_job_metadata()
+        # Size and observations of the results logs written by this object, keyed by filename
+        self._logged = {}
+
+    @property
+    def observations(self):
+        """Observations dictionary, organized by sample and variable."""
+        # Batches of observations added with add_observations are unpacked when observations are read
+        if self._batches:
+            batches, self._batches = self._batches, []
+            for samples, variable, definition, values, label in batches:
+                for sample, value in zip(samples, values.tolist() if isinstance(values, np.ndarray) else values):
+                    self._observations.setdefault(sample, {})[variable] = {**definition, "value": value,
+                                                                           "label": label}
+        return self._observations
+
+    @observations.setter
+    def observations(self, observations):
+        self._observations = observations
+        self._batches = []
 
         # Add a method to clear measurements
     def clear(self):
@@ -123,15 +159,17 @@ class Outputs:
         :param value:
         :param label:
         """
+        # Unpack previous batches of observations first, so that this observation replaces earlier ones
+        observations = self.observations
         # Create an empty dictionary for the sample if it does not exist
-        if sample not in self.observations:
-            self.observations[sample] = {}
+        if sample not in observations:
+            observations[sample] = {}
 
         # Validate that the data type is supported by JSON
         _ = _validate_data_type(value)
 
         # Save the observation for the sample and variable
-        self.observations[sample][variable] = {
+        observations[sample][variable] = {
             "trait": trait,
             "method": method,
             "scale": scale,
@@ -140,6 +178,52 @@ class Outputs:
             "label": label
         }
 
+    # Method to add observations of a variable for many samples
+    def add_observations(self, samples, variable, trait, method, scale, datatype, values, label):
+        """Add observations of one variable for many samples at once.
+
+        The values are validated once for the whole batch and kept as an array until the observations are read or
+        saved, which is faster than calling add_observation for each sample.
+
+        Keyword arguments/parameters:
+        samples      = Sample names, one per value
+        variable     = A local unique identifier of a variable, e.g. a short name,
+                       that is a key linking the definitions of variables with observations.
+        trait        = A name of the trait mapped to an external ontology; if there is no exact mapping, an informative
+                       description of the trait.
+        method       = A name of the measurement method mapped to an external ontology; if there is no exact mapping, an
+                       informative description of the measurement procedure
+        scale        = Units of the measurement or scale in which the observations are expressed
+        datatype     = The type of data of each value, e.g. 'int', 'float', 'str', 'list', 'bool', etc.
+        values       = List or numpy array of values, one per sample (one row per sample if datatype is list)
+        label        = The label of the values of every sample (e.g. the bin labels if datatype is list)
+
+        :param samples: list
+        :param variable: str
+        :param trait: str
+        :param method: str
+        :param scale: str
+        :param datatype: type
+        :param values: list or numpy.ndarray
+        :param label:
+        """
+        if len(values) != len(samples):
+            fatal_error(f"The number of values ({len(values)}) does not match the number of samples ({len(samples)})!")
+        # Numeric, Boolean and string arrays are converted to JSON-compatible Python types when unpacked
+        try:
+            array = np.asarray(values)
+        except ValueError:
+            # Lists of different lengths
+            array = None
+        if array is None or array.dtype.kind not in "biufU":
+            # Validate that the data type of each value is supported by JSON
+            for value in values:
+                _ = _validate_data_type(value)
+            array = list(values)
+        self._batches.append((list(samples), variable,
+                              {"trait": trait, "method": method, "scale": scale, "datatype": str(datatype)}, array,
+                              label))
+
     # Method to add metadata instance to outputs
     def add_metadata(self, term, datatype, value):
         """Add a metadata term and value to outputs.
@@ -172,7 +256,7 @@ class Outputs:
 
         Keyword arguments/parameters:
         filename       = Output filename
-        outformat      = Output file format ("json" or "csv"). Default = "json"
+        outformat      = Output file format ("json", "jsonl", "csv" or "parquet"). Default = "json"
 
         :param filename: str
         :param outformat: str
@@ -186,18 +270,26 @@ class Outputs:
             if os.path.isfile(filename):
                 with open(filename, 'r') as f:
                     hierarchical_data = json.load(f)
-                    hierarchical_data["observations"] = self.observations
-                    existing_metadata = hierarchical_data["metadata"]
-                    for term in self.metadata:
-                        save_term = term
-                        if term in existing_metadata:
-                            save_term = f"{term}_1"
-                        hierarchical_data["metadata"][save_term] = self.metadata[term]
             else:
-                hierarchical_data = {"metadata": self.metadata, "observations": self.observations}
+                # A new results file starts with the parallel job metadata (if any)
+                hierarchical_data = {"metadata": deepcopy(self.job_metadata)}
+            hierarchical_data["observations"] = self.observations
+            _merge_metadata(existing=hierarchical_data["metadata"], new=self.metadata)
             with open(filename, mode='w') as f:
                 json.dump(hierarchical_data, f)
 
+        elif outformat.upper() == "JSONL":
+            # Append-only results log, compacted to the JSON layout by plantcv.utils.compact_results
+            self._append_results_record(filename=filename)
+
+        elif outformat.upper() == "PARQUET":
+            # Columnar tables of single-value (wide) and multi-value (long) traits, named like plantcv.utils.json2csv
+            metadata = deepcopy(self.job_metadata)
+            _merge_metadata(existing=metadata, new=self.metadata)
+            scalar_df, multi_df = _results_tables(metadata=metadata, observations=self.observations)
+            scalar_df.to_parquet(f"{filename}-single-value-traits.parquet", index=False)
+            multi_df.to_parquet(f"{filename}-multi-value-traits.parquet", index=False)
+
         elif outformat.upper() == "CSV":
             # Open output CSV file
             with open(filename, "w") as csv_table:
@@ -234,6 +326,42 @@ class Outputs:
                                                        self.observations[sample][var]["label"]]
                             csv_table.write(",".join(map(str, row)) + "\n")
 
+    def _append_results_record(self, filename):
+        """Append the results to a results log as one JSON record per line.
+
+        A record has the metadata and either all observations, which replace the logged observations, or only the
+        observations that changed since the last record written by this object to the same file ("updates").
+
+        Keyword arguments/parameters:
+        filename       = Output filename
+
+        :param filename: str
+        """
+        observations = self.observations
+        size = os.path.getsize(filename) if os.path.isfile(filename) else 0
+        record = {"metadata": self.metadata}
+        # A new log starts with the parallel job metadata (if any), like a new JSON results file
+        if size == 0:
+            record["job_metadata"] = self.job_metadata
+        logged_size, logged = self._logged.get(filename, (None, None))
+        # Updates are only valid if no other record was appended and no logged observation was removed
+        if logged_size != size or any(var not in observations.get(sample, {})
+                                      for sample, variables in logged.items() for var in variables):
+            record["observations"] = observations
+        else:
+            updates = {}
+            for sample, variables in observations.items():
+                changed = {var: obs for var, obs in variables.items() if logged.get(sample, {}).get(var) != obs}
+                if changed:
+                    updates[sample] = changed
+            record["updates"] = updates
+        line = json.dumps(record) + "\n"
+        with open(filename, "a") as fp:
+            fp.write(line)
+        # Keep shallow copies of the observations to find the observations that change before the next record
+        self._logged[filename] = (size + len(line.encode()), {sample: {var: dict(obs) for var, obs in variables.items()}
+                                                              for sample, variables in observations.items()})
+
     def plot_dists(self, variable):
         """Plot a distribution of data.
 
@@ -312,6 +440,121 @@ def _validate_data_type(data):
     return True
 
 
+def _merge_metadata(existing, new):
+    """Merge metadata terms into an existing metadata dictionary, renaming terms that already exist.
+
+    Keyword arguments:
+    existing = metadata dictionary, updated in place
+    new      = metadata dictionary to merge
+
+    :param existing: dict
+    :param new: dict
+    """
+    for term in new:
+        save_term = term
+        if term in existing:
+            save_term = f"{term}_1"
+        existing[save_term] = new[term]
+
+
+def _read_job_metadata():
+    """Read the metadata of the current parallel job from the location set in the environment by plantcv-run-workflow.
+
+    Returns:
+    metadata = image metadata of the job (empty if the process is not a parallel job)
+
+    :return metadata: dict
+    """
+    metadata_file = os.environ.get(JOB_METADATA_ENV)
+    if metadata_file is None:
+        return {}
+    with open(metadata_file, "rb") as fp:
+        fp.seek(int(os.environ.get(JOB_METADATA_OFFSET_ENV, 0)))
+        return json.loads(fp.readline())
+
+
+def _read_results_log(filename):
+    """Replay the records of a results log written by Outputs.save_results(outformat="jsonl").
+
+    The merged results are the same as if each record had been saved to a JSON results file.
+
+    Keyword arguments:
+    filename = results log file
+
+    Returns:
+    results  = results dictionary with "metadata" and "observations", or None if the log has no records
+
+    :param filename: str
+    :return results: dict
+    """
+    results = None
+    with open(filename, "r") as fp:
+        for line in fp:
+            # Skip a partially written last record
+            if not line.endswith("\n"):
+                break
+            record = json.loads(line)
+            if results is None:
+                results = {"metadata": record.get("job_metadata", {})}
+            if "observations" in record:
+                results["observations"] = record["observations"]
+            else:
+                for sample, variables in record["updates"].items():
+                    results["observations"].setdefault(sample, {}).update(variables)
+            _merge_metadata(existing=results["metadata"], new=record["metadata"])
+    return results
+
+
+def _results_tables(metadata, observations):
+    """Tabulate results as a wide table of single-value traits and a long table of multi-value traits.
+
+    Metadata values are collapsed and traits are unpacked the same way as in plantcv.utils.json2csv.
+
+    Keyword arguments:
+    metadata     = metadata dictionary
+    observations = observations dictionary
+
+    Returns:
+    scalar_df    = single-value traits, one row per sample and one column per trait and label
+    multi_df     = multi-value traits, one row per sample, trait and label
+
+    :param metadata: dict
+    :param observations: dict
+    :return scalar_df: pandas.core.frame.DataFrame
+    :return multi_df: pandas.core.frame.DataFrame
+    """
+    meta_row = {}
+    for term, meta in metadata.items():
+        vals = ["none" if v is None else v for v in meta["value"]]
+        # If there are multiple values, join the unique values with an underscore
+        meta_row[term] = "_".join(map(str, np.unique(vals).tolist()))
+    scalar_rows = []
+    multi_rows = []
+    for sample, variables in observations.items():
+        row = {**meta_row, "sample": sample}
+        for var, obs in variables.items():
+            if obs["datatype"] in ["<class 'list'>", "<class 'tuple'>"]:
+                for val, lbl in zip(obs["value"], obs["label"]):
+                    # Skip list of tuple data types
+                    if not isinstance(val, tuple):
+                        multi_rows.append({**meta_row, "sample": sample, "trait": var, "value": val, "label": lbl})
+            elif obs["datatype"] in ["<class 'bool'>", "<class 'int'>", "<class 'float'>", "<class 'str'>"]:
+                value = obs["value"]
+                # Store Boolean values as numeric 1/0
+                if isinstance(value, bool):
+                    value = int(value)
+                row[f"{var}_{obs['label']}"] = value
+        scalar_rows.append(row)
+    scalar_df = pd.DataFrame(scalar_rows) if scalar_rows else pd.DataFrame(columns=list(meta_row) + ["sample"])
+    multi_df = pd.DataFrame(multi_rows, columns=list(meta_row) + ["sample", "trait", "value", "label"])
+    # Columns with mixed value types are stored as strings
+    for df in [scalar_df, multi_df]:
+        for col in df.columns[df.dtypes == object]:
+            if not all(isinstance(v, str) or v is None for v in df[col]):
+                df[col] = df[col].astype(str)
+    return scalar_df, multi_df
+
+
 class Spectral_data:
     """PlantCV Hyperspectral data class"""
 
@@ -349,6 +592,26 @@ class Spectral_data:
         if not metadata:
             self.metadata = {}
 
+    def _set_lazy(self, **attributes):
+        """Calculate attributes when they are first accessed.
+
+        Keyword arguments:
+        attributes = Functions without arguments that return the value of each attribute
+        """
+        lazy = self.__dict__.setdefault("_lazy", {})
+        for name, function in attributes.items():
+            self.__dict__.pop(name, None)
+            lazy[name] = function
+
+    def __getattr__(self, name):
+        """Calculate a lazy attribute on first access."""
+        lazy = self.__dict__.get("_lazy", {})
+        if name not in lazy:
+            raise AttributeError(f"'Spectral_data' object has no attribute '{name}'")
+        value = lazy.pop(name)()
+        setattr(self, name, value)
+        return value
+
 
 class PSII_data:
     """PSII data class"""
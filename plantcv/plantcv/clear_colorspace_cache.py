@@ -0,0 +1,16 @@
+# Clear cached colorspace conversions
+
+from plantcv.plantcv._helpers import _clear_colorspace_cache
+
+
+def clear_colorspace_cache(rgb_img=None):
+    """Remove cached colorspace conversions (see params.colorspace_cache).
+
+    Conversions of an image must be removed after the image is modified in place.
+
+    Parameters
+    ----------
+    rgb_img : numpy.ndarray or None
+        RGB image data to remove the conversions of, or None (default) to remove all conversions
+    """
+    _clear_colorspace_cache(rgb_img=rgb_img)
@@ -9,6 +9,7 @@ from plantcv.plantcv._debug import _debug
 from plantcv.plantcv import Spectral_data
 from plantcv.plantcv.transform import rescale
 from plantcv.plantcv import fatal_error
+from plantcv.plantcv._helpers import _rect_filter
 
 
 def _find_closest(spectral_array, target):
@@ -223,17 +224,25 @@ def _parse_arcgis(headername):
     return header_dict, wavelength_dict
 
 
-def read_data(filename, mode="ENVI"):
+def read_data(filename, mode="ENVI", memmap=False, wavelengths=None, roi=None):
     """Read hyperspectral image data from file.
     Inputs:
     filename          = Name of image file
     mode              = Format of img data (ENVI or ARCGIS, case insensitive)
+    memmap            = If True, the datacube is memory-mapped from the file instead of read into memory, and the pixel
+                        value range and pseudo-rgb image are calculated when first used (default = False)
+    wavelengths       = Optional list of wavelengths to read, the closest band to each is kept
+                        (default = None, all bands)
+    roi               = Optional rectangular ROI as returned by pcv.roi.rectangle to read (default = None, whole image)
 
     Returns:
     spectral_array    = Hyperspectral data instance
 
     :param filename: str
     :param mode: str
+    :param memmap: bool
+    :param wavelengths: list
+    :param roi: plantcv.plantcv.classes.Objects
     :return spectral_array: __main__.Spectral_data
     """
     # Remove any file extension and set .hdr filename
@@ -247,9 +256,6 @@ def read_data(filename, mode="ENVI"):
     elif mode.upper() == "ARCGIS":
         header_dict, wavelength_dict = _parse_arcgis(headername=headername)
 
-    # Read in the data from the file
-    raw_data = np.fromfile(filename, header_dict["datatype"], -1)
-
     # Reshape the raw data into a datacube array
     data_format = {
         # Band Interleaved by Line (BIL)
@@ -280,7 +286,16 @@ def read_data(filename, mode="ENVI"):
     if interleave_type not in data_format:
         fatal_error(f"Interleave type {interleave_type} is not supported.")
 
-    # Reshape raw data into a data cube
+    subset = wavelengths is not None or roi is not None
+    if memmap or subset:
+        # Map the data file, only the parts of the file that are used are read
+        raw_data = np.memmap(filename, dtype=header_dict["datatype"], mode="r",
+                             shape=data_format[interleave_type]["reshape"])
+    else:
+        # Read in the data from the file
+        raw_data = np.fromfile(filename, header_dict["datatype"], -1)
+
+    # Reshape raw data into a data cube (a view of the data in file order)
     array_data = raw_data.reshape(data_format[interleave_type]["reshape"]
                                   ).transpose(data_format[interleave_type]["transpose"])
 
@@ -291,9 +306,31 @@ def read_data(filename, mode="ENVI"):
         header_dict["defaultbands"] = header_dict["defaultbands"].replace("}", "")
         default_bands = header_dict["defaultbands"].split(",")
 
-    # Find array min and max values
-    max_pixel = float(np.amax(array_data))
-    min_pixel = float(np.amin(array_data))
+    # Subset the lines and samples in the ROI
+    if roi is not None:
+        array_data = _rect_filter(array_data, roi=roi)
+    # Subset the bands closest to the requested wavelengths, in wavelength order
+    if wavelengths is not None:
+        bands = sorted({int(_find_closest(spectral_array=np.array(list(wavelength_dict)), target=wavelength))
+                        for wavelength in wavelengths})
+        array_data = array_data[:, :, bands]
+        header_dict["wavelength"] = [header_dict["wavelength"][band] for band in bands]
+        wavelength_dict = {float(wavelength): float(j) for j, wavelength in enumerate(header_dict["wavelength"])}
+        # Default bands are only kept if all of them were read
+        if default_bands is not None:
+            if all(int(band) in bands for band in default_bands):
+                default_bands = [str(bands.index(int(band))) for band in default_bands]
+            else:
+                default_bands = None
+    # Without memory-mapping, the subset is read into memory
+    if subset and not memmap:
+        array_data = np.array(array_data)
+
+    max_pixel = min_pixel = None
+    if not memmap:
+        # Find array min and max values
+        max_pixel = float(np.amax(array_data))
+        min_pixel = float(np.amin(array_data))
 
     wavelength_units = header_dict.get("wavelengthunits")
     if wavelength_units is None:
@@ -305,15 +342,22 @@ def read_data(filename, mode="ENVI"):
                                    min_wavelength=float(str(header_dict["wavelength"][0]).rstrip()),
                                    max_value=max_pixel, min_value=min_pixel,
                                    d_type=header_dict["datatype"],
-                                   wavelength_dict=wavelength_dict, samples=int(header_dict["samples"]),
-                                   lines=int(header_dict["lines"]), interleave=header_dict["interleave"],
+                                   wavelength_dict=wavelength_dict, samples=np.shape(array_data)[1],
+                                   lines=np.shape(array_data)[0], interleave=header_dict["interleave"],
                                    wavelength_units=wavelength_units, array_type="datacube",
                                    pseudo_rgb=None, filename=filename, default_bands=default_bands)
 
-    # Make pseudo-rgb image and replace it inside the class instance object
-    pseudo_rgb = _make_pseudo_rgb(spectral_array)
-    spectral_array.pseudo_rgb = pseudo_rgb
+    if memmap:
+        # Scanning the datacube and making the pseudo-rgb image are deferred until they are used
+        spectral_array._set_lazy(max_value=lambda: float(np.amax(array_data)),
+                                 min_value=lambda: float(np.amin(array_data)),
+                                 pseudo_rgb=lambda: _make_pseudo_rgb(spectral_array))
+    else:
+        # Make pseudo-rgb image and replace it inside the class instance object
+        spectral_array.pseudo_rgb = _make_pseudo_rgb(spectral_array)
 
-    _debug(visual=pseudo_rgb, filename=os.path.join(params.debug_outdir, str(params.device) + "_pseudo_rgb.png"))
+    if not memmap or params.debug is not None:
+        _debug(visual=spectral_array.pseudo_rgb,
+               filename=os.path.join(params.debug_outdir, str(params.device) + "_pseudo_rgb.png"))
 
     return spectral_array
@@ -2,14 +2,17 @@
 
 import os
 import numpy as np
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from joblib import load
 from plantcv.plantcv._debug import _debug
 from plantcv.plantcv import params
-from plantcv.learn.train_kmeans import patch_extract
+from plantcv.learn.train_kmeans import _blur, _iter_patches
 from plantcv.plantcv._helpers import _logical_operation
 
 
-def predict_kmeans(img, model_path="./kmeansout.fit", patch_size=10):
+def predict_kmeans(img, model_path="./kmeansout.fit", patch_size=10, batch_size=20000, n_workers=1):
     """Uses a trained, patch-based kmeans clustering model to predict clusters from an input image.
 
     Parameters
@@ -20,14 +23,19 @@ def predict_kmeans(img, model_path="./kmeansout.fit", patch_size=10):
         Path to directory where the trained model output is stored, by default "./kmeansout.fit"
     patch_size : int, optional
         Size of the NxN neighborhood around each pixel, by default 10
+    batch_size : int, optional
+        Approximate number of patches predicted at a time, by default 20000. Patches are copied from the image one
+        tile of rows at a time, so this caps the memory used for patches
+    n_workers : int, optional
+        Number of threads that predict tiles, by default 1
 
     Returns
     -------
     numpy.ndarray
         An labeled mask with the predicted clusters
     """
-    kmeans = load(model_path)
-    train_img = img.copy()
+    # The model is loaded once per file (and modification time)
+    kmeans = _load_model(model_path=model_path, mtime=os.path.getmtime(model_path))
 
     before = after = int((patch_size - 1)/2)   # odd
     if patch_size % 2 == 0:   # even
@@ -35,29 +43,47 @@ def predict_kmeans(img, model_path="./kmeansout.fit", patch_size=10):
         after = int(patch_size/2)
 
     # Padding
-    if len(train_img.shape) == 2:  # gray
-        train_img = np.pad(train_img, pad_width=((before, after), (before, after)), mode="edge")
-    elif len(train_img.shape) == 3 and train_img.shape[2] == 3:  # rgb
-        train_img = np.pad(train_img, pad_width=((before, after), (before, after), (0, 0)), mode="edge")
-
-    # Shapes
-    mg = np.floor(patch_size / 2).astype(np.int32)
-    if len(train_img.shape) == 2:
-        h, w = train_img.shape
-    elif len(train_img.shape) == 3 and train_img.shape[2] == 3:
-        h, w, _ = train_img.shape
-
-    # Do the prediction
-    train_patches = patch_extract(train_img, patch_size=patch_size)
-    train_labels = kmeans.predict(train_patches)
-    reshape_params = [[h - 2*mg + 1, w - 2*mg + 1], [h - 2*mg, w - 2*mg]]
-    # Takes care of even vs odd numbered patch size reshaping
-    labeled = train_labels.reshape(reshape_params[patch_size % 2][0], reshape_params[patch_size % 2][1])
-    labeled = labeled.astype("uint8")
+    if len(img.shape) == 2:  # gray
+        train_img = np.pad(img, pad_width=((before, after), (before, after)), mode="edge")
+    elif len(img.shape) == 3 and img.shape[2] == 3:  # rgb
+        train_img = np.pad(img, pad_width=((before, after), (before, after), (0, 0)), mode="edge")
+
+    # Do the prediction, one tile of patch rows at a time
+    tiles = _iter_patches(_blur(train_img), patch_size=patch_size, batch_size=batch_size)
+    with ThreadPoolExecutor(max_workers=n_workers) as executor:
+        labels = []
+        pending = deque()
+        for patches in tiles:
+            pending.append(executor.submit(kmeans.predict, patches))
+            # Limit the number of tiles in memory
+            if len(pending) > n_workers:
+                labels.append(pending.popleft().result().astype("uint8"))
+        labels += [tile.result().astype("uint8") for tile in pending]
+    # The padded image has one patch per pixel of the input image
+    labeled = np.concatenate(labels).reshape(img.shape[:2])
     _debug(visual=labeled, filename=os.path.join(params.debug_outdir, "_labeled_img.png"))
     return labeled
 
 
+@lru_cache(maxsize=8)
+def _load_model(model_path, mtime):
+    """Load a trained kmeans model.
+
+    Parameters
+    ----------
+    model_path : str
+        Path to the trained model
+    mtime : float
+        Modification time of the model file, used to invalidate the cache
+
+    Returns
+    -------
+    sklearn.cluster.MiniBatchKMeans
+        Trained kmeans model
+    """
+    return load(model_path)
+
+
 def mask_kmeans(labeled_img, k, cat_list=None):
     """Uses the predicted clusters from a target image to generate a binary mask.
 
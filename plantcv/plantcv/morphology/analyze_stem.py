@@ -4,7 +4,7 @@ import cv2
 import numpy as np
 from plantcv.plantcv import params
 from plantcv.plantcv import outputs
-from plantcv.plantcv._debug import _debug
+from plantcv.plantcv._debug import _debug, _build_visuals
 from plantcv.plantcv._helpers import _scale_size
 
 
@@ -30,8 +30,7 @@ def analyze_stem(rgb_img, stem_objects, label=None):
     if label is None:
         label = params.sample_label
 
-    labeled_img = np.copy(rgb_img)
-    img_x = np.shape(labeled_img)[0]
+    img_x = np.shape(rgb_img)[0]
     grouped_stem = np.vstack(stem_objects)
 
     # Find vertical height of the stem by measuring bounding box
@@ -54,17 +53,21 @@ def analyze_stem(rgb_img, stem_objects, label=None):
                             method='plantcv.plantcv.morphology.analyze_stem', scale=params.unit, datatype=float,
                             value=_scale_size(stem_length), label=params.unit)
 
-    # Draw culm_height
-    cv2.line(labeled_img, (int(stem_x), stem_y), (int(stem_x), stem_y + height), (0, 255, 0), params.line_thickness)
-    # Draw combined stem angle
-    x_min = 0  # Set bounds for regression lines to get drawn
-    x_max = img_x
-    intercept1 = int(np.array(((x - x_min) * slope) + y).item())
-    intercept2 = int(np.array(((x - x_max) * slope) + y).item())
-    if abs(slope) > 1000000:
-        print("Slope  is ", slope, " and cannot be plotted.")
-    else:
-        cv2.line(labeled_img, (x_max - 1, intercept2), (x_min, intercept1), (0, 0, 255), 1)
+    labeled_img = None
+    if _build_visuals():
+        labeled_img = np.copy(rgb_img)
+        # Draw culm_height
+        cv2.line(labeled_img, (int(stem_x), stem_y), (int(stem_x), stem_y + height), (0, 255, 0),
+                 params.line_thickness)
+        # Draw combined stem angle
+        x_min = 0  # Set bounds for regression lines to get drawn
+        x_max = img_x
+        intercept1 = int(np.array(((x - x_min) * slope) + y).item())
+        intercept2 = int(np.array(((x - x_max) * slope) + y).item())
+        if abs(slope) > 1000000:
+            print("Slope  is ", slope, " and cannot be plotted.")
+        else:
+            cv2.line(labeled_img, (x_max - 1, intercept2), (x_min, intercept1), (0, 0, 255), 1)
     _debug(visual=labeled_img, filename=os.path.join(params.debug_outdir, f"{params.device}_stem_analze.png"))
 
     return labeled_img
@@ -5,7 +5,7 @@ import numpy as np
 from plantcv.plantcv import params
 from plantcv.plantcv import outputs
 from plantcv.plantcv import color_palette
-from plantcv.plantcv._debug import _debug
+from plantcv.plantcv._debug import _debug, _build_visuals
 from plantcv.plantcv._helpers import _cv2_findcontours, _dilate, _erode
 
 
@@ -49,15 +49,17 @@ def check_cycles(skel_img, label=None):
     num_cycles = len(cycle_objects)
 
     # Make debugging image
-    cycle_img = skel_img.copy()
-    cycle_img = _dilate(cycle_img, params.line_thickness, 1)
-    cycle_img = cv2.cvtColor(cycle_img, cv2.COLOR_GRAY2RGB)
-    if num_cycles > 0:
-        # Get a new color scale
-        rand_color = color_palette(num=num_cycles, saved=False)
-        for i in range(0, len(cycle_objects)):
-            cv2.drawContours(cycle_img, cycle_objects, i, rand_color[i], params.line_thickness, lineType=8,
-                             hierarchy=cycle_hierarchies)
+    cycle_img = None
+    if _build_visuals():
+        cycle_img = skel_img.copy()
+        cycle_img = _dilate(cycle_img, params.line_thickness, 1)
+        cycle_img = cv2.cvtColor(cycle_img, cv2.COLOR_GRAY2RGB)
+        if num_cycles > 0:
+            # Get a new color scale
+            rand_color = color_palette(num=num_cycles, saved=False)
+            for i in range(0, len(cycle_objects)):
+                cv2.drawContours(cycle_img, cycle_objects, i, rand_color[i], params.line_thickness, lineType=8,
+                                 hierarchy=cycle_hierarchies)
 
     # Store Cycle Data
     outputs.add_observation(sample=label, variable='num_cycles', trait='number of cycles',
@@ -5,7 +5,7 @@ import numpy as np
 from skimage.segmentation import watershed
 from plantcv.plantcv import outputs, params
 from plantcv.plantcv.visualize import colorize_label_img
-from plantcv.plantcv._debug import _debug
+from plantcv.plantcv._debug import _debug, _build_visuals
 from plantcv.plantcv._helpers import _scale_size
 
 
@@ -68,10 +68,12 @@ def fill_segments(mask, objects, stem_objects=None, label=None):
                                 value=_scale_size(value=counts[-1].tolist(), trait_type="area"),
                                 label=(ids[-1]-1).tolist())
 
-    debug = params.debug
-    params.debug = None
-    filled_img = colorize_label_img(filled_mask)
-    params.debug = debug
+    filled_img = None
+    if _build_visuals():
+        debug = params.debug
+        params.debug = None
+        filled_img = colorize_label_img(filled_mask)
+        params.debug = debug
     _debug(visual=filled_img, filename=os.path.join(params.debug_outdir,
                                                     str(params.device) + "_filled_segments_img.png"))
 
@@ -4,7 +4,7 @@ import cv2
 import numpy as np
 from plantcv.plantcv import params
 from plantcv.plantcv import outputs
-from plantcv.plantcv._debug import _debug
+from plantcv.plantcv._debug import _debug, _build_visuals
 from plantcv.plantcv._helpers import _cv2_findcontours, _dilate
 
 
@@ -71,16 +71,18 @@ def find_branch_pts(skel_img, mask=None, label=None):
     branch_pts_img = branch_pts_img.astype(np.uint8) * 255
 
     # Make debugging image
-    if mask is None:
-        dilated_skel = _dilate(skel_img, params.line_thickness, 1)
-        branch_plot = cv2.cvtColor(dilated_skel, cv2.COLOR_GRAY2RGB)
-    else:
-        # Make debugging image on mask
-        mask_copy = mask.copy()
-        branch_plot = cv2.cvtColor(mask_copy, cv2.COLOR_GRAY2RGB)
-        skel_obj, skel_hier = _cv2_findcontours(bin_img=skel_img)
-        cv2.drawContours(branch_plot, skel_obj, -1, (150, 150, 150), params.line_thickness, lineType=8,
-                         hierarchy=skel_hier)
+    branch_plot = None
+    if _build_visuals():
+        if mask is None:
+            dilated_skel = _dilate(skel_img, params.line_thickness, 1)
+            branch_plot = cv2.cvtColor(dilated_skel, cv2.COLOR_GRAY2RGB)
+        else:
+            # Make debugging image on mask
+            mask_copy = mask.copy()
+            branch_plot = cv2.cvtColor(mask_copy, cv2.COLOR_GRAY2RGB)
+            skel_obj, skel_hier = _cv2_findcontours(bin_img=skel_img)
+            cv2.drawContours(branch_plot, skel_obj, -1, (150, 150, 150), params.line_thickness, lineType=8,
+                             hierarchy=skel_hier)
 
     branch_objects, _ = _cv2_findcontours(bin_img=branch_pts_img)
 
@@ -92,7 +94,8 @@ def find_branch_pts(skel_img, mask=None, label=None):
         coord = (int(x), int(y))
         branch_list.append(coord)
         branch_labels.append(i)
-        cv2.circle(branch_plot, (x, y), params.line_thickness, (255, 0, 255), -1)
+        if branch_plot is not None:
+            cv2.circle(branch_plot, (x, y), params.line_thickness, (255, 0, 255), -1)
 
     outputs.add_observation(sample=label, variable='branch_pts',
                             trait='list of branch-point coordinates identified from a skeleton',
@@ -5,7 +5,7 @@ import cv2
 import numpy as np
 from plantcv.plantcv import params
 from plantcv.plantcv.morphology import segment_sort, segment_skeleton
-from plantcv.plantcv._debug import _debug
+from plantcv.plantcv._debug import _debug, _build_visuals
 from plantcv.plantcv._helpers import _cv2_findcontours, _iterative_prune, _image_subtract
 
 
@@ -33,6 +33,8 @@ def prune(skel_img, size=0, mask=None):
     :return segmented_img: numpy.ndarray
     :return segment_objects: list
     """
+    # Check for diagnostic images before the debug mode is turned off
+    visuals = _build_visuals()
     # Store debug
     debug = params.debug
     params.debug = None
@@ -63,14 +65,16 @@ def prune(skel_img, size=0, mask=None):
         pruned_img = _iterative_prune(pruned_img, 1)
 
     # Make debugging image
-    if mask is None:
-        pruned_plot = np.zeros(skel_img.shape[:2], np.uint8)
-    else:
-        pruned_plot = mask.copy()
-    pruned_plot = cv2.cvtColor(pruned_plot, cv2.COLOR_GRAY2RGB)
-    pruned_obj, _ = _cv2_findcontours(bin_img=pruned_img)
-    cv2.drawContours(pruned_plot, removed_segments, -1, (0, 0, 255), params.line_thickness, lineType=8)
-    cv2.drawContours(pruned_plot, pruned_obj, -1, (150, 150, 150), params.line_thickness, lineType=8)
+    pruned_plot = None
+    if visuals:
+        if mask is None:
+            pruned_plot = np.zeros(skel_img.shape[:2], np.uint8)
+        else:
+            pruned_plot = mask.copy()
+        pruned_plot = cv2.cvtColor(pruned_plot, cv2.COLOR_GRAY2RGB)
+        pruned_obj, _ = _cv2_findcontours(bin_img=pruned_img)
+        cv2.drawContours(pruned_plot, removed_segments, -1, (0, 0, 255), params.line_thickness, lineType=8)
+        cv2.drawContours(pruned_plot, pruned_obj, -1, (150, 150, 150), params.line_thickness, lineType=8)
 
     # Segment the pruned skeleton
     segmented_img, segment_objects = segment_skeleton(pruned_img, mask)
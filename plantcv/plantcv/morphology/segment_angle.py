@@ -5,7 +5,7 @@ import numpy as np
 from plantcv.plantcv import params
 from plantcv.plantcv import outputs
 from plantcv.plantcv import color_palette
-from plantcv.plantcv._debug import _debug
+from plantcv.plantcv._debug import _debug, _build_visuals
 
 
 def segment_angle(segmented_img, objects, label=None):
@@ -34,10 +34,11 @@ def segment_angle(segmented_img, objects, label=None):
     label_coord_y = []
     segment_angles = []
 
-    labeled_img = segmented_img.copy()
-
-    # Use a previously saved color scale if available
-    rand_color = color_palette(num=len(objects), saved=True)
+    labeled_img = None
+    if _build_visuals():
+        labeled_img = segmented_img.copy()
+        # Use a previously saved color scale if available
+        rand_color = color_palette(num=len(objects), saved=True)
 
     for i, cnt in enumerate(objects):
         # Find bounds for regression lines to get drawn
@@ -54,7 +55,7 @@ def segment_angle(segmented_img, objects, label=None):
 
         if abs(slope) > 1000000:
             print("Slope of contour with ID#", i, "is", slope, "and cannot be plotted.")
-        else:
+        elif labeled_img is not None:
             # Draw slope lines
             cv2.line(labeled_img, (x_max - 1, right_list), (x_min, left_list), rand_color[i], 1)
 
@@ -72,8 +73,9 @@ def segment_angle(segmented_img, objects, label=None):
         w = label_coord_x[i]
         h = label_coord_y[i]
         text = f"{segment_angles[i]:0,.2f}"
-        cv2.putText(img=labeled_img, text=text, org=(w, h), fontFace=cv2.FONT_HERSHEY_SIMPLEX,
-                    fontScale=params.text_size, color=(150, 150, 150), thickness=params.text_thickness)
+        if labeled_img is not None:
+            cv2.putText(img=labeled_img, text=text, org=(w, h), fontFace=cv2.FONT_HERSHEY_SIMPLEX,
+                        fontScale=params.text_size, color=(150, 150, 150), thickness=params.text_thickness)
         segment_ids.append(i)
 
     outputs.add_observation(sample=label, variable='segment_angle', trait='segment angle',
@@ -2,7 +2,7 @@
 import os
 import numpy as np
 from plantcv.plantcv import params
-from plantcv.plantcv._debug import _debug
+from plantcv.plantcv._debug import _debug, _build_visuals
 from plantcv.plantcv._helpers import _find_segment_ends
 
 
@@ -26,14 +26,15 @@ def segment_ends(skel_img, leaf_objects, mask=None):
     :return inner_list: list
     :return tip_list: list
     """
+    # Skip the debug image if diagnostic images are not built
+    labeled_img = None
+    if _build_visuals():
+        labeled_img = skel_img.copy() if mask is None else mask.copy()
+
     # Store debug
     debug = params.debug
     params.debug = None
 
-    if mask is None:
-        labeled_img = skel_img.copy()
-    else:
-        labeled_img = mask.copy()
     # Find and sort segment ends, and create debug image
     labeled_img, tip_list, inner_list, _, objs = _find_segment_ends(
         skel_img=skel_img, leaf_objects=leaf_objects, plotting_img=labeled_img, size=1)
@@ -1,13 +1,12 @@
 """Find euclidean lengths of skeleton segments."""
 import os
 import cv2
-import numpy as np
 from plantcv.plantcv import params
 from plantcv.plantcv import outputs
 from plantcv.plantcv import fatal_error
 from plantcv.plantcv import color_palette
-from plantcv.plantcv._debug import _debug
-from plantcv.plantcv._helpers import _cv2_findcontours, _find_tips, _scale_size
+from plantcv.plantcv._debug import _debug, _build_visuals
+from plantcv.plantcv._helpers import _segment_tips, _scale_size
 from scipy.spatial.distance import euclidean
 
 
@@ -35,10 +34,11 @@ def segment_euclidean_length(segmented_img, objects, label=None):
     x_list = []
     y_list = []
     segment_lengths = []
-    # Create a color scale, use a previously stored scale if available
-    rand_color = color_palette(num=len(objects), saved=True)
-
-    labeled_img = segmented_img.copy()
+    labeled_img = None
+    if _build_visuals():
+        # Create a color scale, use a previously stored scale if available
+        rand_color = color_palette(num=len(objects), saved=True)
+        labeled_img = segmented_img.copy()
     # Store debug
     debug = params.debug
     params.debug = None
@@ -48,11 +48,8 @@ def segment_euclidean_length(segmented_img, objects, label=None):
         x_list.append(obj[0][0][0])
         y_list.append(obj[0][0][1])
 
-        # Draw segments one by one to group segment tips together
-        finding_tips_img = np.zeros(segmented_img.shape[:2], np.uint8)
-        cv2.drawContours(finding_tips_img, objects, i, (255, 255, 255), 1, lineType=8)
-        segment_tips, _, _ = _find_tips(finding_tips_img)
-        tip_objects, _ = _cv2_findcontours(bin_img=segment_tips)
+        # Find the tips of each segment
+        tip_objects = _segment_tips(segment=obj)
         points = []
         if not len(tip_objects) == 2:
             fatal_error("Too many tips found per segment, try pruning again")
@@ -63,7 +60,8 @@ def segment_euclidean_length(segmented_img, objects, label=None):
             points.append(coord)
 
         # Draw euclidean distance lines
-        cv2.line(labeled_img, points[0], points[1], rand_color[i], 1)
+        if labeled_img is not None:
+            cv2.line(labeled_img, points[0], points[1], rand_color[i], 1)
 
         # Calculate euclidean distance between tips of each contour
         segment_lengths.append(float(euclidean(points[0], points[1])))
@@ -77,8 +75,9 @@ def segment_euclidean_length(segmented_img, objects, label=None):
         text = f"{value:0,.2f}"
         w = x_list[c]
         h = y_list[c]
-        cv2.putText(img=labeled_img, text=text, org=(w, h), fontFace=cv2.FONT_HERSHEY_SIMPLEX,
-                    fontScale=params.text_size, color=(150, 150, 150), thickness=params.text_thickness)
+        if labeled_img is not None:
+            cv2.putText(img=labeled_img, text=text, org=(w, h), fontFace=cv2.FONT_HERSHEY_SIMPLEX,
+                        fontScale=params.text_size, color=(150, 150, 150), thickness=params.text_thickness)
         segment_ids.append(c)
 
     outputs.add_observation(sample=label, variable='segment_eu_length', trait='segment euclidean length',
@@ -7,7 +7,7 @@ from plantcv.plantcv import outputs
 from plantcv.plantcv import fatal_error
 from plantcv.plantcv import color_palette
 from plantcv.plantcv.morphology.segment_tangent_angle import _slope_to_intersect_angle
-from plantcv.plantcv._debug import _debug
+from plantcv.plantcv._debug import _debug, _build_visuals
 from plantcv.plantcv._helpers import _cv2_findcontours, _find_tips, _iterative_prune, _logical_operation, _dilate, _closing
 
 
@@ -43,7 +43,7 @@ def segment_insertion_angle(skel_img, segmented_img, leaf_objects, stem_objects,
         label = params.sample_label
 
     cols = segmented_img.shape[1]
-    labeled_img = segmented_img.copy()
+    labeled_img = segmented_img.copy() if _build_visuals() else None
     segment_slopes = []
     insertion_segments = []
     insertion_hierarchies = []
@@ -94,11 +94,12 @@ def segment_insertion_angle(skel_img, segmented_img, leaf_objects, stem_objects,
             label_coord_x.append(leaf_objects[i][0][0][0])
             label_coord_y.append(leaf_objects[i][0][0][1])
 
-    # Create a color scale, use a previously stored scale if available
-    rand_color = color_palette(num=len(valid_segment), saved=True)
+    if labeled_img is not None:
+        # Create a color scale, use a previously stored scale if available
+        rand_color = color_palette(num=len(valid_segment), saved=True)
 
-    for i, cnt in enumerate(valid_segment):
-        cv2.drawContours(labeled_img, valid_segment, i, rand_color[i], params.line_thickness, lineType=8)
+        for i, cnt in enumerate(valid_segment):
+            cv2.drawContours(labeled_img, valid_segment, i, rand_color[i], params.line_thickness, lineType=8)
 
     # Plot stem segments
     combined_stem = _combine_stem(segmented_img, stem_objects)
@@ -108,7 +109,8 @@ def segment_insertion_angle(skel_img, segmented_img, leaf_objects, stem_objects,
     stem_slope = stem_slope[0]
     lefty = int(np.array((-x * vy / vx) + y).item())
     righty = int(np.array(((cols - x) * vy / vx) + y).item())
-    cv2.line(labeled_img, (cols - 1, righty), (0, lefty), (150, 150, 150), 3)
+    if labeled_img is not None:
+        cv2.line(labeled_img, (cols - 1, righty), (0, lefty), (150, 150, 150), 3)
 
     for t, segment in enumerate(insertion_segments):
         # Find line fit to each segment
@@ -121,7 +123,7 @@ def segment_insertion_angle(skel_img, segmented_img, leaf_objects, stem_objects,
         # Draw slope lines if possible
         if abs(slope) > 1000000:
             print("Slope of contour with ID#", t, "is", slope, "and cannot be plotted.")
-        else:
+        elif labeled_img is not None:
             cv2.line(labeled_img, (cols - 1, right_list), (0, left_list), rand_color[t], 1)
 
         # Store intersection angles between insertion segment and stem line
@@ -147,8 +149,9 @@ def segment_insertion_angle(skel_img, segmented_img, leaf_objects, stem_objects,
         w = label_coord_x[i]
         h = label_coord_y[i]
         text = f"{intersection_angles[i]:0,.2f}"
-        cv2.putText(img=labeled_img, text=text, org=(w, h), fontFace=cv2.FONT_HERSHEY_SIMPLEX,
-                    fontScale=params.text_size, color=(150, 150, 150), thickness=params.text_thickness)
+        if labeled_img is not None:
+            cv2.putText(img=labeled_img, text=text, org=(w, h), fontFace=cv2.FONT_HERSHEY_SIMPLEX,
+                        fontScale=params.text_size, color=(150, 150, 150), thickness=params.text_thickness)
         segment_ids.append(i)
 
     outputs.add_observation(sample=label, variable='segment_insertion_angle', trait='segment insertion angle',
@@ -2,7 +2,7 @@
 import os
 import cv2
 from plantcv.plantcv import params, outputs
-from plantcv.plantcv._debug import _debug
+from plantcv.plantcv._debug import _debug, _build_visuals
 from plantcv.plantcv._helpers import _scale_size
 
 
@@ -30,7 +30,7 @@ def segment_path_length(segmented_img, objects, label=None):
     label_coord_x = []
     label_coord_y = []
     segment_lengths = []
-    labeled_img = segmented_img.copy()
+    labeled_img = segmented_img.copy() if _build_visuals() else None
 
     for obj in objects:
         # Calculate geodesic distance, divide by two since cv2 seems to be taking the perimeter of the contour
@@ -45,8 +45,9 @@ def segment_path_length(segmented_img, objects, label=None):
         text = f"{value:0,.2f}"
         w = label_coord_x[c]
         h = label_coord_y[c]
-        cv2.putText(img=labeled_img, text=text, org=(w, h), fontFace=cv2.FONT_HERSHEY_SIMPLEX,
-                    fontScale=params.text_size, color=(150, 150, 150), thickness=params.text_thickness)
+        if labeled_img is not None:
+            cv2.putText(img=labeled_img, text=text, org=(w, h), fontFace=cv2.FONT_HERSHEY_SIMPLEX,
+                        fontScale=params.text_size, color=(150, 150, 150), thickness=params.text_thickness)
         segment_ids.append(c)
 
     outputs.add_observation(sample=label, variable='segment_path_length', trait='segment path length',
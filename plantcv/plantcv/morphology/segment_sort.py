@@ -5,7 +5,7 @@ import cv2
 import numpy as np
 from plantcv.plantcv import params
 from plantcv.plantcv._helpers import _find_tips, _logical_operation, _dilate
-from plantcv.plantcv._debug import _debug
+from plantcv.plantcv._debug import _debug, _build_visuals
 
 
 def segment_sort(skel_img, objects, mask=None, first_stem=True):
@@ -32,11 +32,6 @@ def segment_sort(skel_img, objects, mask=None, first_stem=True):
     secondary_objects = []
     primary_objects = []
 
-    if mask is None:
-        labeled_img = np.zeros(skel_img.shape[:2], np.uint8)
-    else:
-        labeled_img = mask.copy()
-
     tips_img, _, _ = _find_tips(skel_img)
     tips_img = _dilate(tips_img, 3, 1)
 
@@ -59,11 +54,17 @@ def segment_sort(skel_img, objects, mask=None, first_stem=True):
                 primary_objects.append(cnt)
 
     # Plot segments where green segments are leaf objects and fuschia are other objects
-    labeled_img = cv2.cvtColor(labeled_img, cv2.COLOR_GRAY2RGB)
-    for i, cnt in enumerate(primary_objects):
-        cv2.drawContours(labeled_img, primary_objects, i, (255, 0, 255), params.line_thickness, lineType=8)
-    for i, cnt in enumerate(secondary_objects):
-        cv2.drawContours(labeled_img, secondary_objects, i, (0, 255, 0), params.line_thickness, lineType=8)
+    labeled_img = None
+    if _build_visuals():
+        if mask is None:
+            labeled_img = np.zeros(skel_img.shape[:2], np.uint8)
+        else:
+            labeled_img = mask.copy()
+        labeled_img = cv2.cvtColor(labeled_img, cv2.COLOR_GRAY2RGB)
+        for i, cnt in enumerate(primary_objects):
+            cv2.drawContours(labeled_img, primary_objects, i, (255, 0, 255), params.line_thickness, lineType=8)
+        for i, cnt in enumerate(secondary_objects):
+            cv2.drawContours(labeled_img, secondary_objects, i, (0, 255, 0), params.line_thickness, lineType=8)
 
     _debug(visual=labeled_img, filename=os.path.join(params.debug_outdir, f"{params.device}_sorted_segments.png"))
 
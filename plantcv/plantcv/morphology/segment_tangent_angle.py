@@ -6,7 +6,7 @@ import pandas as pd
 from plantcv.plantcv import params
 from plantcv.plantcv import outputs
 from plantcv.plantcv import color_palette
-from plantcv.plantcv._debug import _debug
+from plantcv.plantcv._debug import _debug, _build_visuals
 from plantcv.plantcv._helpers import _cv2_findcontours, _iterative_prune
 
 
@@ -57,25 +57,30 @@ def segment_tangent_angle(segmented_img, objects, size, label=None):
     if label is None:
         label = params.sample_label
 
+    labeled_img = None
+    if _build_visuals():
+        labeled_img = segmented_img.copy()
+        # Create a color scale, use a previously stored scale if available
+        rand_color = color_palette(num=len(objects), saved=True)
+
     # Store debug
     debug = params.debug
     params.debug = None
 
-    labeled_img = segmented_img.copy()
     intersection_angles = []
     label_coord_x = []
     label_coord_y = []
 
-    # Create a color scale, use a previously stored scale if available
-    rand_color = color_palette(num=len(objects), saved=True)
-
     for i, cnt in enumerate(objects):
-        find_tangents = np.zeros(segmented_img.shape[:2], np.uint8)
-        cv2.drawContours(find_tangents, objects, i, 255, 1, lineType=8)
-        cv2.drawContours(labeled_img, objects, i, rand_color[i], params.line_thickness, lineType=8)
+        # Draw the segment on an image the size of its bounding box, with a background border
+        seg_x, seg_y, seg_w, seg_h = cv2.boundingRect(cnt)
+        find_tangents = np.zeros((seg_h + 2, seg_w + 2), np.uint8)
+        cv2.drawContours(find_tangents, objects, i, 255, 1, lineType=8, offset=(1 - seg_x, 1 - seg_y))
+        if labeled_img is not None:
+            cv2.drawContours(labeled_img, objects, i, rand_color[i], params.line_thickness, lineType=8)
         pruned_segment = _iterative_prune(find_tangents, size)
         segment_ends = find_tangents - pruned_segment
-        segment_end_obj, _ = _cv2_findcontours(bin_img=segment_ends)
+        segment_end_obj, _ = _cv2_findcontours(bin_img=segment_ends, offset=(seg_x - 1, seg_y - 1))
         slopes = []
         for obj in segment_end_obj:
             # Find bounds for regression lines to get drawn
@@ -94,7 +99,7 @@ def segment_tangent_angle(segmented_img, objects, size, label=None):
 
             if abs(slope) > 1000000:
                 print("Slope of contour with ID#", i, "is", slope, "and cannot be plotted.")
-            else:
+            elif labeled_img is not None:
                 # Draw slope lines
                 cv2.line(labeled_img, (x_max - 1, right_list), (x_min, left_list), rand_color[i], 1)
 
@@ -126,8 +131,9 @@ def segment_tangent_angle(segmented_img, objects, size, label=None):
             text = f"{intersection_angles[i]}"
         else:
             text = f"{intersection_angles[i]:0,.2f}"
-        cv2.putText(img=labeled_img, text=text, org=(w, h), fontFace=cv2.FONT_HERSHEY_SIMPLEX,
-                    fontScale=params.text_size, color=(150, 150, 150), thickness=params.text_thickness)
+        if labeled_img is not None:
+            cv2.putText(img=labeled_img, text=text, org=(w, h), fontFace=cv2.FONT_HERSHEY_SIMPLEX,
+                        fontScale=params.text_size, color=(150, 150, 150), thickness=params.text_thickness)
         segment_ids.append(i)
 
     outputs.add_observation(sample=label, variable='segment_tangent_angle', trait='segment tangent angle',
@@ -5,7 +5,7 @@ import cv2
 import numpy as np
 from plantcv.plantcv import outputs, params
 from plantcv.plantcv._helpers import _scale_size, _dilate
-from plantcv.plantcv._debug import _debug
+from plantcv.plantcv._debug import _debug, _build_visuals
 
 
 def segment_width(segmented_img, skel_img, labeled_mask, n_labels=1, label=None):
@@ -34,7 +34,7 @@ def segment_width(segmented_img, skel_img, labeled_mask, n_labels=1, label=None)
     stdevs = []
     max_width = []
     dilated_midline = _dilate(skel_img, 2, 1)
-    labeled_img = segmented_img.copy()
+    labeled_img = segmented_img.copy() if _build_visuals() else None
 
     for i in range(1, n_labels + 1):
         submask = np.where(labeled_mask == i, 255, 0).astype(np.uint8)
@@ -63,7 +63,7 @@ def segment_width(segmented_img, skel_img, labeled_mask, n_labels=1, label=None)
                 stdevs.append(width_std.astype(np.float64))
                 max_width.append(stroke_width_max.astype(np.float64))
                 text = str(int(stroke_width))
-                if params.verbose:
+                if params.verbose and labeled_img is not None:
                     cv2.putText(img=labeled_img, text=text,
                                 org=(label_coord_x, label_coord_y),
                                 fontFace=cv2.FONT_HERSHEY_SIMPLEX,
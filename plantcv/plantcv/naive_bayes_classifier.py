@@ -1,81 +1,68 @@
 # Classify pixels as plant or non-plant using the naive Bayes method written by Arash Abbasi,
 # adapted for Python by Noah Fahlgren
 
-import cv2
 import numpy as np
 import os
+from functools import lru_cache
 from plantcv.plantcv._debug import _debug
+from plantcv.plantcv._helpers import _convert_colorspace
 from plantcv.plantcv import fatal_error
 from plantcv.plantcv import params
 
 
+# Color channels of the PDFs, in the order of the HSV image channels
+NB_CHANNELS = ("hue", "saturation", "value")
+
+
 def naive_bayes_classifier(rgb_img, pdf_file):
     """
     Use the Naive Bayes classifier to output a plant binary mask.
 
     Inputs:
-    rgb_img      = RGB image data
+    rgb_img      = RGB image data, or a list of RGB images to classify with the same model
     pdf_file = filename of file containing PDFs output from the Naive Bayes training method (see plantcv-train.py)
 
     Returns:
-    mask     = Dictionary of binary masks
+    mask     = Dictionary of binary masks (or a list of dictionaries for a list of images)
 
-    :param rgb_img: numpy.ndarray
+    :param rgb_img: numpy.ndarray or list
     :param pdf_file: str
+    :return masks: dict or list
+    """
+    # The model is read and compiled once per PDF file (and modification time)
+    class_names, lut = _naive_bayes_lut(pdf_file=pdf_file, mtime=os.path.getmtime(pdf_file))
+
+    if isinstance(rgb_img, (list, tuple)):
+        return [_classify(rgb_img=img, class_names=class_names, lut=lut) for img in rgb_img]
+    return _classify(rgb_img=rgb_img, class_names=class_names, lut=lut)
+
+
+def _classify(rgb_img, class_names, lut):
+    """Classify the pixels of an image with a compiled naive Bayes model.
+
+    Inputs:
+    rgb_img     = RGB image data
+    class_names = Names of the classes
+    lut         = Class index of each HSV color, indexed by (hue << 16) | (saturation << 8) | value
+
+    Returns:
+    masks       = Dictionary of binary masks
+
+    :param rgb_img: numpy.ndarray
+    :param class_names: tuple
+    :param lut: numpy.ndarray
     :return masks: dict
     """
-    # Initialize PDF dictionary
-    pdfs = {}
-    # Read the PDF file
-    pf = open(pdf_file, "r")
-    # Read the first line (header)
-    pf.readline()
-    # Read each line of the file and parse the PDFs, store in the PDF dictionary
-    for row in pf:
-        # Remove newline character
-        row = row.rstrip("\n")
-        # Split the row into columns on tab characters
-        cols = row.split("\t")
-        # Make sure there are the correct number of columns (i.e. is this a valid PDF file?)
-        if len(cols) != 258:
-            fatal_error("Naive Bayes PDF file is not formatted correctly. Error on line:\n" + row)
-        # Store the PDFs. Column 0 is the class, Column 1 is the color channel, the rest are p at
-        # intensity values 0-255. Cast text p values as float
-        class_name = cols[0]
-        channel = cols[1]
-        if class_name not in pdfs:
-            pdfs[class_name] = {}
-        pdfs[class_name][channel] = np.array([float(i) for i in cols[2:]])
-
-    # Split the input BGR image into component channels for BGR, HSV, and LAB colorspaces
-    h, s, v = cv2.split(cv2.cvtColor(rgb_img, cv2.COLOR_BGR2HSV))
-
-    # Calculate the dimensions of the input image
-    width, height, _ = np.shape(rgb_img)
-
-    # Linearize the color channel arrays
-    hIdx = h.reshape(width * height).tolist()
-    sIdx = s.reshape(width * height).tolist()
-    vIdx = v.reshape(width * height).tolist()
-
-    # Calculate the joint probability that this is in the class
-    class_arrs = []
-    for class_name in pdfs:
-        # Joint probability array
-        arr = pdfs[class_name]["hue"][hIdx] * \
-            pdfs[class_name]["saturation"][sIdx] * \
-            pdfs[class_name]["value"][vIdx]
-        # Append the joint probability array to the list of class arrays
-        class_arrs.append(arr.reshape(width, height))
-
-    # Stacked class arrays
-    stacked_arr = np.dstack(class_arrs)
-    # Create an array that labels which class has the highest probability
-    class_mask = np.argmax(stacked_arr, axis=2)
+    # Convert the input BGR image to the HSV colorspace
+    hsv = _convert_colorspace(rgb_img=rgb_img, conversion="hsv")
+    h, s, v = hsv[:, :, 0], hsv[:, :, 1], hsv[:, :, 2]
+
+    # Look up the class with the highest probability for each pixel
+    class_mask = lut[(h.astype(np.intp) << 16) | (s.astype(np.intp) << 8) | v]
 
     # Create the class masks
     masks = {}
-    for i, class_name in enumerate(pdfs):
+    for i, class_name in enumerate(class_names):
         # Set pixel intensities to 255 (white) where the class has the highest probability
         masks[class_name] = np.where(class_mask == i, 255, 0).astype(np.uint8)
 
@@ -85,3 +72,73 @@ def naive_bayes_classifier(rgb_img, pdf_file):
                cmap='gray')
 
     return masks
+
+
+def _read_pdfs(pdf_file):
+    """Read the PDFs of a naive Bayes model file.
+
+    Inputs:
+    pdf_file = filename of file containing PDFs output from the Naive Bayes training method
+
+    Returns:
+    pdfs     = Dictionary of the PDFs of each class, keyed by color channel
+
+    :param pdf_file: str
+    :return pdfs: dict
+    """
+    # Initialize PDF dictionary
+    pdfs = {}
+    # Read the PDF file
+    with open(pdf_file, "r") as pf:
+        # Read the first line (header)
+        pf.readline()
+        # Read each line of the file and parse the PDFs, store in the PDF dictionary
+        for row in pf:
+            # Remove newline character
+            row = row.rstrip("\n")
+            # Split the row into columns on tab characters
+            cols = row.split("\t")
+            # Make sure there are the correct number of columns (i.e. is this a valid PDF file?)
+            if len(cols) != 258:
+                fatal_error("Naive Bayes PDF file is not formatted correctly. Error on line:\n" + row)
+            # Store the PDFs. Column 0 is the class, Column 1 is the color channel, the rest are p at
+            # intensity values 0-255. Cast text p values as float
+            class_name = cols[0]
+            channel = cols[1]
+            if class_name not in pdfs:
+                pdfs[class_name] = {}
+            pdfs[class_name][channel] = np.array(cols[2:], dtype=float)
+    return pdfs
+
+
+@lru_cache(maxsize=8)
+def _naive_bayes_lut(pdf_file, mtime):
+    """Compile a naive Bayes model into a lookup table of the most probable class of each HSV color.
+
+    Inputs:
+    pdf_file    = filename of file containing PDFs output from the Naive Bayes training method
+    mtime       = modification time of the file, used to invalidate the cache
+
+    Returns:
+    class_names = Names of the classes
+    lut         = Class index of each HSV color, indexed by (hue << 16) | (saturation << 8) | value
+
+    :param pdf_file: str
+    :param mtime: float
+    :return class_names: tuple
+    :return lut: numpy.ndarray
+    """
+    pdfs = _read_pdfs(pdf_file=pdf_file)
+    class_names = tuple(pdfs)
+    # PDFs of each class (rows) and channel
+    hue, sat, val = (np.array([pdfs[class_name][channel] for class_name in class_names]) for channel in NB_CHANNELS)
+
+    lut = np.zeros((256, 256, 256), dtype=np.uint8 if len(class_names) <= 256 else np.uint16)
+    for h in range(0, 256):
+        # Joint probability that each saturation (rows) and value (columns) color with hue h is in each class,
+        # multiplied in the same order as per pixel so that ties are broken the same way
+        joint = hue[:, h, None, None] * sat[:, :, None] * val[:, None, :]
+        # The class that has the highest probability
+        lut[h] = np.argmax(joint, axis=0)
+    lut.flags.writeable = False
+    return class_names, lut.reshape(-1)
@@ -5,6 +5,21 @@ from plantcv.plantcv.classes import PSII_data
 from plantcv.plantcv import params
 
 
+# Prime is empty for Fv/Fm (dark- and light-adapted) and p for Fq'/Fm'
+DATASETS = {
+    "ojip_light": {
+        "prime": "p",
+        "label": "PSL",
+        "F": "Fp"
+    },
+    "ojip_dark": {
+        "prime": "",
+        "label": "PSD",
+        "F": "F0"
+    }
+}
+
+
 def reassign_frame_labels(ps_da, mask):
     """
     Analyze fluorescence induction curve and assign Fm or Fmp frame labels.
@@ -41,37 +56,62 @@ def reassign_frame_labels(ps_da, mask):
     if mask.shape != ps_da.shape[:2] or len(np.unique(mask)) > 2:
         fatal_error(f"Mask needs to be binary and have shape {ps_da.shape[:2]}")
 
-    # Prime is empty for Fv/Fm (dark- and light-adapted) and p for Fq'/Fm'
-    datasets = {
-        "ojip_light": {
-            "prime": "p",
-            "label": "PSL",
-            "F": "Fp"
-        },
-        "ojip_dark": {
-            "prime": "",
-            "label": "PSD",
-            "F": "F0"
-        }
-    }
-
     # Get the number of frame labels
     ind_size = ps_da.frame_label.size
     # Create a new frame label array populated with the current labels
     idx = ps_da.frame_label.values
     # Find the frame corresponding to the first frame after F0/Fp
-    f = idx.tolist().index(datasets[ps_da.name.lower()]['F']) + 1
+    f = idx.tolist().index(DATASETS[ps_da.name.lower()]['F']) + 1
     # Reset the frame labels after F0/Fp
     for i in range(f, ind_size):
-        idx[i] = f"{datasets[ps_da.name.lower()]['label']}{i}"
+        idx[i] = f"{DATASETS[ps_da.name.lower()]['label']}{i}"
     # get plant mean for each frame based on mask
     exp_mask = np.copy(mask)[..., None, None]
     fluor_values = ps_da.where(exp_mask > 0).mean(['x', 'y', 'measurement'])
     # find frame with max mean after the control and F/F' frames
     max_ind = np.argmax(fluor_values.data[f:])
     # assign max frame label
-    idx[max_ind + f] = f"Fm{datasets[ps_da.name.lower()]['prime']}"
+    idx[max_ind + f] = f"Fm{DATASETS[ps_da.name.lower()]['prime']}"
     # assign new labels back to dataarray
     ps_da = ps_da.assign_coords({'frame_label': ('frame_label', idx)})
 
     return ps_da
+
+
+def _fm_frames(ps_da, pixels, bounds):
+    """
+    Find the frame with the maximum mean fluorescence of each labeled region.
+
+    This is the frame reassign_frame_labels labels Fm or Fmp, found for all labeled regions of a mask at once.
+
+    Inputs:
+    ps_da       = photosynthesis xarray DataArray
+    pixels      = row and column indices of the pixels of all labeled regions, grouped by label
+    bounds      = positions in the pixel indices where each labeled region starts, and the end of the last region
+
+    Returns:
+    fm_frames   = index of the Fm or Fmp frame of each labeled region
+
+    :param ps_da: xarray.core.dataarray.DataArray
+    :param pixels: tuple
+    :param bounds: numpy.ndarray
+    :return fm_frames: numpy.ndarray
+    """
+    if ps_da.name not in ["ojip_light", "ojip_dark"]:
+        fatal_error("You must provide a xarray DataArray with name ojip_light or ojip_dark")
+
+    # Find the frame corresponding to the first frame after F0/Fp
+    f = ps_da.frame_label.values.tolist().index(DATASETS[ps_da.name.lower()]['F']) + 1
+    # Region number of each pixel
+    n_pixels = np.diff(bounds)
+    regions = np.repeat(np.arange(len(n_pixels)), n_pixels)
+    # Sum of the fluorescence of each region in each frame, over all measurements
+    fluor_sums = np.zeros((len(n_pixels), ps_da.frame_label.size))
+    for frame in range(ps_da.frame_label.size):
+        fluor_sums[:, frame] = np.bincount(regions, weights=ps_da.values[pixels[0], pixels[1], frame].sum(axis=-1),
+                                           minlength=len(n_pixels))
+    # get region mean for each frame, NaN for empty regions
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fluor_values = fluor_sums / (n_pixels[:, None] * ps_da.measurement.size)
+    # find frame with max mean after the control and F/F' frames
+    return np.argmax(fluor_values[:, f:], axis=1) + f
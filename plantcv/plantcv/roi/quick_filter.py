@@ -122,9 +122,10 @@ def _quick_cutto(mask, roi):
     label_mask_where = np.where(cropped_mask == 255, labeled_mask, 0)
 
     # Print/plot debug image
-    colorful = label2rgb(label_mask_where)
-    colorful2 = (255*colorful).astype(np.uint8)
     params.debug = debug
-    _debug(visual=colorful2, filename=os.path.join(params.debug_outdir, f"{params.device}_label_colored_mask.png"))
+    if params.debug is not None:
+        colorful = label2rgb(label_mask_where)
+        colorful2 = (255*colorful).astype(np.uint8)
+        _debug(visual=colorful2, filename=os.path.join(params.debug_outdir, f"{params.device}_label_colored_mask.png"))
 
     return cropped_mask.astype(np.uint8), label_mask_where, num_labels
@@ -185,6 +185,9 @@ def _draw_roi(img, roi_contour):
     roi_contour : list
         A list of contours and hierarchies for the ROI.
     """
+    # The ROI image is only for debugging
+    if params.debug is None:
+        return
     # Make a copy of the reference image
     ref_img = np.copy(img)
     # If the reference image is grayscale convert it to color
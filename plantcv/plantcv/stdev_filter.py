@@ -4,15 +4,13 @@
 import os
 import numpy as np
 from plantcv.plantcv._debug import _debug
-from plantcv.plantcv._helpers import _rect_filter, _rect_replace
+from plantcv.plantcv._helpers import _rect_filter, _rect_replace, _pad_borders, _box_sum
 from plantcv.plantcv import params
-from scipy.ndimage import generic_filter
 
 
 def stdev_filter(img, ksize, borders='nearest', roi=None):
     """
     Creates a binary image from a grayscale image using skimage texture calculation for thresholding.
-    This function is quite slow.
 
     Inputs:
     gray_img       = Grayscale image data
@@ -36,7 +34,7 @@ def stdev_filter(img, ksize, borders='nearest', roi=None):
     sub_zeros = _rect_filter(output, roi)
     sub_img = _rect_filter(img, roi)
     # Apply the texture function over the subset image
-    generic_filter(sub_img, np.std, size=ksize, output=sub_zeros, mode=borders)
+    sub_zeros[:] = _box_std(sub_img, ksize=ksize, borders=borders)
     # re-insert the subset into the full size mask
     replaced = _rect_replace(img, sub_zeros, roi)
 
@@ -44,3 +42,45 @@ def stdev_filter(img, ksize, borders='nearest', roi=None):
            filename=os.path.join(params.debug_outdir, str(params.device) + "_variance.png"))
 
     return replaced
+
+
+def _box_std(img, ksize, borders):
+    """
+    Calculate the standard deviation of each ksize x ksize neighborhood of an image from box sums of the pixel values
+    and squared pixel values. The result is the same as generic_filter(img, np.std, size=ksize, mode=borders).
+
+    Inputs:
+    img            = Grayscale image data
+    ksize          = Kernel size
+    borders        = How the array borders are handled, either 'reflect',
+                     'constant', 'nearest', 'mirror', or 'wrap'
+
+    Returns:
+    std            = Standard deviation values (float)
+
+    :param img: numpy.ndarray
+    :param ksize: int
+    :param borders: str
+    :return std: numpy.ndarray
+    """
+    n = ksize * ksize
+    padded = _pad_borders(img, ksize=ksize, borders=borders)
+    rows, cols = np.shape(img)
+    # Small integer sums are exact: n * n * var = n * sum(x^2) - sum(x)^2
+    if img.dtype.kind in "biu" and img.size > 0 and n ** 2 * int(np.max(np.abs(padded))) ** 2 < 2 ** 63:
+        values = padded.astype(np.int64)
+        var = (n * _box_sum(values ** 2, ksize, ksize) - _box_sum(values, ksize, ksize) ** 2) / n ** 2
+    else:
+        # Other images are summed over the neighborhood offsets in two passes, like np.std, to avoid rounding errors
+        values = padded.astype(np.float64)
+        mean = np.zeros((rows, cols))
+        for i in range(ksize):
+            for j in range(ksize):
+                mean += values[i:i + rows, j:j + cols]
+        mean /= n
+        var = np.zeros((rows, cols))
+        for i in range(ksize):
+            for j in range(ksize):
+                var += (values[i:i + rows, j:j + cols] - mean) ** 2
+        var /= n
+    return np.sqrt(var)
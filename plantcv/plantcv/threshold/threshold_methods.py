@@ -6,9 +6,15 @@ import numpy as np
 from matplotlib import pyplot as plt
 from plantcv.plantcv import fatal_error, warn, params
 from plantcv.plantcv._debug import _debug
-from plantcv.plantcv._helpers import _rgb2lab, _rgb2hsv, _rgb2gray, _rgb2cmyk
+from plantcv.plantcv._helpers import _rgb2lab, _rgb2hsv, _rgb2gray, _rgb2cmyk, _pad_borders, _box_sum, \
+    _convert_colorspace
 from skimage.feature import graycomatrix, graycoprops
 from scipy.ndimage import generic_filter
+from concurrent.futures import ThreadPoolExecutor
+
+
+# GLCM texture features calculated by sums over the pixel pairs of each kernel
+GLCM_PROPS = ("contrast", "dissimilarity", "homogeneity", "ASM", "energy", "correlation", "mean", "variance", "std")
 
 
 # Binary threshold
@@ -284,7 +290,6 @@ def triangle(gray_img, object_type="light", xstep=1):
 
 def texture(gray_img, ksize, threshold, offset=3, texture_method='dissimilarity', borders='nearest'):
     """Creates a binary image from a grayscale image using skimage texture calculation for thresholding.
-    This function is quite slow.
 
     Inputs:
     gray_img       = Grayscale image data
@@ -334,8 +339,13 @@ def texture(gray_img, ksize, threshold, offset=3, texture_method='dissimilarity'
     # Make an array the same size as the original image
     output = np.zeros(gray_img.shape, dtype=gray_img.dtype)
 
-    # Apply the texture function over the whole image
-    generic_filter(gray_img, calc_texture, size=ksize, output=output, mode=borders)
+    if texture_method in GLCM_PROPS and 0 <= offset < ksize:
+        # Calculate the texture of all kernels at once from sums over their pixel pairs
+        output[:] = _glcm_texture(gray_img, ksize=ksize, offset=offset, texture_method=texture_method,
+                                  borders=borders)
+    else:
+        # Apply the texture function over the whole image
+        generic_filter(gray_img, calc_texture, size=ksize, output=output, mode=borders)
 
     # Threshold so higher texture measurements stand out
     bin_img = binary(gray_img=output, threshold=threshold, object_type='light')
@@ -345,6 +355,124 @@ def texture(gray_img, ksize, threshold, offset=3, texture_method='dissimilarity'
     return bin_img
 
 
+def _glcm_texture(gray_img, ksize, offset, texture_method, borders):
+    """Calculate a grey level co-occurrence matrix (GLCM) texture feature of the kernel around each pixel.
+
+    The result is the same as graycoprops(graycomatrix(kernel, [offset], [0], 256, symmetric=True, normed=True))
+    for each ksize x ksize kernel, but every feature is calculated from sums over the horizontal pixel pairs of all
+    kernels at once. Row tiles of the image are processed in parallel threads.
+
+    Inputs:
+    gray_img       = Grayscale image data
+    ksize          = Kernel size for texture measure calculation
+    offset         = Distance offset (less than ksize)
+    texture_method = Feature of a grey level co-occurrence matrix, one of GLCM_PROPS
+    borders        = How the array borders are handled, either 'reflect',
+                     'constant', 'nearest', 'mirror', or 'wrap'
+
+    Returns:
+    texture_img    = Texture values (float)
+
+    :param gray_img: numpy.ndarray
+    :param ksize: int
+    :param offset: int
+    :param texture_method: str
+    :param borders: str
+    :return texture_img: numpy.ndarray
+    """
+    # Kernel values are converted to 8-bit levels like in the per-kernel texture function
+    levels = _pad_borders(gray_img, ksize=ksize, borders=borders).astype(np.uint8)
+    rows = np.shape(gray_img)[0]
+    n_threads = os.cpu_count() or 1
+    tile_rows = max(1, min(256, math.ceil(rows / n_threads)))
+
+    def texture_tile(start):
+        # Padded rows of the kernels of the output rows start to start + tile_rows
+        return _glcm_tile(levels[start:min(start + tile_rows, rows) + ksize - 1], ksize=ksize, offset=offset,
+                          texture_method=texture_method)
+
+    with ThreadPoolExecutor(max_workers=n_threads) as executor:
+        tiles = list(executor.map(texture_tile, range(0, rows, tile_rows)))
+    if len(tiles) == 0:
+        return np.zeros(np.shape(gray_img))
+    return np.vstack(tiles)
+
+
+def _glcm_tile(levels, ksize, offset, texture_method):
+    """Calculate a GLCM texture feature of each ksize x ksize kernel of a padded image tile.
+
+    Inputs:
+    levels         = Padded 8-bit image tile
+    ksize          = Kernel size
+    offset         = Distance offset (less than ksize)
+    texture_method = Feature of a grey level co-occurrence matrix, one of GLCM_PROPS
+
+    Returns:
+    texture_tile   = Texture values (float), one per kernel
+
+    :param levels: numpy.ndarray
+    :param ksize: int
+    :param offset: int
+    :param texture_method: str
+    :return texture_tile: numpy.ndarray
+    """
+    # Levels of the first (a) and second (b) pixel of each horizontal pixel pair
+    a = levels[:, :levels.shape[1] - offset].astype(np.int64)
+    b = levels[:, offset:].astype(np.int64)
+    # Each kernel has ksize rows of width pairs
+    width = ksize - offset
+    n_pairs = ksize * width
+
+    # Features that are the mean of a function of the level difference of each pair
+    if texture_method == "contrast":
+        return _box_sum((a - b) ** 2, ksize, width) / n_pairs
+    if texture_method == "dissimilarity":
+        return _box_sum(np.abs(a - b), ksize, width) / n_pairs
+    if texture_method == "homogeneity":
+        # Count the pairs of each level difference exactly and weight the counts, so that uniform kernels are exactly 1
+        diff = np.abs(a - b)
+        weighted = np.zeros((diff.shape[0] - ksize + 1, diff.shape[1] - width + 1))
+        for d in np.unique(diff):
+            weighted += _box_sum(diff == d, ksize, width) / (1.0 + d ** 2)
+        return weighted / n_pairs
+
+    if texture_method in ("ASM", "energy"):
+        # The sum of the squared counts of the symmetric GLCM is twice the number of (ordered) pairs of pixel pairs
+        # with the same levels, plus twice the number with reversed levels. Pairs of pixel pairs are counted by their
+        # displacement: each pair matches itself, and the pairs displaced by -d match the same pairs as those
+        # displaced by d
+        codes = a * 256 + b
+        reverse = b * 256 + a
+        matches = n_pairs + _box_sum(a == b, ksize, width)
+        tile_rows, tile_cols = codes.shape
+        for dr in range(0, ksize):
+            for dc in range(-width + 1, width):
+                if dr == 0 and dc <= 0:
+                    continue
+                first = codes[:tile_rows - dr, max(0, -dc):tile_cols - max(0, dc)]
+                second = slice(dr, tile_rows), slice(max(0, dc), tile_cols - max(0, -dc))
+                matches = matches + 2 * _box_sum(first == codes[second], ksize - dr, width - abs(dc))
+                matches = matches + 2 * _box_sum(first == reverse[second], ksize - dr, width - abs(dc))
+        asm = matches / (2 * n_pairs ** 2)
+        return asm if texture_method == "ASM" else np.sqrt(asm)
+
+    # Features of the level distribution of the symmetric GLCM, from sums of the levels of the pairs
+    # (2N)^2 * variance = 2N * sum(a^2 + b^2) - sum(a + b)^2 for N pairs
+    sum_levels = _box_sum(a + b, ksize, width)
+    var_num = 2 * n_pairs * _box_sum(a ** 2 + b ** 2, ksize, width) - sum_levels ** 2
+    if texture_method == "mean":
+        return sum_levels / (2 * n_pairs)
+    if texture_method == "variance":
+        return var_num / (2 * n_pairs) ** 2
+    if texture_method == "std":
+        return np.sqrt(var_num / (2 * n_pairs) ** 2)
+    # Correlation, (2N)^2 * covariance = 4N * sum(a * b) - sum(a + b)^2, or 1 if there is no variance
+    cov_num = 4 * n_pairs * _box_sum(a * b, ksize, width) - sum_levels ** 2
+    correlation = np.ones(var_num.shape)
+    np.divide(cov_num, var_num, out=correlation, where=var_num > 0)
+    return correlation
+
+
 def custom_range(img, lower_thresh, upper_thresh, channel='gray'):
     """Creates a thresholded image and mask from an RGB image and threshold values.
 
@@ -371,7 +499,7 @@ def custom_range(img, lower_thresh, upper_thresh, channel='gray'):
         _check_threshold_inputs(3, lower_thresh, upper_thresh)
 
         # Convert the RGB image to HSV colorspace
-        hsv_img = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
+        hsv_img = _convert_colorspace(rgb_img=img, conversion="hsv")
 
         # Separate channels
         hue = hsv_img[:, :, 0]
@@ -382,11 +510,6 @@ def custom_range(img, lower_thresh, upper_thresh, channel='gray'):
         *out_masks, = _call_inrange(gray_imgs_list=[hue, sat, value],
                                     lower_thresh=lower_thresh, upper_thresh=upper_thresh)
 
-        # Apply the masks to the image
-        result = cv2.bitwise_and(img, img, mask=out_masks[0])
-        result = cv2.bitwise_and(result, result, mask=out_masks[1])
-        masked_img = cv2.bitwise_and(result, result, mask=out_masks[2])
-
         # Combine masks
         mask = cv2.bitwise_and(out_masks[0], out_masks[1])
         mask = cv2.bitwise_and(mask, out_masks[2])
@@ -405,11 +528,6 @@ def custom_range(img, lower_thresh, upper_thresh, channel='gray'):
         *out_masks, = _call_inrange(gray_imgs_list=[blue, green, red],
                                     lower_thresh=lower_thresh, upper_thresh=upper_thresh)
 
-        # Apply the masks to the image
-        result = cv2.bitwise_and(img, img, mask=out_masks[0])
-        result = cv2.bitwise_and(result, result, mask=out_masks[1])
-        masked_img = cv2.bitwise_and(result, result, mask=out_masks[2])
-
         # Combine masks
         mask = cv2.bitwise_and(out_masks[0], out_masks[1])
         mask = cv2.bitwise_and(mask, out_masks[2])
@@ -420,7 +538,7 @@ def custom_range(img, lower_thresh, upper_thresh, channel='gray'):
         _check_threshold_inputs(3, lower_thresh, upper_thresh)
 
         # Convert the RGB image to LAB colorspace
-        lab_img = cv2.cvtColor(img, cv2.COLOR_BGR2LAB)
+        lab_img = _convert_colorspace(rgb_img=img, conversion="lab")
 
         # Separate channels (pcv.readimage reads RGB images in as BGR)
         lightness = lab_img[:, :, 0]
@@ -431,11 +549,6 @@ def custom_range(img, lower_thresh, upper_thresh, channel='gray'):
         *out_masks, = _call_inrange(gray_imgs_list=[lightness, green_magenta, blue_yellow],
                                     lower_thresh=lower_thresh, upper_thresh=upper_thresh)
 
-        # Apply the masks to the image
-        result = cv2.bitwise_and(img, img, mask=out_masks[0])
-        result = cv2.bitwise_and(result, result, mask=out_masks[1])
-        masked_img = cv2.bitwise_and(result, result, mask=out_masks[2])
-
         # Combine masks
         mask = cv2.bitwise_and(out_masks[0], out_masks[1])
         mask = cv2.bitwise_and(mask, out_masks[2])
@@ -458,12 +571,6 @@ def custom_range(img, lower_thresh, upper_thresh, channel='gray'):
         *out_masks, = _call_inrange(gray_imgs_list=[c, m, y, k], lower_thresh=lower_thresh, upper_thresh=upper_thresh)
         # Use '*' to avoid linter error about unbalanced value unpacking
 
-        # Apply the masks to the image
-        result = cv2.bitwise_and(img, img, mask=out_masks[0])
-        result = cv2.bitwise_and(result, result, mask=out_masks[1])
-        result = cv2.bitwise_and(result, result, mask=out_masks[2])
-        masked_img = cv2.bitwise_and(result, result, mask=out_masks[3])
-
         # Combine masks
         mask = cv2.bitwise_and(out_masks[0], out_masks[1])
         mask2 = cv2.bitwise_and(out_masks[2], out_masks[3])
@@ -476,19 +583,19 @@ def custom_range(img, lower_thresh, upper_thresh, channel='gray'):
 
         if len(np.shape(img)) == 3:
             # Convert RGB image to grayscale colorspace
-            gray_img = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+            gray_img = _rgb2gray(rgb_img=img)
         else:
             gray_img = img
 
         # Make a mask
         mask = cv2.inRange(gray_img, lower_thresh[0], upper_thresh[0])
 
-        # Apply the masks to the image
-        masked_img = cv2.bitwise_and(img, img, mask=mask)
-
     else:
         fatal_error(str(channel) + " is not a valid colorspace. Channel must be either 'RGB', 'HSV', 'CMYK', or 'gray'.")
 
+    # Apply the mask to the image
+    masked_img = cv2.bitwise_and(img, img, mask=mask)
+
     # Auto-increment the device counter
 
     # Print or plot the binary image if debug is on
@@ -3,7 +3,7 @@ import os
 import numpy as np
 from plantcv.plantcv import params
 from plantcv.plantcv import fatal_error
-from plantcv.plantcv._debug import _debug
+from plantcv.plantcv._debug import _debug, _build_visuals
 import pandas as pd
 import altair as alt
 
@@ -101,7 +101,7 @@ def histogram(img, mask=None, bins=100, lower_bound=None, upper_bound=None, titl
     hist_data      = return the frequency distribution data if True (default=False)
 
     Returns:
-    chart          = histogram figure
+    chart          = histogram figure (None if hist_data is True and pcv.params.visuals is False)
     hist_df        = dataframe with histogram data, with columns "pixel intensity" and "proportion of pixels (%)"
 
     :param img: numpy.ndarray
@@ -151,6 +151,10 @@ def histogram(img, mask=None, bins=100, lower_bound=None, upper_bound=None, titl
             {'pixel intensity': px_int, 'proportion of pixels (%)': prop, 'hist_count': hist_count,
              'color channel': channel})
 
+    # Only the histogram data is needed if diagnostic plots are not built
+    if hist_data is True and not _build_visuals():
+        return None, hist_df
+
     # Create an altair chart
     chart = alt.Chart(hist_df).mark_line(point=True).encode(
         x="pixel intensity",
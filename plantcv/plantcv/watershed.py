@@ -8,7 +8,7 @@ import numpy as np
 from scipy import ndimage as ndi
 from skimage.feature import peak_local_max
 from skimage.segmentation import watershed
-from plantcv.plantcv._debug import _debug
+from plantcv.plantcv._debug import _debug, _build_visuals
 from plantcv.plantcv import color_palette
 from plantcv.plantcv import params
 from plantcv.plantcv import outputs
@@ -56,15 +56,17 @@ def watershed_segmentation(rgb_img, mask, distance=10, label=None):
     estimated_object_count = len(np.unique(markers)) - 1
 
     # Plot image
-    plt_img = np.copy(rgb_img)
-    rand_color = color_palette(len(np.unique(labels)))
-    for i in np.unique(labels):
-        # Skip black background i=0
-        if i > 0:
-            # Find contours
-            submask = np.where(labels == i, 255, 0).astype(np.uint8)
-            cnt, _ = _cv2_findcontours(bin_img=submask)
-            cv2.drawContours(plt_img, cnt, -1, rand_color[i], params.line_thickness)
+    plt_img = None
+    if _build_visuals():
+        plt_img = np.copy(rgb_img)
+        rand_color = color_palette(len(np.unique(labels)))
+        for i in np.unique(labels):
+            # Skip black background i=0
+            if i > 0:
+                # Find contours
+                submask = np.where(labels == i, 255, 0).astype(np.uint8)
+                cnt, _ = _cv2_findcontours(bin_img=submask)
+                cv2.drawContours(plt_img, cnt, -1, rand_color[i], params.line_thickness)
 
     _debug(visual=plt_img,
            filename=os.path.join(params.debug_outdir, str(params.device) + '_watershed_labeled_img.png'),
@@ -1,5 +1,6 @@
-__all__ = ["json2csv", "tabulate_bayes_classes", "sample_images"]
+__all__ = ["json2csv", "compact_results", "tabulate_bayes_classes", "sample_images"]
 
 from plantcv.utils.converters import json2csv
+from plantcv.utils.converters import compact_results
 from plantcv.utils.converters import tabulate_bayes_classes
 from plantcv.utils.sample_images import sample_images
@@ -19,8 +19,16 @@ def options():
     json2csv_cmd = subparsers.add_parser("json2csv", help="Convert PlantCV output JSON files to CSV.")
     json2csv_cmd.add_argument("-j", "--json", help="Input PlantCV JSON filename.", required=True)
     json2csv_cmd.add_argument("-c", "--csv", help="Output CSV file prefix.", required=True)
+    json2csv_cmd.add_argument("-w", "--workers", help="Number of processes used to convert the JSON file.", default=1,
+                              type=int)
     json2csv_cmd.set_defaults(func=run_json2csv)
 
+    # Create the compact_results subcommand
+    compact_cmd = subparsers.add_parser("compact_results", help="Convert a PlantCV results log to a JSON file.")
+    compact_cmd.add_argument("-i", "--infile", help="Input PlantCV results log filename.", required=True)
+    compact_cmd.add_argument("-j", "--json", help="Output JSON filename.", required=True)
+    compact_cmd.set_defaults(func=run_compact_results)
+
     # Create the tabulate_bayes_classes subcommand
     json2csv_cmd = subparsers.add_parser("tabulate_bayes_classes", help="Convert pixel samples to a Bayes class table.")
     json2csv_cmd.add_argument("-i", "--infile", help="Input text file.", required=True)
@@ -52,7 +60,15 @@ def options():
 ###########################################
 def run_json2csv(args):
     """Run the JSON to CSV converter"""
-    plantcv.utils.json2csv(json_file=args.json, csv_prefix=args.csv)
+    plantcv.utils.json2csv(json_file=args.json, csv_prefix=args.csv, workers=args.workers)
+###########################################
+
+
+# Run the results log compactor
+###########################################
+def run_compact_results(args):
+    """Compact a results log to a JSON file"""
+    plantcv.utils.compact_results(log_file=args.infile, json_file=args.json)
 ###########################################
 
 
@@ -1,20 +1,42 @@
 """Converter functions."""
 import os
+import re
+import csv
 import json
-import itertools
-import pandas as pd
+import codecs
+import shutil
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
+from plantcv.plantcv.classes import _read_results_log
 
 
-def json2csv(json_file, csv_prefix):
+# Size of the chunks of a JSON file decoded at a time
+_CHUNK_SIZE = 1 << 20
+# Target number of entity shards per worker, so that workers that finish early take another shard
+_SHARDS_PER_WORKER = 4
+# Characters skipped between JSON values
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_SEPARATORS = re.compile(r"[ \t\n\r,]*")
+
+
+def json2csv(json_file, csv_prefix, workers=1):
     """Convert a PlantCV JSON file to a CSV files.
 
+    The JSON file is read incrementally, one entity at a time, so large results files are converted without loading
+    them. The file is read twice: the first pass collects the variables and the single-value trait columns, the
+    second pass writes the rows of both tables. With more than one worker, the entities are split into contiguous
+    shards that are converted by separate processes and the tables of the shards are concatenated in order. Finally,
+    the rows of the single-value trait table are sorted by metadata and sample, and duplicate samples are merged into
+    one row that keeps the last value of each trait.
+
     Parameters
     ----------
     json_file : str
         JSON file output by plantcv-run-workflow.
     csv_prefix : str
         CSV output files prefix.
+    workers : int, optional
+        Number of processes used to convert the entities (default = 1).
 
     Raises
     ------
@@ -26,69 +48,329 @@ def json2csv(json_file, csv_prefix):
     if not os.path.exists(json_file):
         # If the file does not exist raise an error
         raise IOError(f"File does not exist: {json_file}")
-    # Open the JSON file for reading
-    with open(json_file, "r") as fp:
-        data = json.load(fp)
+    # Scan the JSON file for the variables, single-value trait columns and entity shards
     # If the data is JSON but it does not have the components we expect from PlantCV raise an error
-    if "variables" not in data or "entities" not in data:
+    try:
+        variables, columns, shards = _scan_json(json_file=json_file, n_shards=workers * _SHARDS_PER_WORKER)
+    except json.decoder.JSONDecodeError:
+        raise ValueError(f"Invalid JSON file: {json_file}")
+    if variables is None or shards is None:
         raise ValueError(f"Invalid JSON file: {json_file}")
 
     # Split up variables
-    meta_vars, scalar_vars, multi_vars = _unpack_variables(data)
+    meta_vars, scalar_vars, multi_vars = _unpack_variables({"variables": variables})
+    # Single-value trait columns, ordered by trait and label
+    columns = sorted([(var, label) for var, label in columns if var in scalar_vars], key=lambda c: (c[0], str(c[1])))
 
     # Output files
     scalar_file = csv_prefix + "-single-value-traits.csv"
     multi_file = csv_prefix + "-multi-value-traits.csv"
 
-    # Create a CSV file of vector traits
-    with open(multi_file, "w") as csv:
-        # Create a header for the long-format table
-        csv.write(",".join(map(str, meta_vars + ["sample", "trait", "value", "label"])) + "\n")
-        # Iterate over each entity
-        for entity in data["entities"]:
+    # Create a header for the long-format table of vector traits
+    with open(multi_file, "w") as csv_fp:
+        csv_fp.write(",".join(map(str, meta_vars + ["sample", "trait", "value", "label"])) + "\n")
+    # Create a header for the wide-format table of scalar traits
+    with open(scalar_file, "w", newline="") as csv_fp:
+        csv.writer(csv_fp, lineterminator="\n").writerow(meta_vars + ["sample"] +
+                                                         [f"{var}_{label}" for var, label in columns])
+
+    tables = {"meta_vars": meta_vars, "scalar_vars": scalar_vars, "multi_vars": multi_vars, "columns": columns}
+    if workers == 1 or len(shards) < 2:
+        for offset, n_entities in shards:
+            _convert_entities(json_file=json_file, offset=offset, n_entities=n_entities, scalar_file=scalar_file,
+                              multi_file=multi_file, mode="a", **tables)
+    else:
+        # Convert each shard to its own pair of tables and append them in order
+        parts = [(f"{scalar_file}.part{i}", f"{multi_file}.part{i}") for i in range(len(shards))]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            tasks = [executor.submit(_convert_entities, json_file=json_file, offset=offset, n_entities=n_entities,
+                                     scalar_file=scalar_part, multi_file=multi_part, **tables)
+                     for (offset, n_entities), (scalar_part, multi_part) in zip(shards, parts)]
+            for task in tasks:
+                task.result()
+        for outfile, part_files in [(scalar_file, [part[0] for part in parts]),
+                                    (multi_file, [part[1] for part in parts])]:
+            with open(outfile, "ab") as out:
+                for part_file in part_files:
+                    with open(part_file, "rb") as part:
+                        shutil.copyfileobj(part, out)
+                    os.remove(part_file)
+
+    # Merge the rows of duplicate samples and sort the rows by metadata and sample
+    _merge_scalar_rows(scalar_file=scalar_file, n_keys=len(meta_vars) + 1)
+
+
+def compact_results(log_file, json_file):
+    """Compact a results log to a PlantCV JSON results file.
+
+    The results log is written by plantcv.outputs.save_results(outformat="jsonl"), which appends a record to the log
+    each time results are saved. The JSON file has the same results as if each record had been saved with
+    outformat="json".
+
+    Parameters
+    ----------
+    log_file : str
+        Results log file.
+    json_file : str
+        Output JSON results file.
+
+    Raises
+    ------
+    IOError
+        Results log file does not exist.
+    ValueError
+        Results log file has no records.
+    """
+    if not os.path.exists(log_file):
+        # If the file does not exist raise an error
+        raise IOError(f"File does not exist: {log_file}")
+    results = _read_results_log(filename=log_file)
+    if results is None:
+        raise ValueError(f"Invalid results log file: {log_file}")
+    with open(json_file, "w") as fp:
+        json.dump(results, fp)
+
+
+class _JSONStream:
+    """Decode the values of a JSON file incrementally from a buffer of bounded size."""
+
+    def __init__(self, fp, offset=0):
+        """Initialize a stream at a byte offset of a JSON file.
+
+        Keyword arguments:
+        fp     = JSON file opened in binary mode
+        offset = byte offset of the first value (default = 0)
+        """
+        self.fp = fp
+        self.fp.seek(offset)
+        self.decoder = json.JSONDecoder()
+        self.text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self.buffer = ""
+        self.pos = 0
+        # Byte offset of the buffer start and number of bytes before a recent buffer position
+        self.offset = offset
+        self.tell_pos = 0
+        self.tell_bytes = 0
+        self.eof = False
+
+    def _fill(self):
+        """Drop the decoded part of the buffer and read the next chunk of the file.
+
+        Returns:
+        filled = False at the end of the file
+
+        :return filled: bool
+        """
+        self.offset += self.tell()
+        self.buffer = self.buffer[self.pos:]
+        self.pos, self.tell_pos, self.tell_bytes = 0, 0, 0
+        chunk = self.fp.read(_CHUNK_SIZE)
+        self.eof = len(chunk) == 0
+        self.buffer += self.text_decoder.decode(chunk, final=self.eof)
+        return not self.eof
+
+    def tell(self):
+        """Get the byte offset of the current position, relative to the buffer start.
+
+        Returns:
+        offset = number of bytes before the current position in the buffer
+
+        :return offset: int
+        """
+        self.tell_bytes += len(self.buffer[self.tell_pos:self.pos].encode())
+        self.tell_pos = self.pos
+        return self.tell_bytes
+
+    def peek(self, skip=_WHITESPACE):
+        """Skip whitespace (and separators) and get the next character without consuming it.
+
+        Keyword arguments:
+        skip = compiled pattern of characters to skip (default = whitespace)
+
+        Returns:
+        char = next character, or an empty string at the end of the file
+
+        :param skip: re.Pattern
+        :return char: str
+        """
+        while True:
+            self.pos = skip.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer) or not self._fill():
+                return self.buffer[self.pos:self.pos + 1]
+
+    def expect(self, char):
+        """Consume the next character, which must be char.
+
+        Keyword arguments:
+        char = expected character
+
+        :param char: str
+        """
+        if self.peek() != char:
+            raise json.decoder.JSONDecodeError(f"Expecting '{char}'", self.buffer, self.pos)
+        self.pos += 1
+
+    def decode(self):
+        """Decode the next value.
+
+        Returns:
+        value = decoded JSON value
+
+        :return value: any
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.decoder.JSONDecodeError:
+                # The value may continue in the next chunk of the file
+                if self._fill():
+                    continue
+                raise
+            # A number at the end of the buffer may also continue in the next chunk
+            if end == len(self.buffer) and not self.eof and self._fill():
+                continue
+            self.pos = end
+            return value
+
+
+def _scan_json(json_file, n_shards):
+    """Scan a PlantCV JSON file for the variables, single-value trait columns and shards of entities.
+
+    Keyword arguments:
+    json_file = JSON file output by plantcv-run-workflow
+    n_shards  = target number of shards of entities
+
+    Returns:
+    variables = variables dictionary (None if missing)
+    columns   = set of (trait, label) single-value trait columns, for all traits that are not lists
+    shards    = list of (byte offset, number of entities) of contiguous shards of entities (None if missing)
+
+    :param json_file: str
+    :param n_shards: int
+    :return variables: dict
+    :return columns: set
+    :return shards: list
+    """
+    variables = None
+    shards = None
+    columns = set()
+    # Number of samples and number of samples with a value of each trait, traits are missing ("NA") in the others
+    n_samples = 0
+    n_values = {}
+    shard_size = max(1, os.path.getsize(json_file) // max(1, n_shards))
+    with open(json_file, "rb") as fp:
+        stream = _JSONStream(fp)
+        stream.expect("{")
+        while stream.peek(skip=_SEPARATORS) != "}":
+            key = stream.decode()
+            stream.expect(":")
+            if key != "entities":
+                value = stream.decode()
+                if key == "variables":
+                    variables = value
+                continue
+            stream.expect("[")
+            shards = []
+            while stream.peek(skip=_SEPARATORS) != "]":
+                offset = stream.offset + stream.tell()
+                entity = stream.decode()
+                # Start a new shard when the current shard is large enough
+                if len(shards) == 0 or offset - shards[-1][0] >= shard_size:
+                    shards.append([offset, 0])
+                shards[-1][1] += 1
+                for obs in entity["observations"].values():
+                    n_samples += 1
+                    for var, trait in obs.items():
+                        n_values[var] = n_values.get(var, 0) + 1
+                        if not isinstance(trait["value"], (list, tuple)):
+                            columns.add((var, trait["label"]))
+            stream.expect("]")
+    if variables is not None:
+        columns.update((var, "NA") for var in variables if n_values.get(var, 0) < n_samples)
+    return variables, columns, None if shards is None else [tuple(shard) for shard in shards]
+
+
+def _convert_entities(json_file, offset, n_entities, scalar_file, multi_file, meta_vars, scalar_vars, multi_vars,
+                      columns, mode="w"):
+    """Write the table rows of a shard of entities.
+
+    Keyword arguments:
+    json_file   = JSON file output by plantcv-run-workflow
+    offset      = byte offset of the first entity
+    n_entities  = number of entities
+    scalar_file = output file of single-value trait rows
+    multi_file  = output file of multi-value trait rows
+    meta_vars   = list of metadata variables
+    scalar_vars = list of single-value trait variables
+    multi_vars  = list of multi-value trait variables
+    columns     = list of (trait, label) single-value trait columns
+    mode        = output file mode (default = "w")
+
+    :param json_file: str
+    :param offset: int
+    :param n_entities: int
+    :param scalar_file: str
+    :param multi_file: str
+    :param meta_vars: list
+    :param scalar_vars: list
+    :param multi_vars: list
+    :param columns: list
+    :param mode: str
+    """
+    with open(json_file, "rb") as fp, open(scalar_file, mode, newline="") as scalar_fp, \
+            open(multi_file, mode) as multi_fp:
+        stream = _JSONStream(fp, offset=offset)
+        scalar_csv = csv.writer(scalar_fp, lineterminator="\n")
+        for _ in range(n_entities):
+            stream.peek(skip=_SEPARATORS)
+            entity = stream.decode()
             # Add metadata variables
             meta_row = _create_metadata_row(meta_vars=meta_vars, metadata=entity["metadata"])
-            # Add trait variables
-            for sample, var in itertools.product(entity["observations"].keys(), multi_vars):
-                data_rows = _create_data_rows(var=var, obs=entity["observations"][sample])
-                for row in data_rows:
-                    csv.write(",".join(map(str, meta_row + [sample] + row)) + "\n")
-
-    # Create a CSV file of scalar traits
-    # Initialize a dictionary to store the data
-    scalar_data = {
-        "sample": [],
-        "trait": [],
-        "value": [],
-        "label": []
-    }
-    # Add metadata terms to the dictionary
-    for var in meta_vars:
-        scalar_data[var] = []
-    # Iterate over each entity
-    for entity in data["entities"]:
-        # Add metadata variables
-        meta_row = _create_metadata_row(meta_vars=meta_vars, metadata=entity["metadata"])
-        # Add trait variables
-        for sample, var in itertools.product(entity["observations"].keys(), scalar_vars):
-            data_rows = _create_data_rows(var=var, obs=entity["observations"][sample])
-            for row in data_rows:
-                scalar_data["sample"].append(sample)
-                scalar_data["trait"].append(row[0])
-                scalar_data["value"].append(row[1])
-                scalar_data["label"].append(row[2])
-                # Add metadata variables
-                for i, _ in enumerate(meta_vars):
-                    scalar_data[meta_vars[i]].append(meta_row[i])
-    # Create a pandas dataframe from the dictionary
-    df = pd.DataFrame(scalar_data)
-    # Pivot the dataframe to wide format
-    # If duplicate indices exist, use the last set of observations are kept
-    df = df.pivot_table(index=meta_vars + ["sample"], columns=["trait", "label"], values="value", aggfunc=_last_index)
-    # Collapse hierarchical column headers
-    df.columns = [f"{c[0]}_{c[1]}" for c in df.columns]
-    # Save the dataframe to a CSV file
-    df.to_csv(scalar_file)
+            for sample, obs in entity["observations"].items():
+                # Add vector trait variables, one row per value
+                prefix = ",".join(map(str, meta_row + [sample]))
+                for var in multi_vars:
+                    multi_fp.writelines(f"{prefix},{row[0]},{row[1]},{row[2]}\n"
+                                        for row in _create_data_rows(var=var, obs=obs))
+                if len(scalar_vars) == 0:
+                    continue
+                # Add scalar trait variables, one row per sample
+                # If a trait has duplicate labels, the last observation is kept
+                values = {}
+                for var in scalar_vars:
+                    for trait, value, label in _create_data_rows(var=var, obs=obs):
+                        values[(trait, label)] = "" if value is None else value
+                scalar_csv.writerow(meta_row + [sample] + [values.get(column, "") for column in columns])
+
+
+def _merge_scalar_rows(scalar_file, n_keys):
+    """Merge the rows of duplicate samples of a single-value trait table and sort the rows by sample.
+
+    Samples with the same metadata and sample name are merged into one row. The last value of each trait is kept, traits
+    without a value in a later row keep the earlier value.
+
+    Keyword arguments:
+    scalar_file = single-value trait table
+    n_keys      = number of metadata and sample columns that identify a sample
+
+    :param scalar_file: str
+    :param n_keys: int
+    """
+    rows = {}
+    with open(scalar_file, "r", newline="") as csv_fp:
+        reader = csv.reader(csv_fp)
+        header = next(reader)
+        for row in reader:
+            key = tuple(row[:n_keys])
+            if key in rows:
+                rows[key] = [value if value != "" else prev for prev, value in zip(rows[key], row)]
+            else:
+                rows[key] = row
+    with open(scalar_file, "w", newline="") as csv_fp:
+        scalar_csv = csv.writer(csv_fp, lineterminator="\n")
+        scalar_csv.writerow(header)
+        scalar_csv.writerows(rows[key] for key in sorted(rows))
 
 
 def _unpack_variables(data):
@@ -124,11 +406,6 @@ def _unpack_variables(data):
     return meta_vars, scalar_vars, multi_vars
 
 
-def _last_index(*args):
-    """Aggregation function to return the last index of a list."""
-    return np.array(args[-1])[-1]
-
-
 def _create_metadata_row(meta_vars, metadata):
     """Create a row of metadata.
 
@@ -1,5 +1,7 @@
 import os
-from plantcv.learn.train_kmeans import train_kmeans
+import numpy as np
+from sklearn.metrics import pairwise_distances_argmin_min
+from plantcv.learn.train_kmeans import train_kmeans, _init_centers
 
 
 def test_train_kmeans(learn_test_data, tmpdir):
@@ -25,3 +27,29 @@ def test_train_kmeans(learn_test_data, tmpdir):
     assert os.path.exists(outfile_full)
     assert os.path.exists(outfile_subset_gray)
     assert os.path.exists(outfile_full_gray)
+
+
+def test_train_kmeans_batches(learn_test_data, tmpdir):
+    """Test for PlantCV."""
+    # Create a test tmp directory
+    cache_dir = tmpdir.mkdir("cache")
+    outfile = os.path.join(str(cache_dir), "kmeansout_batches.fit")
+    # Train streaming models with and without patch sampling
+    fitted = train_kmeans(img_dir=learn_test_data.kmeans_train_dir, prefix="kmeans_train",
+                          out_path=outfile, k=5, patch_size=4, batch_size=1000)
+    refitted = train_kmeans(img_dir=learn_test_data.kmeans_train_dir, prefix="kmeans_train",
+                            out_path=outfile, k=5, patch_size=4, batch_size=1000, n_workers=1)
+    sampled = train_kmeans(img_dir=learn_test_data.kmeans_train_gray_dir, prefix="kmeans_train",
+                           out_path=outfile, k=5, patch_size=4, sampling=0.5, batch_size=1000, num_imgs=2)
+    assert np.array_equal(fitted.cluster_centers_, refitted.cluster_centers_)
+    assert sampled.cluster_centers_.shape == (5, 16)
+
+
+def test_train_kmeans_init_centers():
+    """Test for PlantCV."""
+    patches = np.random.default_rng(0).integers(0, 255, (500, 16)).astype(np.uint16)
+    single = _init_centers(patches, k=5, n_init=1, seed=1)
+    best = _init_centers(patches, k=5, n_init=10, seed=1)
+    # The best of several initiations (starting with the same one) fits the batch at least as well
+    inertia = [np.sum(pairwise_distances_argmin_min(patches, centers)[1] ** 2) for centers in [single, best]]
+    assert best.shape == (5, 16) and inertia[1] <= inertia[0]
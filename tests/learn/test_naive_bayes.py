@@ -1,4 +1,6 @@
 import os
+import pytest
+import numpy as np
 from plantcv.learn import naive_bayes, naive_bayes_multiclass
 
 
@@ -14,6 +16,30 @@ def test_naive_bayes(learn_test_data, tmpdir):
     assert os.path.exists(outfile)
 
 
+def test_naive_bayes_histogram(learn_test_data, tmpdir):
+    """Test for PlantCV."""
+    # Create tmp directory
+    tmp_dir = tmpdir.mkdir("cache")
+    imgdir = os.path.join(learn_test_data.train_data, "images")
+    maskdir = os.path.join(learn_test_data.train_data, "masks")
+    # Run the naive Bayes training module with histogram PDFs
+    outfile = os.path.join(str(tmp_dir), "naive_bayes_pdfs.txt")
+    naive_bayes(imgdir=imgdir, maskdir=maskdir, outfile=outfile, method="histogram")
+    pdfs = np.loadtxt(outfile, skiprows=1, usecols=range(2, 258))
+    # One PDF per class and channel
+    assert pdfs.shape == (6, 256) and np.all(pdfs >= 0) and np.all(pdfs.sum(axis=1) <= 1)
+
+
+def test_naive_bayes_bad_method(learn_test_data, tmpdir):
+    """Test for PlantCV."""
+    # Create tmp directory
+    tmp_dir = tmpdir.mkdir("cache")
+    outfile = os.path.join(str(tmp_dir), "naive_bayes_pdfs.txt")
+    with pytest.raises(RuntimeError):
+        naive_bayes(imgdir=learn_test_data.train_data, maskdir=learn_test_data.train_data, outfile=outfile,
+                    method="bad")
+
+
 def test_naive_bayes_multiclass(learn_test_data, tmpdir):
     """Test for PlantCV."""
     # Create tmp directory
@@ -3,8 +3,9 @@ import os
 import pytest
 import shutil
 import dask
+import pandas as pd
 from plantcv.parallel import WorkflowConfig
-from plantcv.parallel.cli import main
+from plantcv.parallel.cli import main, _run_report, _job_report
 
 
 def test_parallel_cli_template(tmpdir):
@@ -58,3 +59,76 @@ def test_parallel_cli_valid_config(parallel_test_data, tmpdir):
     import sys
     sys.argv = ["plantcv-run-workflow", "--config", conf_file.strpath]
     assert main() is None
+
+
+def test_parallel_cli_job_dir(parallel_test_data, tmpdir):
+    """Test for PlantCV."""
+    # Create a test tmp directory
+    conf_file = tmpdir.mkdir("cache").join("config.json")
+    # Set the temp directory for dask
+    dask.config.set(temporary_directory=str(conf_file.dirpath()))
+    config = WorkflowConfig()
+    # Set valid values in config
+    config.input_dir = parallel_test_data.flat_imgdir
+    config.json = conf_file.dirpath().join("results.json").strpath
+    config.filename_metadata = ["imgtype", "camera", "frame", "zoom", "lifter", "gain", "exposure", "id"]
+    config.workflow = parallel_test_data.workflow_script
+    config.img_outdir = str(conf_file.dirpath())
+    config.job_dir = str(conf_file.dirpath() / "jobs")
+    config.save_config(config_file=conf_file.strpath)
+    # Mock ARGV
+    import sys
+    sys.argv = ["plantcv-run-workflow", "--config", conf_file.strpath]
+    main()
+    first_run = parallel_test_data.load_json(json_file=config.json)
+    # The second run skips completed jobs and keeps their results
+    main()
+    second_run = parallel_test_data.load_json(json_file=config.json)
+    assert len(first_run["entities"]) > 0 and len(second_run["entities"]) == len(first_run["entities"])
+
+
+def test_parallel_cli_parquet(parallel_test_data, tmpdir):
+    """Test for PlantCV."""
+    # Create a test tmp directory
+    conf_file = tmpdir.mkdir("cache").join("config.json")
+    # Set the temp directory for dask
+    dask.config.set(temporary_directory=str(conf_file.dirpath()))
+    config = WorkflowConfig()
+    # Set valid values in config
+    config.input_dir = parallel_test_data.flat_imgdir
+    config.json = conf_file.dirpath().join("results.json").strpath
+    config.filename_metadata = ["imgtype", "camera", "frame", "zoom", "lifter", "gain", "exposure", "id"]
+    config.workflow = parallel_test_data.workflow_script
+    config.img_outdir = str(conf_file.dirpath())
+    config.job_dir = str(conf_file.dirpath() / "jobs")
+    config.results_format = "parquet"
+    config.save_config(config_file=conf_file.strpath)
+    # Mock ARGV
+    import sys
+    sys.argv = ["plantcv-run-workflow", "--config", conf_file.strpath]
+    main()
+    first_run = pd.read_parquet(f"{config.json}-single-value-traits.parquet")
+    # The second run skips completed jobs and keeps their results
+    main()
+    second_run = pd.read_parquet(f"{config.json}-single-value-traits.parquet")
+    # The test workflow records no observations, the tables have the metadata columns of all jobs
+    assert "camera" in first_run.columns and second_run.equals(first_run) and not os.path.exists(config.json)
+
+
+def test_run_report():
+    """Test for PlantCV."""
+    telemetry = [{"images": [f"image{i}.png"], "result": f"{i}.json", "status": int(i == 3), "wall_time": float(i),
+                  "cpu_time": None, "max_rss": 1024 ** 2} for i in range(5)]
+    report = _run_report(telemetry=telemetry, n_slowest=2).split("\n")
+    # CPU time is not available so it is not summarized
+    assert report[0] == "Run summary: 5 jobs, 1 failed, 0 retried." and len(report) == 7 and "image4.png" in report[5]
+
+
+def test_job_report():
+    """Test for PlantCV."""
+    telemetry = [{"images": ["image0.png"], "status": 0, "attempts": 1},
+                 {"images": ["image1.png"], "status": 0, "attempts": 2},
+                 {"images": ["image2.png"], "status": None, "attempts": None, "error": "KilledWorker"}]
+    report = _job_report(telemetry=telemetry)
+    assert [job["images"] for job in report["failed"]] == [["image2.png"]]
+    assert [job["images"] for job in report["retried"]] == [["image1.png"]]
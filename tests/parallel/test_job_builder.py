@@ -1,5 +1,8 @@
 import os
-from plantcv.parallel import job_builder, WorkflowConfig
+from plantcv.parallel import job_builder, metadata_parser, WorkflowConfig
+from plantcv.parallel.job_builder import _order_by_cost
+from plantcv.parallel.manifest import _record_completed, _read_manifest, _record_telemetry
+from plantcv.plantcv.classes import _read_job_metadata, JOB_METADATA_ENV, JOB_METADATA_OFFSET_ENV
 
 
 def test_job_builder_single_image(parallel_test_data, tmpdir):
@@ -97,3 +100,143 @@ def test_job_builder_auto_name(parallel_test_data, tmpdir):
                 "image1", '--writeimg', '--other', 'on', image_path]
 
     assert all([i == j] for i, j in zip(jobs[0], expected))
+
+
+def test_job_builder_inprocess(parallel_test_data, tmpdir):
+    """Test for PlantCV."""
+    # Create tmp directory
+    tmp_dir = tmpdir.mkdir("cache")
+    # Create config instance
+    config = WorkflowConfig()
+    config.input_dir = parallel_test_data.snapshot_imgdir
+    config.json = "output.json"
+    config.tmp_dir = tmp_dir
+    config.filename_metadata = ["imgtype", "camera", "rotation", "zoom", "lifter", "gain", "exposure", "id"]
+    config.workflow = parallel_test_data.workflow_script
+    config.img_outdir = tmp_dir
+    config.timestampformat = '%Y-%m-%d %H:%M:%S.%f'
+    config.other_args = {"other": "on"}
+    config.run_mode = "inprocess"
+
+    jobs = job_builder(meta=parallel_test_data.metadata_snapshot_vis(), config=config)
+
+    assert jobs[0].image1 == parallel_test_data.image_path and jobs[0].other == "on"
+
+
+def test_order_by_cost():
+    """Test for PlantCV."""
+    # Jobs without a previous elapsed time are scaled by the elapsed time per byte of the other jobs (1 s per 6 bytes)
+    jobs = _order_by_cost(jobs=["a", "b", "c", "d"], sizes=[10, 50, 20, 30], wall_times=[1.0, None, 4.0, None])
+    assert jobs == ["b", "d", "c", "a"]
+
+
+def test_job_builder_cost_order(parallel_test_data, tmpdir):
+    """Test for PlantCV."""
+    # Create tmp directory
+    tmp_dir = tmpdir.mkdir("cache")
+    # Create config instance
+    config = WorkflowConfig()
+    config.input_dir = parallel_test_data.flat_imgdir
+    config.json = "output.json"
+    config.tmp_dir = tmp_dir
+    config.job_dir = str(tmp_dir)
+    config.filename_metadata = ["imgtype", "camera", "frame", "zoom", "lifter", "gain", "exposure", "id"]
+    config.workflow = parallel_test_data.workflow_script
+    config.img_outdir = tmp_dir
+    config.imgformat = "jpg"
+    config.job_order = "cost"
+    meta, _ = metadata_parser(config=config)
+    images = [grp_df["filepath"].values.tolist() for _, grp_df in meta]
+    # The last job took the longest in a previous run
+    _record_telemetry(job_dir=config.job_dir, telemetry=[{"images": images[-1], "wall_time": 1e6}])
+
+    jobs = job_builder(meta=meta, config=config)
+
+    assert jobs[0][-1] == images[-1][0]
+
+
+def test_job_builder_results_format(parallel_test_data, tmpdir):
+    """Test for PlantCV."""
+    # Create tmp directory
+    tmp_dir = tmpdir.mkdir("cache")
+    # Create config instance
+    config = WorkflowConfig()
+    config.input_dir = parallel_test_data.snapshot_imgdir
+    config.json = "output.json"
+    config.tmp_dir = tmp_dir
+    config.filename_metadata = ["imgtype", "camera", "rotation", "zoom", "lifter", "gain", "exposure", "id"]
+    config.workflow = parallel_test_data.workflow_script
+    config.img_outdir = tmp_dir
+    config.timestampformat = '%Y-%m-%d %H:%M:%S.%f'
+    config.results_format = "parquet"
+
+    jobs = job_builder(meta=parallel_test_data.metadata_snapshot_vis(), config=config)
+
+    assert jobs[0][jobs[0].index("--outformat") + 1] == "parquet"
+
+
+def test_job_builder_job_dir(parallel_test_data, tmpdir):
+    """Test for PlantCV."""
+    # Create tmp directory
+    tmp_dir = tmpdir.mkdir("cache")
+    # Create config instance
+    config = WorkflowConfig()
+    config.input_dir = parallel_test_data.snapshot_imgdir
+    config.json = "output.json"
+    config.tmp_dir = tmp_dir
+    config.job_dir = str(tmp_dir)
+    config.filename_metadata = ["imgtype", "camera", "rotation", "zoom", "lifter", "gain", "exposure", "id"]
+    config.workflow = parallel_test_data.workflow_script
+    config.img_outdir = tmp_dir
+    config.timestampformat = '%Y-%m-%d %H:%M:%S.%f'
+    config.other_args = {"other": "on"}
+
+    jobs = job_builder(meta=parallel_test_data.metadata_snapshot_vis(), config=config)
+    # Simulate a completed job
+    result = os.path.basename(jobs[0][jobs[0].index("--result") + 1])
+    with open(os.path.join(tmp_dir, result), "w") as fp:
+        fp.write("{}")
+    _record_completed(job_dir=config.job_dir, results=[result])
+    # Completed jobs are skipped
+    rerun_jobs = job_builder(meta=parallel_test_data.metadata_snapshot_vis(), config=config)
+    # Changed workflow arguments invalidate the previous results
+    config.other_args = {"other": "off"}
+    changed_jobs = job_builder(meta=parallel_test_data.metadata_snapshot_vis(), config=config)
+
+    assert len(jobs) == 1 and len(rerun_jobs) == 0 and len(changed_jobs) == 1 and \
+        not os.path.exists(os.path.join(tmp_dir, result))
+
+
+def test_read_manifest_partial_line(tmpdir):
+    """Test for PlantCV."""
+    # Create tmp directory
+    tmp_dir = tmpdir.mkdir("cache")
+    _record_completed(job_dir=str(tmp_dir), results=["a.json"])
+    # Simulate an interrupted write
+    with open(os.path.join(tmp_dir, "manifest.jsonl"), "a") as fp:
+        fp.write('{"res')
+    assert _read_manifest(job_dir=str(tmp_dir)) == {"a.json"}
+
+
+def test_job_builder_job_metadata(parallel_test_data, tmpdir, monkeypatch):
+    """Test for PlantCV."""
+    # Create tmp directory
+    tmp_dir = tmpdir.mkdir("cache")
+    # Create config instance
+    config = WorkflowConfig()
+    config.input_dir = parallel_test_data.snapshot_imgdir
+    config.json = "output.json"
+    config.tmp_dir = str(tmp_dir)
+    config.filename_metadata = ["imgtype", "camera", "rotation", "zoom", "lifter", "gain", "exposure", "id"]
+    config.workflow = parallel_test_data.workflow_script
+    config.img_outdir = tmp_dir
+    config.timestampformat = '%Y-%m-%d %H:%M:%S.%f'
+
+    jobs = job_builder(meta=parallel_test_data.metadata_snapshot_coprocess(), config=config)
+    # Job metadata is read from the shared metadata file instead of one file per job, its location is in the
+    # environment of the job so that the command line is unchanged
+    for var in [JOB_METADATA_ENV, JOB_METADATA_OFFSET_ENV]:
+        monkeypatch.setenv(var, jobs[0].env[var])
+    metadata = _read_job_metadata()
+    assert metadata["imgtype"]["value"] == ["VIS", "NIR"] and os.listdir(tmp_dir) == ["job_metadata.jsonl"] and \
+        not any(str(part).startswith("--job_metadata") for part in jobs[0])
@@ -1,10 +1,15 @@
 import pytest
 import os
+import json
 import dask
+import pandas as pd
 from unittest.mock import MagicMock, patch
 from dask.distributed import Client
-from plantcv.parallel import create_dask_cluster, multiprocess
-from plantcv.parallel.multiprocess import _process_images_multiproc
+from plantcv.parallel import create_dask_cluster, multiprocess, process_results, WorkflowConfig, WorkflowInputs, \
+    job_builder
+from plantcv.parallel.multiprocess import _process_images_multiproc, _process_images_inprocess, _batch_size, \
+    _process_batch, _batch_jobs, _speculative_batch
+from plantcv.parallel.manifest import _read_manifest
 
 
 def test_create_dask_cluster_local(tmpdir):
@@ -30,6 +35,36 @@ def test_create_dask_cluster():
     assert status == "running"
 
 
+def test_create_dask_cluster_inprocess_threads():
+    """Test for PlantCV."""
+    with patch("dask_jobqueue.HTCondorCluster") as mock_cluster, \
+         patch("plantcv.parallel.multiprocess.Client"):
+        _ = create_dask_cluster(cluster="HTCondorCluster", cluster_config={"cores": 4, "memory": "1GB", "disk": "1GB"},
+                                run_mode="inprocess")
+        # Each in-process worker runs a single thread
+        assert mock_cluster.call_args.kwargs["processes"] == 4
+        with pytest.raises(RuntimeError):
+            _ = create_dask_cluster(cluster="HTCondorCluster", run_mode="inprocess",
+                                    cluster_config={"cores": 4, "processes": 2, "memory": "1GB", "disk": "1GB"})
+
+
+def test_create_dask_cluster_resources():
+    """Test for PlantCV."""
+    with patch("dask_jobqueue.SLURMCluster") as mock_cluster, \
+         patch("plantcv.parallel.multiprocess.Client"):
+        _ = create_dask_cluster(cluster="SLURMCluster", cluster_config={
+            "cores": 1, "memory": "1GB", "disk": "1GB", "resources": {"bigmem": 1, "gpu": 2},
+            "worker_extra_args": ["--lifetime", "1h"]})
+        # Worker resources are passed on the worker command line
+        kwargs = mock_cluster.call_args.kwargs
+        assert "resources" not in kwargs
+        assert kwargs["worker_extra_args"] == ["--lifetime", "1h", "--resources", "bigmem=1 gpu=2"]
+        with pytest.raises(RuntimeError):
+            _ = create_dask_cluster(cluster="SLURMCluster", cluster_config={
+                "cores": 1, "memory": "1GB", "disk": "1GB", "resources": {"bigmem": 1},
+                "worker_extra_args": ["--resources", "bigmem=1"]})
+
+
 def test_create_dask_cluster_invalid_cluster():
     """Test for PlantCV."""
     with pytest.raises(ValueError):
@@ -54,4 +89,300 @@ def test_multiprocess(parallel_test_data, tmpdir):
 
 def test_process_images_multiproc():
     """Test for PlantCV."""
-    assert _process_images_multiproc(['python', '-c', 'print("Hello World!")']) is None
+    assert _process_images_multiproc(['python', '-c', 'print("Hello World!")']) == 0
+
+
+def test_process_batch_telemetry():
+    """Test for PlantCV."""
+    telemetry = _process_batch([['python', '-c', 'print("Hello World!")'], ['python', '-c', 'import sys; sys.exit(2)']])
+    assert [job["status"] for job in telemetry] == [0, 2] and all(job["wall_time"] > 0 for job in telemetry)
+
+
+def test_process_batch_job_metadata(parallel_test_data, tmpdir):
+    """Test for PlantCV."""
+    # Create tmp directory
+    tmp_dir = tmpdir.mkdir("sub")
+    # A workflow script with its own command-line parser that does not use workflow_inputs
+    workflow = os.path.join(tmp_dir, "workflow.py")
+    with open(workflow, "w") as fp:
+        fp.write("import argparse\n"
+                 "from plantcv import plantcv as pcv\n"
+                 "parser = argparse.ArgumentParser()\n"
+                 "parser.add_argument('images', nargs='+')\n"
+                 "parser.add_argument('--names')\n"
+                 "parser.add_argument('--result')\n"
+                 "parser.add_argument('--outdir')\n"
+                 "args = parser.parse_args()\n"
+                 "pcv.outputs.save_results(filename=args.result)\n")
+    config = WorkflowConfig()
+    config.input_dir = parallel_test_data.snapshot_imgdir
+    config.json = "output.json"
+    config.tmp_dir = str(tmp_dir)
+    config.filename_metadata = ["imgtype", "camera", "rotation", "zoom", "lifter", "gain", "exposure", "id"]
+    config.workflow = workflow
+    config.img_outdir = str(tmp_dir)
+    config.timestampformat = '%Y-%m-%d %H:%M:%S.%f'
+    jobs = job_builder(meta=parallel_test_data.metadata_snapshot_coprocess(), config=config)
+    telemetry = _process_batch(jobs[:1])
+    with open(jobs[0][jobs[0].index("--result") + 1], "r") as fp:
+        results = json.load(fp)
+    # The job metadata is saved with the results
+    assert telemetry[0]["status"] == 0 and results["metadata"]["imgtype"]["value"] == ["VIS", "NIR"]
+
+
+def test_process_batch_timeout_retries():
+    """Test for PlantCV."""
+    batch = [['python', '-c', 'import time; time.sleep(30)']]
+    telemetry = _process_batch(batch, timeout=0.5, retries=1)
+    # The slow job is killed at each attempt
+    assert telemetry[0]["status"] != 0 and telemetry[0]["timed_out"]
+    assert telemetry[0]["attempts"] == 2 and telemetry[0]["wall_time"] < 10
+
+
+def test_process_batch_retries():
+    """Test for PlantCV."""
+    batch = [['python', '-c', 'import sys; sys.exit(2)']]
+    telemetry = _process_batch(batch, timeout=60, retries=1)
+    # The failed job is run again and is not reported as timed out
+    assert telemetry[0]["status"] == 2 and not telemetry[0]["timed_out"]
+    assert telemetry[0]["attempts"] == 2
+
+
+def test_speculative_batch():
+    """Test for PlantCV."""
+    batch = [['python', 'workflow.py', '--result', '0.json', 'image.png'],
+             WorkflowInputs(images=["image.png"], names="vis", result="1.json")]
+    duplicate = _speculative_batch(batch, attempt=1)
+    # Duplicates save results to separate files and the original jobs are unchanged
+    assert duplicate[0][3] == "0.json.speculative1" and duplicate[1].result == "1.json.speculative1"
+    assert batch[0][3] == "0.json" and batch[1].result == "1.json"
+
+
+def test_multiprocess_inprocess(parallel_test_data, tmpdir):
+    """Test for PlantCV."""
+    # Create tmp directory
+    tmp_dir = tmpdir.mkdir("sub")
+    # Set the temp directory for dask
+    dask.config.set(temporary_directory=tmp_dir)
+    config = WorkflowConfig()
+    config.workflow = parallel_test_data.workflow_script
+    config.tmp_dir = str(tmp_dir)
+    config.run_mode = "inprocess"
+    result_file = os.path.join(tmp_dir, "result.json")
+    jobs = [WorkflowInputs(images=[parallel_test_data.image_path], names="vis", result=result_file, outdir=tmp_dir,
+                           other="on")]
+    # Create a dask LocalCluster client with single-threaded workers
+    with Client(n_workers=1, threads_per_worker=1) as client:
+        multiprocess(jobs, client=client, config=config)
+        # Results are streamed to the job directory with the job telemetry
+        with open(os.path.join(tmp_dir, "results.jsonl"), "r") as fp:
+            entity = json.loads(fp.readline())
+        assert os.path.exists(result_file) and entity["metadata"]["job_status"]["value"] == [0]
+
+
+def _observation_workflow(tmp_dir):
+    """Write a workflow that records the image of its job and saves it after other jobs have started."""
+    workflow = os.path.join(tmp_dir, "workflow.py")
+    with open(workflow, "w") as fp:
+        fp.write("import time\n"
+                 "from plantcv import plantcv as pcv\n\n\n"
+                 "def main(args):\n"
+                 "    pcv.outputs.add_observation(sample='default', variable='job', trait='job', method='test',\n"
+                 "                                scale='none', datatype=str, value=args.vis, label='none')\n"
+                 "    time.sleep(0.5)\n"
+                 "    pcv.outputs.save_results(filename=args.result, outformat=args.outformat)\n")
+    return workflow
+
+
+def test_multiprocess_inprocess_parquet(parallel_test_data, tmpdir):
+    """Test for PlantCV."""
+    # Create tmp directory
+    tmp_dir = tmpdir.mkdir("sub")
+    # Set the temp directory for dask
+    dask.config.set(temporary_directory=tmp_dir)
+    config = WorkflowConfig()
+    config.workflow = _observation_workflow(tmp_dir=tmp_dir)
+    config.tmp_dir = str(tmp_dir)
+    config.run_mode = "inprocess"
+    config.results_format = "parquet"
+    result_file = os.path.join(tmp_dir, "result.json")
+    jobs = [WorkflowInputs(images=[parallel_test_data.image_path], names="vis", result=result_file, outdir=tmp_dir,
+                           outformat="parquet", other="on")]
+    # Create a dask LocalCluster client with single-threaded workers
+    with Client(n_workers=1, threads_per_worker=1) as client:
+        telemetry = multiprocess(jobs, client=client, config=config)
+        # The job telemetry is added to the single-value traits table
+        df = pd.read_parquet(f"{result_file}-single-value-traits.parquet")
+        assert list(df["job_status"]) == [0] and df["job_wall_time"][0] > 0 and df["job_max_rss"].isna().all()
+        # The peak memory of the worker process is not reported for in-process jobs
+        assert telemetry[0]["max_rss"] is None and telemetry[0]["cpu_time"] is not None
+
+
+def test_process_images_inprocess(parallel_test_data, tmpdir):
+    """Test for PlantCV."""
+    from plantcv.plantcv import params
+    result_file = os.path.join(tmpdir, "result.json")
+    params.debug = "plot"
+    job = WorkflowInputs(images=[parallel_test_data.image_path], names="vis", result=result_file)
+    _process_images_inprocess(job, workflow=parallel_test_data.workflow_script)
+    assert os.path.exists(result_file) and params.debug is None
+
+
+def test_process_images_inprocess_bad_function(parallel_test_data, tmpdir):
+    """Test for PlantCV."""
+    result_file = os.path.join(tmpdir, "result.json")
+    job = WorkflowInputs(images=[parallel_test_data.image_path], names="vis", result=result_file)
+    # A missing workflow function is reported without raising an exception
+    status = _process_images_inprocess(job, workflow=parallel_test_data.workflow_script, function="not_a_function")
+    assert status == 1 and not os.path.exists(result_file)
+
+
+def test_multiprocess_batch(parallel_test_data, tmpdir):
+    """Test for PlantCV."""
+    # Create tmp directory
+    tmp_dir = tmpdir.mkdir("sub")
+    # Set the temp directory for dask
+    dask.config.set(temporary_directory=tmp_dir)
+    config = WorkflowConfig()
+    config.workflow = parallel_test_data.workflow_script
+    config.tmp_dir = str(tmp_dir)
+    config.run_mode = "inprocess"
+    config.batch_size = 2
+    result_files = [os.path.join(tmp_dir, f"result{i}.json") for i in range(3)]
+    jobs = [WorkflowInputs(images=[parallel_test_data.image_path], names="vis", result=result_file, outdir=tmp_dir,
+                           other="on") for result_file in result_files]
+    # Create a dask LocalCluster client with single-threaded workers
+    with Client(n_workers=1, threads_per_worker=1) as client:
+        multiprocess(jobs, client=client, config=config)
+        assert all(os.path.exists(result_file) for result_file in result_files)
+
+
+@pytest.mark.parametrize("batch_size,n_workers,expected", [[5, 1, 5], ["auto", 2, 50], ["auto", 100, 1]])
+def test_batch_size(batch_size, n_workers, expected):
+    """Test for PlantCV."""
+    config = WorkflowConfig()
+    config.batch_size = batch_size
+    config.cluster_config["n_workers"] = n_workers
+    assert _batch_size(n_jobs=1000, config=config) == expected
+
+
+def test_multiprocess_job_dir(parallel_test_data, tmpdir):
+    """Test for PlantCV."""
+    # Create tmp directory
+    tmp_dir = tmpdir.mkdir("sub")
+    # Set the temp directory for dask
+    dask.config.set(temporary_directory=tmp_dir)
+    config = WorkflowConfig()
+    config.workflow = parallel_test_data.workflow_script
+    config.job_dir = str(tmp_dir)
+    result_file = os.path.join(tmp_dir, "result.json")
+    jobs = [['python', parallel_test_data.workflow_script, '--outdir', tmp_dir, '--result', result_file, "--names",
+             "vis", '--other', 'on', parallel_test_data.image_path],
+            ['python', os.path.join(tmp_dir, "missing.py"), '--outdir', tmp_dir, '--result',
+             os.path.join(tmp_dir, "failed.json"), "--names", "vis", parallel_test_data.image_path]]
+    # Create a dask LocalCluster client
+    with Client(n_workers=1) as client:
+        telemetry = multiprocess(jobs, client=client, config=config)
+        # Only the successful job is recorded as completed
+        assert _read_manifest(job_dir=config.job_dir) == {"result.json"}
+        assert sorted(job["status"] != 0 for job in telemetry) == [False, True]
+
+
+def test_batch_jobs():
+    """Test for PlantCV."""
+    jobs = [WorkflowInputs(images=[f"{imgtype}_{i}.png"], names="vis", result=f"{i}.json",
+                           metadata={"image": {"value": [f"{imgtype}_{i}.png"]}})
+            for i, imgtype in enumerate(["HYPER", "VIS", "VIS", "HYPER", "VIS"])]
+    batches, resources = _batch_jobs(jobs=jobs, size=2, job_resources={"HYPER": {"bigmem": 1}})
+    # Batches only contain jobs that require the same resources and keep the job order
+    assert [[job.result for job in batch] for batch in batches] == [
+        ["0.json", "3.json"], ["1.json", "2.json"], ["4.json"]]
+    assert resources == [{"bigmem": 1}, None, None]
+
+
+def test_multiprocess_job_resources(parallel_test_data, tmpdir):
+    """Test for PlantCV."""
+    # Create tmp directory
+    tmp_dir = tmpdir.mkdir("sub")
+    # Set the temp directory for dask
+    dask.config.set(temporary_directory=tmp_dir)
+    config = WorkflowConfig()
+    config.workflow = parallel_test_data.workflow_script
+    config.tmp_dir = str(tmp_dir)
+    config.run_mode = "inprocess"
+    config.job_resources = {"VIS": {"bigmem": 1}}
+    result_file = os.path.join(tmp_dir, "result.json")
+    jobs = [WorkflowInputs(images=[parallel_test_data.image_path], names="vis", result=result_file, outdir=tmp_dir,
+                           other="on")]
+    # Create a dask LocalCluster client with a worker that provides the resource
+    with create_dask_cluster(cluster="LocalCluster", cluster_config={"n_workers": 1, "resources": {"bigmem": 1}},
+                             run_mode="inprocess") as client:
+        multiprocess(jobs, client=client, config=config)
+        assert os.path.exists(result_file)
+
+
+def test_multiprocess_speculative(parallel_test_data, tmpdir):
+    """Test for PlantCV."""
+    # Create tmp directory
+    tmp_dir = tmpdir.mkdir("sub")
+    # Set the temp directory for dask
+    dask.config.set(temporary_directory=tmp_dir)
+    config = WorkflowConfig()
+    config.workflow = parallel_test_data.workflow_script
+    config.tmp_dir = str(tmp_dir)
+    config.speculative = True
+    config.job_retries = 1
+    result_files = [os.path.join(tmp_dir, f"result{i}.json") for i in range(2)]
+    jobs = [['python', parallel_test_data.workflow_script, '--outdir', tmp_dir, '--result', result_file, "--names",
+             "vis", '--other', 'on', parallel_test_data.image_path] for result_file in result_files]
+    # Create a dask LocalCluster client with more worker threads than jobs
+    with Client(n_workers=1, threads_per_worker=4) as client:
+        telemetry = multiprocess(jobs, client=client, config=config)
+        # Each job is recorded once and saves its results to its results file
+        assert sorted(job["result"] for job in telemetry) == ["result0.json", "result1.json"]
+        assert all(os.path.exists(result_file) for result_file in result_files)
+        # Speculative results of copies that lost (and may still be running) are not combined with the results
+        json_file = os.path.join(tmpdir, "results.json")
+        process_results(job_dir=str(tmp_dir), json_file=json_file)
+        with open(json_file, "r") as fp:
+            assert len(json.load(fp)["entities"]) == 2
+
+
+def test_multiprocess_inprocess_concurrent(tmpdir):
+    """Test for PlantCV."""
+    # Create tmp directory
+    tmp_dir = tmpdir.mkdir("sub")
+    # Set the temp directory for dask
+    dask.config.set(temporary_directory=tmp_dir)
+    config = WorkflowConfig()
+    config.workflow = _observation_workflow(tmp_dir=tmp_dir)
+    config.tmp_dir = str(tmp_dir)
+    config.run_mode = "inprocess"
+    result_files = [os.path.join(tmp_dir, f"result{i}.json") for i in range(4)]
+    jobs = [WorkflowInputs(images=[f"image{i}.png"], names="vis", result=result_file)
+            for i, result_file in enumerate(result_files)]
+    with create_dask_cluster(cluster="LocalCluster", cluster_config={"n_workers": 2}, run_mode="inprocess") as client:
+        multiprocess(jobs, client=client, config=config)
+        # Each job saves only its own observations
+        for i, result_file in enumerate(result_files):
+            with open(result_file, "r") as fp:
+                results = json.load(fp)
+            assert results["observations"]["default"]["job"]["value"] == f"image{i}.png"
+
+
+def test_multiprocess_inprocess_threads(parallel_test_data, tmpdir):
+    """Test for PlantCV."""
+    # Create tmp directory
+    tmp_dir = tmpdir.mkdir("sub")
+    # Set the temp directory for dask
+    dask.config.set(temporary_directory=tmp_dir)
+    config = WorkflowConfig()
+    config.workflow = parallel_test_data.workflow_script
+    config.tmp_dir = str(tmp_dir)
+    config.run_mode = "inprocess"
+    jobs = [WorkflowInputs(images=[parallel_test_data.image_path], names="vis",
+                           result=os.path.join(tmp_dir, "result.json"))]
+    # In-process jobs cannot share a multi-threaded worker
+    with Client(n_workers=1, threads_per_worker=2) as client:
+        with pytest.raises(RuntimeError):
+            multiprocess(jobs, client=client, config=config)
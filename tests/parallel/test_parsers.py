@@ -1,4 +1,6 @@
 import pytest
+import json
+from plantcv.parallel import parsers
 from plantcv.parallel import metadata_parser, WorkflowConfig
 
 
@@ -77,3 +79,37 @@ def test_estimate_filename_metadata(parallel_test_data, subdirs):
     config.include_all_subdirs = subdirs
     meta, _ = metadata_parser(config=config)
     assert len(meta) == 2
+
+
+def test_metadata_parser_cache(parallel_test_data, tmpdir):
+    """Test for PlantCV.
+
+    Test reusing cached directory listings and filename metadata.
+    """
+    # Create config instance
+    config = WorkflowConfig()
+    config.input_dir = parallel_test_data.flat_imgdir
+    config.filename_metadata = ["imgtype", "camera", "frame", "zoom", "lifter", "gain", "exposure", "id"]
+    config.imgformat = "jpg"
+    config.metadata_cache = str(tmpdir.join("metadata_cache.json"))
+    meta, _ = metadata_parser(config=config)
+    with open(config.metadata_cache, "r") as fp:
+        cache = json.load(fp)
+    # The second run reads the filename metadata from the cache
+    cached_meta, _ = metadata_parser(config=config)
+    assert len(cache["images"]) == 2 and cached_meta.obj.equals(meta.obj)
+
+
+def test_metadata_parser_parallel(parallel_test_data, monkeypatch):
+    """Test for PlantCV.
+
+    Test parsing filenames in multiple processes.
+    """
+    monkeypatch.setattr(parsers, "_PARALLEL_PARSE_MIN_FILES", 1)
+    # Create config instance
+    config = WorkflowConfig()
+    config.input_dir = parallel_test_data.flat_imgdir
+    config.filename_metadata = ["imgtype", "camera", "frame", "zoom", "lifter", "gain", "exposure", "id"]
+    config.imgformat = "jpg"
+    meta, _ = metadata_parser(config=config)
+    assert len(meta) == 2
@@ -1,6 +1,10 @@
 import pytest
 import os
+import json
+import shutil
+import pandas as pd
 from plantcv.parallel import process_results
+from plantcv.parallel.process_results import _ResultsStream, _add_table_columns
 
 
 def test_process_results(parallel_test_data, tmpdir):
@@ -16,6 +20,19 @@ def test_process_results(parallel_test_data, tmpdir):
     assert results == expected
 
 
+def test_process_results_append_stream(parallel_test_data, tmpdir, monkeypatch):
+    """Test for PlantCV."""
+    # Create a test tmp directory and an indented results file with the variables before the entities
+    result_file = tmpdir.mkdir("sub").join("appended_results.json")
+    results = parallel_test_data.new_results()
+    with open(result_file, "w") as fp:
+        json.dump({"variables": results["variables"], "entities": results["entities"]}, fp, indent=4)
+    # Existing entities are decoded from small chunks of the file, one entity at a time
+    monkeypatch.setattr("plantcv.utils.converters._CHUNK_SIZE", 64)
+    process_results(job_dir=parallel_test_data.parallel_results_dir, json_file=result_file)
+    assert parallel_test_data.load_json(json_file=result_file) == parallel_test_data.appended_results()
+
+
 def test_process_results_new_output(parallel_test_data, tmpdir):
     """Test for PlantCV."""
     # Create a test tmp directory and results file
@@ -41,3 +58,91 @@ def test_process_results_invalid_json(tmpdir):
     result_file.write("Invalid")
     with pytest.raises(RuntimeError):
         process_results(job_dir=os.path.split(str(result_file))[0], json_file=result_file)
+    # The existing results file is not replaced
+    assert result_file.read() == "Invalid" and not os.path.exists(f"{result_file}.tmp")
+
+
+def test_process_results_stream(parallel_test_data, tmpdir):
+    """Test for PlantCV."""
+    # Create a test job directory with one job results file
+    job_dir = tmpdir.mkdir("jobs")
+    result_file = os.path.join(job_dir, "result.json")
+    shutil.copy(os.path.join(parallel_test_data.parallel_results_dir, "VIS_SV_0_z1_h1_g0_e82_117770.jpg.txt"),
+                result_file)
+    # Stream the same job twice (e.g. a rerun), only the latest results are kept
+    stream = _ResultsStream(job_dir=str(job_dir))
+    stream.add(result_file=result_file)
+    stream.add(result_file=result_file)
+    stream.close()
+    # Simulate an index line that was interrupted
+    with open(os.path.join(job_dir, "results.index"), "a") as fp:
+        fp.write("result.json\t0")
+    json_file = tmpdir.join("new_result.json")
+    process_results(job_dir=str(job_dir), json_file=json_file)
+    assert parallel_test_data.load_json(json_file=json_file) == parallel_test_data.new_results()
+
+
+def test_process_results_stream_removed_result(parallel_test_data, tmpdir):
+    """Test for PlantCV."""
+    # Create a test job directory with one job results file
+    job_dir = tmpdir.mkdir("jobs")
+    result_file = os.path.join(job_dir, "result.json")
+    shutil.copy(os.path.join(parallel_test_data.parallel_results_dir, "VIS_SV_0_z1_h1_g0_e82_117770.jpg.txt"),
+                result_file)
+    stream = _ResultsStream(job_dir=str(job_dir))
+    stream.add(result_file=result_file)
+    stream.close()
+    # Results of jobs whose results file was removed (e.g. stale results) are not included
+    os.remove(result_file)
+    json_file = tmpdir.join("new_result.json")
+    process_results(job_dir=str(job_dir), json_file=json_file)
+    assert parallel_test_data.load_json(json_file=json_file)["entities"] == []
+
+
+def test_results_stream_flush(parallel_test_data, tmpdir):
+    """Test for PlantCV."""
+    # Create a test job directory with one job results file
+    job_dir = tmpdir.mkdir("jobs")
+    result_file = os.path.join(job_dir, "result.json")
+    shutil.copy(os.path.join(parallel_test_data.parallel_results_dir, "VIS_SV_0_z1_h1_g0_e82_117770.jpg.txt"),
+                result_file)
+    stream = _ResultsStream(job_dir=str(job_dir))
+    stream.add(result_file=result_file)
+    # Flushed results can be read while the stream is still open
+    stream.flush()
+    json_file = tmpdir.join("new_result.json")
+    process_results(job_dir=str(job_dir), json_file=json_file)
+    stream.close()
+    assert parallel_test_data.load_json(json_file=json_file) == parallel_test_data.new_results()
+
+
+def test_process_results_parquet(tmpdir):
+    """Test for PlantCV."""
+    # Create a test job directory with the columnar results of two jobs that measured different traits
+    job_dir = tmpdir.mkdir("jobs")
+    pd.DataFrame({"sample": ["default"], "area_pixels": [10]}).to_parquet(
+        os.path.join(job_dir, "job1.json-single-value-traits.parquet"))
+    pd.DataFrame({"sample": ["default"], "area_pixels": [2.5], "height_pixels": [4]}).to_parquet(
+        os.path.join(job_dir, "job2.json-single-value-traits.parquet"))
+    # Results of a speculative copy of a batch that lost are not included
+    pd.DataFrame({"sample": ["default"], "area_pixels": [2.5], "height_pixels": [4]}).to_parquet(
+        os.path.join(job_dir, "job2.json.speculative1-single-value-traits.parquet"))
+    json_file = str(tmpdir.join("results.json"))
+    process_results(job_dir=str(job_dir), json_file=json_file, outformat="parquet")
+    # Appending keeps the existing rows
+    process_results(job_dir=str(job_dir), json_file=json_file, outformat="parquet")
+    df = pd.read_parquet(f"{json_file}-single-value-traits.parquet")
+    assert list(df["area_pixels"]) == [10, 2.5, 10, 2.5] and df["height_pixels"].isna().sum() == 2
+    # No job saved a multi-value traits table
+    assert len(pd.read_parquet(f"{json_file}-multi-value-traits.parquet")) == 0
+
+
+def test_add_table_columns(tmpdir):
+    """Test for PlantCV."""
+    table_file = str(tmpdir.join("job.json-single-value-traits.parquet"))
+    pd.DataFrame({"camera": ["vis", "vis"], "sample": ["a", "b"], "area_pixels": [10, 20]}).to_parquet(table_file)
+    _add_table_columns(table_file=table_file, columns={"job_status": (int, 0), "job_max_rss": (int, None)})
+    df = pd.read_parquet(table_file)
+    # The columns are added with the metadata, before the sample column
+    assert list(df.columns) == ["camera", "job_status", "job_max_rss", "sample", "area_pixels"]
+    assert list(df["job_status"]) == [0, 0] and df["job_max_rss"].isna().all()
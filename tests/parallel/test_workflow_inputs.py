@@ -1,3 +1,4 @@
+from plantcv.plantcv import outputs
 from plantcv.parallel import WorkflowInputs, workflow_inputs
 
 
@@ -13,3 +14,14 @@ def test_workflow_inputs():
     sys.argv = ["workflow.py", "--names", "vis", "--result", "test.txt", "--other", "otherval", "vis.png"]
     args = workflow_inputs(*["other"])
     assert args.vis == "vis.png"
+
+
+def test_workflow_inputs_job_metadata():
+    """Test for PlantCV."""
+    import sys
+    # The metadata of a plantcv-run-workflow job is read from the job environment when plantcv is imported
+    outputs.job_metadata = {"imgtype": {"value": ["NIR"]}}
+    sys.argv = ["workflow.py", "--names", "vis", "--result", "test.txt", "vis.png"]
+    args = workflow_inputs()
+    assert args.metadata["imgtype"]["value"] == ["NIR"]
+    outputs.job_metadata = {}
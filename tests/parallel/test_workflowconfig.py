@@ -1,3 +1,4 @@
+import pytest
 from plantcv.parallel import WorkflowConfig
 
 
@@ -95,3 +96,92 @@ def test_invalid_cluster():
     config.cluster = "MyCluster"
     # Validate config
     assert not config.validate_config()
+
+
+def test_invalid_run_mode(parallel_test_data, tmpdir):
+    """Test for PlantCV."""
+    # Create a test tmp directory
+    img_outdir = tmpdir.mkdir("cache")
+    # Create config instance
+    config = WorkflowConfig()
+    # Set valid values in config
+    config.input_dir = parallel_test_data.flat_imgdir
+    config.json = "valid_config.json"
+    config.filename_metadata = ["imgtype", "camera", "frame", "zoom", "lifter", "gain", "exposure", "id"]
+    config.workflow = parallel_test_data.workflow_script
+    config.img_outdir = img_outdir
+    config.run_mode = "thread"
+    # Validate config
+    assert not config.validate_config()
+
+
+def test_invalid_batch_size(parallel_test_data, tmpdir):
+    """Test for PlantCV."""
+    # Create a test tmp directory
+    img_outdir = tmpdir.mkdir("cache")
+    # Create config instance
+    config = WorkflowConfig()
+    # Set valid values in config
+    config.input_dir = parallel_test_data.flat_imgdir
+    config.json = "valid_config.json"
+    config.filename_metadata = ["imgtype", "camera", "frame", "zoom", "lifter", "gain", "exposure", "id"]
+    config.workflow = parallel_test_data.workflow_script
+    config.img_outdir = img_outdir
+    config.batch_size = 0
+    # Validate config
+    assert not config.validate_config()
+
+
+def test_invalid_results_format(parallel_test_data, tmpdir):
+    """Test for PlantCV."""
+    # Create a test tmp directory
+    img_outdir = tmpdir.mkdir("cache")
+    # Create config instance
+    config = WorkflowConfig()
+    # Set valid values in config
+    config.input_dir = parallel_test_data.flat_imgdir
+    config.json = "valid_config.json"
+    config.filename_metadata = ["imgtype", "camera", "frame", "zoom", "lifter", "gain", "exposure", "id"]
+    config.workflow = parallel_test_data.workflow_script
+    config.img_outdir = img_outdir
+    config.results_format = "csv"
+    # Validate config
+    assert not config.validate_config()
+
+
+def test_invalid_job_order(parallel_test_data, tmpdir):
+    """Test for PlantCV."""
+    # Create a test tmp directory
+    img_outdir = tmpdir.mkdir("cache")
+    # Create config instance
+    config = WorkflowConfig()
+    # Set valid values in config
+    config.input_dir = parallel_test_data.flat_imgdir
+    config.json = "valid_config.json"
+    config.filename_metadata = ["imgtype", "camera", "frame", "zoom", "lifter", "gain", "exposure", "id"]
+    config.workflow = parallel_test_data.workflow_script
+    config.img_outdir = img_outdir
+    config.job_order = "random"
+    # Validate config
+    assert not config.validate_config()
+
+
+@pytest.mark.parametrize("job_timeout,job_retries,run_mode",
+                         [[0, 0, "subprocess"], [10, -1, "subprocess"], [10, 0, "inprocess"]])
+def test_invalid_job_timeout_retries(job_timeout, job_retries, run_mode, parallel_test_data, tmpdir):
+    """Test for PlantCV."""
+    # Create a test tmp directory
+    img_outdir = tmpdir.mkdir("cache")
+    # Create config instance
+    config = WorkflowConfig()
+    # Set valid values in config
+    config.input_dir = parallel_test_data.flat_imgdir
+    config.json = "valid_config.json"
+    config.filename_metadata = ["imgtype", "camera", "frame", "zoom", "lifter", "gain", "exposure", "id"]
+    config.workflow = parallel_test_data.workflow_script
+    config.img_outdir = img_outdir
+    config.job_timeout = job_timeout
+    config.job_retries = job_retries
+    config.run_mode = run_mode
+    # Validate config
+    assert not config.validate_config()
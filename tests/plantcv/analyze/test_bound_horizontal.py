@@ -1,5 +1,6 @@
 import pytest
 import cv2
+import numpy as np
 from plantcv.plantcv import outputs
 from plantcv.plantcv.analyze import bound_horizontal as analyze_bound_horizontal
 
@@ -23,3 +24,19 @@ def test_analyze_bound_horizontal_grayscale_image(test_data):
     mask = cv2.imread(test_data.small_bin_img, -1)
     boundary_img = analyze_bound_horizontal(img=img, labeled_mask=mask, n_labels=1, line_position=200)
     assert len(boundary_img.shape) == 3
+
+
+def test_analyze_bound_horizontal_objects():
+    """Test for PlantCV."""
+    # Clear previous outputs
+    outputs.clear()
+    img = np.zeros((80, 50), dtype=np.uint8)
+    labeled_mask = np.zeros((80, 50), dtype=np.int32)
+    labeled_mask[10:30, 5:15] = 1
+    labeled_mask[40:60, 30:40] = 2
+    _ = analyze_bound_horizontal(img=img, labeled_mask=labeled_mask, n_labels=2, line_position=20)
+    # Object positions are measured in the whole image, the row above the line is also counted below the line
+    heights = [(outputs.observations[sample]["height_above_reference"]["value"],
+                outputs.observations[sample]["height_below_reference"]["value"])
+               for sample in ["default_1", "default_2"]]
+    assert heights == [(10, 11), (0, 20)]
@@ -1,5 +1,6 @@
 import pytest
 import cv2
+import numpy as np
 from plantcv.plantcv import outputs
 from plantcv.plantcv.analyze import color as analyze_color
 
@@ -16,6 +17,26 @@ def test_color(colorspace, test_data):
     assert outputs.observations['default_1']['hue_median']['value'] == 80.0
 
 
+def test_color_multilabel(test_data):
+    """Test for PlantCV."""
+    # Clear previous outputs
+    outputs.clear()
+    # Read in test data
+    img = cv2.imread(test_data.small_rgb_img)
+    mask = cv2.imread(test_data.small_bin_img, -1)
+    # Object 1 is the plant, object 2 is missing from the mask and object 3 is one pixel of the plant
+    labeled_mask = np.where(mask > 0, 1, 0).astype(np.int32)
+    y, x = np.argwhere(mask > 0)[0]
+    labeled_mask[y, x] = 3
+    _ = analyze_color(rgb_img=img, labeled_mask=labeled_mask, n_labels=3, colorspaces="all")
+    hue = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)[y, x, 0]
+    assert outputs.observations['default_1']['hue_median']['value'] == 80.0
+    assert np.isnan(outputs.observations['default_2']['hue_median']['value'])
+    assert sum(outputs.observations['default_2']['red_frequencies']['value']) == 0
+    assert outputs.observations['default_3']['hue_median']['value'] == hue * 2
+    assert outputs.observations['default_3']['hue_frequencies']['value'][hue] == 100
+
+
 def test_color_bad_imgtype(test_data):
     """Test for PlantCV."""
     img_binary = cv2.imread(test_data.small_bin_img, -1)
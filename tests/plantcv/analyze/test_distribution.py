@@ -1,5 +1,6 @@
 # Tests for pcv.analyze.distribution
 import cv2
+import numpy as np
 from plantcv.plantcv import outputs
 from plantcv.plantcv.analyze import distribution as analyze_distribution
 
@@ -14,3 +15,16 @@ def test_distribution(test_data):
     _ = analyze_distribution(labeled_mask=mask, n_labels=1, direction="across", hist_range="relative")
     print(outputs.observations)
     assert int(outputs.observations['default_1']['x_distribution_mean']['value']) == 130
+
+
+def test_distribution_objects():
+    """Test for PlantCV."""
+    # Clear previous outputs
+    outputs.clear()
+    labeled_mask = np.zeros((100, 50), dtype=np.int32)
+    labeled_mask[5:15, 5:15] = 1
+    labeled_mask[60:90, 30:40] = 2
+    _ = analyze_distribution(labeled_mask=labeled_mask, n_labels=2, bin_size=20)
+    # Histograms of each object span the whole image
+    hists = [outputs.observations[sample]["y_frequencies"]["value"] for sample in ["default_1", "default_2"]]
+    assert hists == [[100, 0, 0, 0, 0], [0, 0, 0, 200, 100]]
@@ -1,6 +1,7 @@
 """Tests for pcv.analyze.npq."""
 import pytest
 import numpy as np
+import xarray as xr
 from plantcv.plantcv import outputs
 from plantcv.plantcv.analyze import npq as analyze_npq
 
@@ -58,3 +59,30 @@ def test_npq_wrong_num_labels(test_data):
                         ps_da_light=test_data.psii_cropreporter('ojip_light'),
                         labeled_mask=test_data.create_ps_mask(),
                         measurement_labels=None, label=["prefix", "prefix"])
+
+
+def test_npq_measurement_order():
+    """Test for PlantCV."""
+    # Clear results
+    outputs.clear()
+    rng = np.random.default_rng(0)
+    # Fm of 200 and Fm' of each of 12 measurements (t10 sorts before t2 as text)
+    fm = np.full((10, 10), 200, dtype=np.uint8)
+    da_dark = xr.DataArray(data=np.stack([fm // 4, fm], axis=2)[..., None],
+                           dims=('x', 'y', 'frame_label', 'measurement'),
+                           coords={'frame_label': ['F0', 'Fm'], 'frame_num': ('frame_label', range(0, 2)),
+                                   'measurement': ['t0']}, name='ojip_dark')
+    fmp = rng.integers(20, 200, size=(10, 10, 12)).astype(np.uint8)
+    measurements = [f"t{i}" for i in range(1, 13)]
+    da_light = xr.DataArray(data=np.stack([fmp // 4, fmp], axis=2), dims=('x', 'y', 'frame_label', 'measurement'),
+                            coords={'frame_label': ['Fp', 'Fmp'], 'frame_num': ('frame_label', range(0, 2)),
+                                    'measurement': measurements}, name='ojip_light')
+    labeled_mask = np.zeros((10, 10), dtype=np.int32)
+    labeled_mask[1:5, 1:5] = 1
+    labeled_mask[6:9, 2:8] = 2
+    _ = analyze_npq(ps_da_light=da_light, ps_da_dark=da_dark, labeled_mask=labeled_mask, n_labels=2)
+    # Each measurement is recorded under its own label
+    for obj in [1, 2]:
+        for i, mlabel in enumerate(measurements):
+            expected = np.max(200 / fmp[labeled_mask == obj, i].astype(float) - 1)
+            assert np.isclose(outputs.observations[f"default_{obj}"][f"npq_max_{mlabel}"]["value"], expected)
@@ -1,6 +1,6 @@
 import cv2
 import numpy as np
-from plantcv.plantcv import outputs
+from plantcv.plantcv import outputs, params
 from plantcv.plantcv.analyze import size as analyze_size
 
 
@@ -15,6 +15,40 @@ def test_size(test_data):
     assert int(outputs.observations["default_1"]["area"]["value"]) == 221
 
 
+def test_size_multilabel():
+    """Test for PlantCV."""
+    # Clear previous outputs
+    outputs.clear()
+    # Create a test image
+    img = np.zeros((50, 50), dtype=np.uint8)
+    labeled_mask = np.zeros((50, 50), dtype=np.int32)
+    # Object 1 touches the image edge, object 2 is missing, object 3 is inside the frame
+    labeled_mask[0:10, 0:20] = 1
+    labeled_mask[20:40, 25:35] = 3
+    _ = analyze_size(img=img, labeled_mask=labeled_mask, n_labels=3)
+    assert outputs.observations["default_1"]["area"]["value"] == 200
+    assert not outputs.observations["default_1"]["object_in_frame"]["value"]
+    # Areas are pixel counts, recorded as integers also for missing objects
+    assert outputs.observations["default_2"]["area"]["value"] == 0
+    assert all(isinstance(outputs.observations[sample]["area"]["value"], int) for sample in outputs.observations)
+    assert outputs.observations["default_2"]["object_in_frame"]["value"]
+    assert outputs.observations["default_3"]["center_of_mass"]["value"] == [29.5, 29.5]
+    assert outputs.observations["default_3"]["width"]["value"] == 10
+
+
+def test_size_no_visuals(test_data):
+    """Test for PlantCV."""
+    # Clear previous outputs
+    outputs.clear()
+    # Read in test data
+    img = cv2.imread(test_data.small_rgb_img)
+    mask = cv2.imread(test_data.small_bin_img, -1)
+    params.visuals = False
+    analysis_image = analyze_size(img=img, labeled_mask=mask, n_labels=1)
+    params.visuals = True
+    assert analysis_image is None and int(outputs.observations["default_1"]["area"]["value"]) == 221
+
+
 def test_size_zero_slope():
     """Test for PlantCV."""
     # Clear previous outputs
@@ -85,3 +119,35 @@ def test_size_small_contour(test_data):
     mask = cv2.drawContours(mask, obj_contour, -1, (255), thickness=-1)
     _ = analyze_size(img=img, labeled_mask=mask, n_labels=1)
     assert "defaults" not in outputs.observations
+
+
+def test_size_longest_axis_region():
+    """Test for PlantCV."""
+    # Clear previous outputs
+    outputs.clear()
+    # The caliper of an object is measured around the object, the same in a larger image
+    labeled_mask = np.zeros((60, 60), dtype=np.int32)
+    cv2.ellipse(labeled_mask, (30, 30), (20, 8), 30, 0, 360, 1, -1)
+    _ = analyze_size(img=np.zeros((60, 60), dtype=np.uint8), labeled_mask=labeled_mask, n_labels=1)
+    longest_path = outputs.observations["default_1"]["longest_path"]["value"]
+    outputs.clear()
+    large_mask = np.zeros((60, 3000), dtype=np.int32)
+    large_mask[:, :60] = labeled_mask
+    _ = analyze_size(img=np.zeros((60, 3000), dtype=np.uint8), labeled_mask=large_mask, n_labels=1)
+    assert outputs.observations["default_1"]["longest_path"]["value"] == longest_path == 40.70626487409524
+
+
+def test_size_longest_axis_objects():
+    """Test for PlantCV."""
+    # Clear previous outputs
+    outputs.clear()
+    # The caliper of each object is the same as drawn across the whole image
+    labeled_mask = np.zeros((200, 300), dtype=np.int32)
+    for i, (center, axes, angle) in enumerate([((40, 40), (25, 10), 30), ((150, 60), (30, 12), 100),
+                                               ((250, 50), (20, 18), 0), ((60, 150), (35, 8), 150),
+                                               ((170, 150), (12, 30), 75), ((270, 170), (25, 15), 45)]):
+        cv2.ellipse(labeled_mask, center, axes, angle, 0, 360, i + 1, -1)
+    _ = analyze_size(img=np.zeros((200, 300), dtype=np.uint8), labeled_mask=labeled_mask, n_labels=6)
+    # Longest paths measured with the full image
+    expected = [50.60632371551998, 51.86520991955976, 41.0, 69.31810730249349, 59.22837157984339, 49.64876634922564]
+    assert [outputs.observations[f"default_{i}"]["longest_path"]["value"] for i in range(1, 7)] == expected
@@ -67,3 +67,19 @@ def test_yii_wrong_num_labels(test_data):
         _ = analyze_yii(ps_da=test_data.psii_cropreporter('ojip_dark'),
                         labeled_mask=test_data.create_ps_mask(),
                         measurement_labels=None, label=["prefix", "prefix"])
+
+
+def test_yii_multilabel(test_data):
+    """Test for PlantCV."""
+    # Clear results
+    outputs.clear()
+    da = test_data.psii_cropreporter('ojip_dark')
+    # The second object has a later fluorescence peak, the third object is missing
+    da.values[2, 2, :, 0] = [0, 5, 4, 10]
+    mask = np.zeros((10, 10), dtype=np.int32)
+    mask[5, 5] = 1
+    mask[2, 2] = 2
+    _ = analyze_yii(ps_da=da, labeled_mask=mask, n_labels=3, auto_fm=True)
+    assert np.isclose(outputs.observations["default_1"]["yii_median_t0"]["value"], 0.8)
+    assert np.isclose(outputs.observations["default_2"]["yii_median_t0"]["value"], 0.5)
+    assert np.isnan(outputs.observations["default_3"]["yii_median_t0"]["value"])
@@ -1,6 +1,7 @@
 import pytest
 import numpy as np
 from plantcv.plantcv.hyperspectral import read_data
+from plantcv.plantcv import Objects
 
 
 def test_read_data_default(hyperspectral_test_data):
@@ -37,3 +38,27 @@ def test_read_data_parse_arcgis(hyperspectral_test_data):
     """Test for PlantCV."""
     array_data = read_data(filename=hyperspectral_test_data.arcgis, mode="arcgis")
     assert np.shape(array_data.array_data) == (1, 1600, 978)
+
+
+def test_read_data_memmap(hyperspectral_test_data):
+    """Test for PlantCV."""
+    array_data = read_data(filename=hyperspectral_test_data.envi_bil_file)
+    memmap_data = read_data(filename=hyperspectral_test_data.envi_bil_file, memmap=True)
+    # The pixel value range is calculated on first access
+    lazy = "max_value" not in memmap_data.__dict__
+    assert lazy and np.array_equal(memmap_data.array_data, array_data.array_data)
+    assert memmap_data.max_value == array_data.max_value and np.array_equal(memmap_data.pseudo_rgb,
+                                                                            array_data.pseudo_rgb)
+
+
+@pytest.mark.parametrize("memmap", [True, False])
+def test_read_data_subset(memmap, hyperspectral_test_data):
+    """Test for PlantCV."""
+    array_data = read_data(filename=hyperspectral_test_data.envi_bil_file)
+    roi_con = [np.array([[[10, 0]], [[10, 1]], [[29, 1]], [[29, 0]]], dtype=np.int32)]
+    roi = Objects(contours=[roi_con], hierarchy=[np.array([[[-1, -1, -1, -1]]], dtype=np.int32)])
+    subset = read_data(filename=hyperspectral_test_data.envi_bil_file, memmap=memmap, wavelengths=[540, 480],
+                       roi=roi)
+    bands = [int(array_data.wavelength_dict[wavelength]) for wavelength in subset.wavelength_dict]
+    assert np.array_equal(subset.array_data, array_data.array_data[0:1, 10:29, bands])
+    assert subset.samples == 19 and subset.lines == 1 and len(subset.wavelength_dict) == 2
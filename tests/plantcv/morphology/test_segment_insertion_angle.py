@@ -1,7 +1,9 @@
+import copy
 import pytest
 import cv2
 import numpy as np
-from plantcv.plantcv import outputs
+from plantcv.plantcv import outputs, params
+from plantcv.plantcv.morphology import prune, segment_skeleton, segment_sort, segment_path_length
 from plantcv.plantcv.morphology.segment_insertion_angle import segment_insertion_angle
 
 
@@ -17,6 +19,29 @@ def test_segment_insertion_angle(size, morphology_test_data):
     assert len(outputs.observations['default']['segment_insertion_angle']['value']) == 4
 
 
+def _morphology_workflow(skel, mask, visuals):
+    """Run the morphology functions in workflow order and return the observations."""
+    outputs.clear()
+    params.visuals = visuals
+    pruned_skel, segmented_img, _ = prune(skel_img=skel, size=10, mask=mask)
+    segmented_img, obj = segment_skeleton(skel_img=pruned_skel, mask=mask)
+    leaf_obj, stem_obj = segment_sort(skel_img=pruned_skel, objects=obj, mask=mask)
+    _ = segment_path_length(segmented_img=segmented_img, objects=leaf_obj)
+    _ = segment_insertion_angle(skel_img=pruned_skel, segmented_img=segmented_img, leaf_objects=leaf_obj,
+                                stem_objects=stem_obj, size=20)
+    params.visuals = True
+    return copy.deepcopy(outputs.observations)
+
+
+def test_segment_insertion_angle_no_visuals(morphology_test_data):
+    """Test for PlantCV."""
+    skel = cv2.imread(morphology_test_data.skel_img, -1)
+    mask = cv2.imread(morphology_test_data.bin_img, -1)
+    observations = _morphology_workflow(skel, mask, visuals=True)
+    assert _morphology_workflow(skel, mask, visuals=False) == observations
+    assert len(observations['default']['segment_insertion_angle']['value']) > 0
+
+
 def test_segment_insertion_angle_bad_stem(morphology_test_data):
     """Test for PlantCV."""
     skel = cv2.imread(morphology_test_data.skel_img, -1)
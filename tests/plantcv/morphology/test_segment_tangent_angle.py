@@ -1,6 +1,6 @@
 import pytest
 import cv2
-from plantcv.plantcv import outputs
+from plantcv.plantcv import outputs, params
 from plantcv.plantcv.morphology.segment_tangent_angle import segment_tangent_angle
 
 
@@ -13,3 +13,18 @@ def test_segment_tangent_angle(size, morphology_test_data):
     leaf_obj = morphology_test_data.load_segments(morphology_test_data.segments_file, "leaves")
     _ = segment_tangent_angle(segmented_img=skel, objects=leaf_obj, size=size)
     assert len(outputs.observations['default']['segment_tangent_angle']['value']) == 4
+
+
+def test_segment_tangent_angle_no_visuals(morphology_test_data):
+    """Test for PlantCV."""
+    # Clear previous outputs
+    outputs.clear()
+    skel = cv2.imread(morphology_test_data.skel_img, -1)
+    leaf_obj = morphology_test_data.load_segments(morphology_test_data.segments_file, "leaves")
+    _ = segment_tangent_angle(segmented_img=skel, objects=leaf_obj, size=3)
+    angles = outputs.observations['default']['segment_tangent_angle']['value']
+    outputs.clear()
+    params.visuals = False
+    labeled_img = segment_tangent_angle(segmented_img=skel, objects=leaf_obj, size=3)
+    params.visuals = True
+    assert labeled_img is None and outputs.observations['default']['segment_tangent_angle']['value'] == angles
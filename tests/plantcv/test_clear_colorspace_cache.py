@@ -0,0 +1,20 @@
+import cv2
+import numpy as np
+from plantcv.plantcv import clear_colorspace_cache, rgb2gray_lab, params
+from plantcv.plantcv._helpers import _COLORSPACE_CACHE
+
+
+def test_clear_colorspace_cache(test_data):
+    """Test for PlantCV."""
+    params.colorspace_cache = 4
+    rgb_img = cv2.imread(test_data.small_rgb_img)
+    expected = rgb2gray_lab(rgb_img=rgb_img, channel="l")
+    # Modify the image in place, the cached conversion is stale until it is cleared
+    rgb_img[:] = 0
+    stale = rgb2gray_lab(rgb_img=rgb_img, channel="l")
+    clear_colorspace_cache(rgb_img=rgb_img)
+    cleared = rgb2gray_lab(rgb_img=rgb_img, channel="l")
+    clear_colorspace_cache()
+    n_cached = len(_COLORSPACE_CACHE)
+    params.colorspace_cache = 0
+    assert np.array_equal(stale, expected) and not np.any(cleared) and n_cached == 0
@@ -2,7 +2,7 @@ import pytest
 import os
 import cv2
 from plantcv.plantcv import params
-from plantcv.plantcv._debug import _debug
+from plantcv.plantcv._debug import _debug, _build_visuals
 
 
 @pytest.mark.parametrize("debug", ["print", "plot", None])
@@ -15,3 +15,14 @@ def test_debug(debug, test_data, tmpdir):
     img = cv2.imread(test_data.small_rgb_img)
     _debug(visual=img, filename=output_img)
     assert True
+
+
+@pytest.mark.parametrize("visuals,debug,expected", [[True, None, True], [False, "plot", True], [False, None, False]])
+def test_build_visuals(visuals, debug, expected):
+    """Test for PlantCV."""
+    params.visuals = visuals
+    params.debug = debug
+    build = _build_visuals()
+    params.visuals = True
+    params.debug = None
+    assert build == expected
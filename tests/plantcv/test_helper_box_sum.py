@@ -0,0 +1,19 @@
+import pytest
+import numpy as np
+from scipy.ndimage import generic_filter
+from plantcv.plantcv._helpers import _pad_borders, _box_sum
+
+
+@pytest.mark.parametrize("borders", ["reflect", "constant", "nearest", "mirror", "wrap"])
+def test_box_sum(borders):
+    """Test for PlantCV."""
+    img = np.arange(30, dtype=np.uint8).reshape(5, 6)
+    padded = _pad_borders(img=img, ksize=4, borders=borders)
+    box = _box_sum(img=padded, height=4, width=4)
+    assert np.array_equal(box, generic_filter(img.astype(np.int64), np.sum, size=4, mode=borders))
+
+
+def test_pad_borders_bad_mode():
+    """Test for PlantCV."""
+    with pytest.raises(RuntimeError):
+        _ = _pad_borders(img=np.zeros((5, 5)), ksize=3, borders="bad")
@@ -0,0 +1,32 @@
+import cv2
+import numpy as np
+from plantcv.plantcv import params
+from plantcv.plantcv._helpers import _convert_colorspace, _COLORSPACE_CACHE
+
+
+def test_convert_colorspace(test_data):
+    """Test for PlantCV."""
+    params.colorspace_cache = 1
+    rgb_img = cv2.imread(test_data.small_rgb_img)
+    hsv = _convert_colorspace(rgb_img=rgb_img, conversion="hsv")
+    # All conversions of an image are kept together
+    _ = _convert_colorspace(rgb_img=rgb_img, conversion="lab")
+    cached = _convert_colorspace(rgb_img=rgb_img, conversion="hsv")
+    # The least recently used image is removed
+    other_img = rgb_img.copy()
+    _ = _convert_colorspace(rgb_img=other_img, conversion="hsv")
+    n_cached = len(_COLORSPACE_CACHE)
+    recomputed = _convert_colorspace(rgb_img=rgb_img, conversion="hsv")
+    # Conversions are removed with the source image
+    del rgb_img, other_img
+    n_deleted = len(_COLORSPACE_CACHE)
+    params.colorspace_cache = 0
+    assert cached is hsv and not hsv.flags.writeable and recomputed is not hsv
+    assert n_cached == 1 and n_deleted == 0
+
+
+def test_convert_colorspace_disabled(test_data):
+    """Test for PlantCV."""
+    rgb_img = cv2.imread(test_data.small_rgb_img)
+    hsv = _convert_colorspace(rgb_img=rgb_img, conversion="hsv")
+    assert np.array_equal(hsv, cv2.cvtColor(rgb_img, cv2.COLOR_BGR2HSV)) and hsv.flags.writeable
@@ -1,5 +1,6 @@
 import cv2
 import pytest
+import numpy as np
 from plantcv.plantcv._helpers import _iterate_analysis
 
 
@@ -17,6 +18,34 @@ def test_iterate_analysis_wrong_num_labels(test_data):
         _ = _iterate_analysis(img=mask, labeled_mask=mask, n_labels=1, label=["test", "test"], function=analysis_test_func)
 
 
+def test_iterate_analysis_crop():
+    """Test for PlantCV."""
+    img = np.arange(100, dtype=np.uint8).reshape((10, 10))
+    labeled_mask = np.zeros((10, 10), dtype=np.int32)
+    labeled_mask[2:4, 5:8] = 1
+    labeled_mask[6:9, 1:3] = 3
+    calls = []
+    out = _iterate_analysis(img=img, labeled_mask=labeled_mask, n_labels=3, label="test", crop=True,
+                            function=lambda img, mask, label: calls.append(
+                                (label, img.shape, int(img[mask > 0].sum()))))
+    # Each label gets the image and submask cropped to its bounding box, a missing label gets an empty full-size mask
+    assert calls == [("test_1", (2, 3), int(img[labeled_mask == 1].sum())), ("test_2", (10, 10), 0),
+                     ("test_3", (3, 2), int(img[labeled_mask == 3].sum()))]
+    assert out is img
+
+
+def test_iterate_analysis_offset():
+    """Test for PlantCV."""
+    img = np.zeros((10, 10), dtype=np.uint8)
+    labeled_mask = np.zeros((10, 10), dtype=np.int32)
+    labeled_mask[2:4, 5:8] = 1
+    calls = []
+    _ = _iterate_analysis(img=img, labeled_mask=labeled_mask, n_labels=2, label="test", crop=True, offset=True,
+                          function=lambda img, mask, label, offset: calls.append((label, mask.shape, offset)))
+    # Cropped submasks get their position in the image, a missing label gets an empty full-size mask
+    assert calls == [("test_1", (2, 3), (2, 5)), ("test_2", (10, 10), (0, 0))]
+
+
 def analysis_test_func(**kwargs):
     """Test analysis function."""
     return kwargs["img"]
@@ -0,0 +1,12 @@
+import numpy as np
+from plantcv.plantcv._helpers import _label_pixels
+
+
+def test_label_pixels():
+    """Test for PlantCV."""
+    labeled_mask = np.array([[2, 0, 1],
+                             [1, 5, 2]], dtype=np.int32)
+    # Label 3 is missing, label 5 is not expected
+    (rows, cols), bounds = _label_pixels(labeled_mask=labeled_mask, n_labels=3)
+    assert rows.tolist() == [0, 1, 0, 1] and cols.tolist() == [2, 0, 0, 2]
+    assert bounds.tolist() == [0, 2, 4, 4]
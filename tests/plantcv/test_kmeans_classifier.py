@@ -13,6 +13,16 @@ def test_predict_kmeans_classifier(test_data):
     assert (labeled_img == test_labeled).all()
 
 
+def test_predict_kmeans_classifier_tiles(test_data):
+    """Test for PlantCV."""
+    input_dir = test_data.kmeans_classifier_dir
+    rgb_img = cv2.imread(os.path.join(input_dir, "test_image.jpg"), -1)
+    labeled_img = predict_kmeans(img=rgb_img, model_path=os.path.join(input_dir, "kmeans_out.fit"), patch_size=4,
+                                 batch_size=100, n_workers=2)
+    test_labeled = cv2.imread(os.path.join(input_dir, "labeled_image.png"), -1)
+    assert (labeled_img == test_labeled).all()
+
+
 def test_predict_kmeans_classifier_gray(test_data):
     """Test for PlantCV."""
     input_dir_gray = test_data.kmeans_classifier_gray_dir
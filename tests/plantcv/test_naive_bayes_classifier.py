@@ -16,6 +16,14 @@ def test_naive_bayes_classifier(test_data):
     assert all(results)
 
 
+def test_naive_bayes_classifier_list(test_data):
+    """Test for PlantCV."""
+    # Read in test data
+    img = cv2.imread(test_data.small_rgb_img)
+    masks = naive_bayes_classifier(rgb_img=[img, img[::-1]], pdf_file=test_data.nb_trained_model)
+    assert len(masks) == 2 and all(np.array_equal(masks[0][name][::-1], masks[1][name]) for name in masks[0])
+
+
 def test_naive_bayes_classifier_bad_input(test_data):
     """Test for PlantCV."""
     # Read in test data
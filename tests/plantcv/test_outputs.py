@@ -2,8 +2,10 @@ import pytest
 import os
 import json
 import numpy as np
+import pandas as pd
 from shutil import copyfile
 from plantcv.plantcv import Outputs
+from plantcv.plantcv.classes import _read_results_log
 
 
 @pytest.mark.parametrize("datatype,value", [[list, []], [int, 2], [float, 2.2], [bool, True], [str, "2"], [dict, {}],
@@ -26,6 +28,41 @@ def test_add_observation_invalid_type():
                                 datatype=list, value=np.array([2]), label=[])
 
 
+@pytest.mark.parametrize("datatype,values,expected", [
+    [int, np.array([1, 2]), 2], [bool, [True, False], False], [list, np.zeros((2, 3)), [0.0, 0.0, 0.0]],
+    [list, [[1], [1, 2]], [1, 2]]])
+def test_add_observations(datatype, values, expected):
+    """Test for PlantCV."""
+    # Create output instance
+    outputs = Outputs()
+    outputs.add_observations(samples=["plant1", "plant2"], variable="test", trait="test variable", method="type",
+                             scale="none", datatype=datatype, values=values, label="none")
+    assert outputs.observations["plant2"]["test"]["value"] == expected
+    assert type(outputs.observations["plant1"]["test"]["value"]) is type(expected)
+
+
+def test_add_observations_order():
+    """Test for PlantCV."""
+    # Create output instance
+    outputs = Outputs()
+    outputs.add_observations(samples=["plant1", "plant2"], variable="test", trait="test variable", method="type",
+                             scale="none", datatype=int, values=[1, 2], label="none")
+    # Later observations replace earlier batches
+    outputs.add_observation(sample="plant1", variable="test", trait="test variable", method="type", scale="none",
+                            datatype=int, value=3, label="none")
+    assert [outputs.observations[sample]["test"]["value"] for sample in ["plant1", "plant2"]] == [3, 2]
+
+
+@pytest.mark.parametrize("values", [[1], [np.int64(1), np.int64(2)]])
+def test_add_observations_invalid(values):
+    """Test for PlantCV."""
+    # Create output instance
+    outputs = Outputs()
+    with pytest.raises(RuntimeError):
+        outputs.add_observations(samples=["plant1", "plant2"], variable="test", trait="test variable", method="type",
+                                 scale="none", datatype=int, values=np.array(values, dtype=object), label="none")
+
+
 def test_save_results_json_newfile(tmpdir):
     """Test for PlantCV."""
     # Create a test tmp directory
@@ -60,6 +97,71 @@ def test_save_results_json_existing_file(test_data, tmpdir):
         assert results["observations"]["default"]["test"]["value"] == "test"
 
 
+def test_save_results_jsonl(tmpdir):
+    """Test for PlantCV."""
+    # Create a test tmp directory
+    cache_dir = tmpdir.mkdir("cache")
+    results = {}
+    for outformat in ["json", "jsonl"]:
+        outfile = os.path.join(cache_dir, f"results.{outformat}")
+        # Create output instance
+        outputs = Outputs()
+        outputs.job_metadata = {"camera": {"label": "camera", "datatype": "<class 'str'>", "value": ["VIS"]}}
+        outputs.add_observation(sample='plant1', variable='area', trait='area', method='test', scale='none',
+                                datatype=int, value=1, label="none")
+        outputs.save_results(filename=outfile, outformat=outformat)
+        # Only the new observation is appended
+        outputs.add_observation(sample='plant2', variable='area', trait='area', method='test', scale='none',
+                                datatype=int, value=2, label="none")
+        outputs.save_results(filename=outfile, outformat=outformat)
+        if outformat == "jsonl":
+            results[outformat] = _read_results_log(filename=outfile)
+            with open(outfile, "r") as fp:
+                records = [json.loads(line) for line in fp]
+        else:
+            with open(outfile, "r") as fp:
+                results[outformat] = json.load(fp)
+    assert list(records[1]["updates"]) == ["plant2"]
+    assert results["json"]["observations"] == results["jsonl"]["observations"]
+    assert list(results["json"]["metadata"]) == list(results["jsonl"]["metadata"])
+
+
+def test_save_results_jsonl_replace(tmpdir):
+    """Test for PlantCV."""
+    # Create a test tmp directory
+    cache_dir = tmpdir.mkdir("cache")
+    outfile = os.path.join(cache_dir, "results.jsonl")
+    # Create output instance
+    outputs = Outputs()
+    outputs.add_observation(sample='plant1', variable='area', trait='area', method='test', scale='none',
+                            datatype=int, value=1, label="none")
+    outputs.save_results(filename=outfile, outformat="jsonl")
+    # Cleared observations are replaced like in a JSON results file
+    outputs.clear()
+    outputs.add_observation(sample='plant2', variable='area', trait='area', method='test', scale='none',
+                            datatype=int, value=2, label="none")
+    outputs.save_results(filename=outfile, outformat="jsonl")
+    assert list(_read_results_log(filename=outfile)["observations"]) == ["plant2"]
+
+
+def test_save_results_json_job_metadata(tmpdir):
+    """Test for PlantCV."""
+    # Create a test tmp directory
+    cache_dir = tmpdir.mkdir("cache")
+    outfile = os.path.join(cache_dir, "results.json")
+    # Create output instance
+    outputs = Outputs()
+    outputs.job_metadata = {"camera": {"label": "camera identifier", "datatype": "<class 'str'>", "value": ["SV"]}}
+    outputs.add_metadata(term="camera", datatype="str", value="TV")
+    # Job metadata is kept when measurements are cleared
+    outputs.clear()
+    outputs.add_metadata(term="camera", datatype="str", value="TV")
+    outputs.save_results(filename=outfile, outformat="json")
+    with open(outfile, "r") as fp:
+        results = json.load(fp)
+    assert results["metadata"]["camera"]["value"] == ["SV"] and results["metadata"]["camera_1"]["value"] == ["TV"]
+
+
 def test_save_results_csv(test_data, tmpdir):
     """Test for PlantCV."""
     # Create a test tmp directory
@@ -100,6 +202,26 @@ def test_save_results_csv_add_metadata(tmpdir):
     assert results[x] == "add_date,run_date,plantcv_version,sample,trait,value,label"
 
 
+def test_save_results_parquet(tmpdir):
+    """Test for PlantCV."""
+    # Create a test tmp directory
+    outfile = os.path.join(tmpdir.mkdir("cache"), "results")
+    # Create output instance
+    outputs = Outputs()
+    outputs.job_metadata = {"camera": {"label": "camera identifier", "datatype": "<class 'str'>", "value": ["SV"]}}
+    outputs.add_observation(sample='default', variable='boolean', trait='boolean variable', method='boolean',
+                            scale='none', datatype=bool, value=True, label="none")
+    outputs.add_observation(sample='default', variable='list', trait='list variable', method='list',
+                            scale='none', datatype=list, value=[1, 2, 3], label=[1, "b", 3])
+    outputs.add_observation(sample='default', variable='tuple_list', trait='list of tuples variable',
+                            method='tuple_list', scale='none', datatype=list, value=[(1, 2), (3, 4)], label=[1, 2])
+    outputs.save_results(filename=outfile, outformat="parquet")
+    scalar_df = pd.read_parquet(f"{outfile}-single-value-traits.parquet")
+    multi_df = pd.read_parquet(f"{outfile}-multi-value-traits.parquet")
+    assert scalar_df.loc[0, "camera"] == "SV" and scalar_df.loc[0, "boolean_none"] == 1
+    assert list(multi_df["value"]) == [1, 2, 3] and list(multi_df["label"]) == ["1", "b", "3"]
+
+
 def test_add_metadata_invalid_type():
     """Test for PlantCV."""
     # Create output instance
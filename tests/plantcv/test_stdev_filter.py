@@ -1,5 +1,6 @@
 import cv2
 import numpy as np
+from scipy.ndimage import generic_filter
 from plantcv.plantcv import stdev_filter, Objects
 
 
@@ -20,3 +21,10 @@ def test_stdev_filter_roi(test_data):
     roi = Objects(contours=[roi_con], hierarchy=[roi_str])
     filter_img = stdev_filter(img=img, ksize=11, roi=roi)
     assert img.shape == filter_img.shape
+
+
+def test_stdev_filter_values():
+    """Test for PlantCV."""
+    img = np.random.default_rng(0).random((20, 30))
+    filter_img = stdev_filter(img=img, ksize=5, borders="reflect")
+    assert np.allclose(filter_img, generic_filter(img, np.std, size=5, mode="reflect"))
@@ -1,8 +1,11 @@
 import pytest
 import numpy as np
 import cv2
+from scipy.ndimage import generic_filter
+from skimage.feature import graycomatrix, graycoprops
 from plantcv.plantcv.threshold import binary, gaussian, mean, otsu, custom_range, saturation, triangle, texture, \
     mask_bad, dual_channels
+from plantcv.plantcv.threshold.threshold_methods import _glcm_texture
 from plantcv.plantcv import params
 
 
@@ -183,6 +186,35 @@ def test_texture(threshold_test_data):
     assert gray_img.shape == binary_img.shape and np.array_equal(np.unique(binary_img), np.array([0, 255]))
 
 
+@pytest.mark.parametrize("method", ["contrast", "dissimilarity", "homogeneity", "ASM", "energy", "correlation"])
+def test_glcm_texture(method):
+    """Test for PlantCV."""
+    gray_img = np.random.default_rng(0).integers(0, 4, (10, 12)).astype(np.uint8) * 60
+
+    def calc_texture(window):
+        glcm = graycomatrix(window.reshape(5, 5).astype(np.uint8), [2], [0], 256, symmetric=True, normed=True)
+        return graycoprops(glcm, method)[0, 0]
+    expected = generic_filter(gray_img.astype(float), calc_texture, size=5, mode="wrap")
+    texture_img = _glcm_texture(gray_img, ksize=5, offset=2, texture_method=method, borders="wrap")
+    assert np.allclose(texture_img, expected)
+
+
+@pytest.mark.parametrize("ksize,offset", [[5, 1], [6, 3]])
+def test_texture_homogeneity_uniform(threshold_test_data, ksize, offset):
+    """Test for PlantCV."""
+    # Read in test data with uniform regions
+    gray_img = cv2.imread(threshold_test_data.small_gray_img, -1)[100:160, 150:230]
+
+    def calc_texture(window):
+        glcm = graycomatrix(window.reshape(ksize, ksize).astype(np.uint8), [offset], [0], 256, symmetric=True,
+                            normed=True)
+        return graycoprops(glcm, "homogeneity")[0, 0]
+    expected = generic_filter(gray_img.astype(float), calc_texture, size=ksize, mode="nearest").astype(np.uint8)
+    binary_img = texture(gray_img, ksize=ksize, threshold=0, offset=offset, texture_method="homogeneity")
+    # Uniform kernels have a homogeneity of exactly 1
+    assert np.array_equal(binary_img, np.where(expected > 0, 255, 0))
+
+
 @pytest.mark.parametrize("bad_type", ["native", "nan", "inf"])
 def test_mask_bad(bad_type):
     """Test for PlantCV."""
@@ -3,8 +3,14 @@
 from plantcv import plantcv as pcv
 from plantcv.parallel import workflow_inputs
 
-# Run main program.
-args = workflow_inputs(*["other"])
-_ = pcv.__version__
 
-pcv.outputs.save_results(filename=args.result)
+def main(args):
+    """Workflow entry point."""
+    _ = pcv.__version__
+
+    pcv.outputs.save_results(filename=args.result, outformat=args.outformat)
+
+
+# Run main program.
+if __name__ == "__main__":
+    main(workflow_inputs(*["other"]))
@@ -24,6 +24,34 @@ def test_run_json2csv(utils_test_data, tmpdir):
     assert main() is None
 
 
+def test_run_json2csv_workers(utils_test_data, tmpdir):
+    """Test for PlantCV."""
+    # Create tmp directory
+    tmp_dir = tmpdir.mkdir("cache")
+    # Mock ARGV
+    import sys
+    sys.argv = ["plantcv-utils", "json2csv",
+                "--json", utils_test_data.plantcv_results_file,
+                "--csv", os.path.join(str(tmp_dir), "exports"),
+                "--workers", "2"]
+    assert main() is None
+
+
+def test_run_compact_results(tmpdir):
+    """Test for PlantCV."""
+    # Create tmp directory
+    tmp_dir = tmpdir.mkdir("cache")
+    log_file = os.path.join(str(tmp_dir), "results.jsonl")
+    with open(log_file, "w") as fp:
+        fp.write('{"metadata": {}, "observations": {}}\n')
+    # Mock ARGV
+    import sys
+    sys.argv = ["plantcv-utils", "compact_results",
+                "--infile", log_file,
+                "--json", os.path.join(str(tmp_dir), "results.json")]
+    assert main() is None
+
+
 def test_run_tabulate_bayes_classes(utils_test_data, tmpdir):
     """Test for PlantCV."""
     # Create tmp directory
@@ -0,0 +1,41 @@
+import pytest
+import os
+import json
+from plantcv.plantcv import Outputs
+from plantcv.utils import compact_results
+
+
+def test_compact_results(tmpdir):
+    """Test for PlantCV."""
+    # Create tmp directory
+    tmp_dir = tmpdir.mkdir("cache")
+    log_file = os.path.join(str(tmp_dir), "results.jsonl")
+    json_file = os.path.join(str(tmp_dir), "results.json")
+    outputs = Outputs()
+    outputs.add_observation(sample="default", variable="test", trait="test variable", method="test", scale="none",
+                            datatype=str, value="test", label="none")
+    outputs.save_results(filename=log_file, outformat="jsonl")
+    compact_results(log_file=log_file, json_file=json_file)
+    with open(json_file, "r") as fp:
+        results = json.load(fp)
+    assert results["observations"]["default"]["test"]["value"] == "test"
+
+
+def test_compact_results_no_file(utils_test_data, tmpdir):
+    """Test for PlantCV."""
+    # Create tmp directory
+    tmp_dir = tmpdir.mkdir("cache")
+    with pytest.raises(IOError):
+        compact_results(log_file=os.path.join(utils_test_data.datadir, "not_a_file.jsonl"),
+                        json_file=os.path.join(str(tmp_dir), "results.json"))
+
+
+def test_compact_results_empty_log(tmpdir):
+    """Test for PlantCV."""
+    # Create tmp directory
+    tmp_dir = tmpdir.mkdir("cache")
+    log_file = os.path.join(str(tmp_dir), "results.jsonl")
+    with open(log_file, "w") as fp:
+        fp.write('{"metadata": {}')
+    with pytest.raises(ValueError):
+        compact_results(log_file=log_file, json_file=os.path.join(str(tmp_dir), "results.json"))
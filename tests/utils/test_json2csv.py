@@ -1,5 +1,7 @@
 import pytest
 import os
+import csv
+import json
 from plantcv.utils import json2csv
 
 
@@ -26,3 +28,54 @@ def test_json2csv_bad_json(utils_test_data, tmpdir):
     tmp_dir = tmpdir.mkdir("cache")
     with pytest.raises(ValueError):
         json2csv(json_file=utils_test_data.invalid_results_file, csv_prefix=os.path.join(str(tmp_dir), "exports"))
+
+
+def test_json2csv_workers(utils_test_data, tmpdir):
+    """Test for PlantCV."""
+    # Create tmp directory
+    tmp_dir = tmpdir.mkdir("cache")
+    # Results file written by process_results, with the variables after one entity per line
+    with open(utils_test_data.plantcv_results_file, "r") as fp:
+        data = json.load(fp)
+    json_file = os.path.join(str(tmp_dir), "results.json")
+    # Each copy of the entities has its own sample names
+    entities = [dict(entity, observations={f"{sample}{i}": obs for sample, obs in entity["observations"].items()})
+                for i in range(5) for entity in data["entities"]]
+    with open(json_file, "w") as fp:
+        fp.write('{"entities": [' + ",\n".join(json.dumps(entity) for entity in entities) +
+                 '], "variables": ' + json.dumps(data["variables"]) + '}')
+    json2csv(json_file=json_file, csv_prefix=os.path.join(str(tmp_dir), "serial"))
+    json2csv(json_file=json_file, csv_prefix=os.path.join(str(tmp_dir), "parallel"), workers=2)
+    # Shards are converted in parallel and give the same tables
+    for table in ["-single-value-traits.csv", "-multi-value-traits.csv"]:
+        with open(os.path.join(str(tmp_dir), f"serial{table}")) as serial, \
+                open(os.path.join(str(tmp_dir), f"parallel{table}")) as parallel:
+            assert serial.read() == parallel.read()
+    with open(os.path.join(str(tmp_dir), "serial-single-value-traits.csv")) as fp:
+        assert len(fp.readlines()) == 5 * len(data["entities"]) + 1
+
+
+def test_json2csv_duplicate_samples(utils_test_data, tmpdir):
+    """Test for PlantCV."""
+    # Create tmp directory
+    tmp_dir = tmpdir.mkdir("cache")
+    with open(utils_test_data.plantcv_results_file, "r") as fp:
+        data = json.load(fp)
+    entity = data["entities"][0]
+    sample = list(entity["observations"])[0]
+    # A later copy of the sample with one new value and one trait removed
+    duplicate = json.loads(json.dumps(entity))
+    traits = [var for var, obs in duplicate["observations"][sample].items() if not isinstance(obs["value"], list)]
+    duplicate["observations"][sample][traits[0]]["value"] = "last"
+    del duplicate["observations"][sample][traits[1]]
+    data["entities"] = [entity, duplicate]
+    json_file = os.path.join(str(tmp_dir), "results.json")
+    with open(json_file, "w") as fp:
+        json.dump(data, fp)
+    json2csv(json_file=json_file, csv_prefix=os.path.join(str(tmp_dir), "exports"))
+    # Duplicate samples are merged into one row, the last value of each trait is kept
+    with open(os.path.join(str(tmp_dir), "exports-single-value-traits.csv")) as fp:
+        header, *rows = list(csv.reader(fp))
+    values = dict(zip(header, rows[0]))
+    label = entity["observations"][sample][traits[1]]["label"]
+    assert len(rows) == 1 and "last" in values.values() and values[f"{traits[1]}_{label}"] != ""